@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional 
 from pydantic import BaseModel
 
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.category import Category
+from ..services.response_cache import get_response_cache
 
 router = APIRouter()
 
@@ -18,15 +20,18 @@ class CategoryResponse(BaseModel):
         from_attributes = True
 
 @router.get("/categories", response_model=List[CategoryResponse])
-async def get_categories(db: Session = Depends(get_db)):
-    """获取所有新闻分类"""
-    categories = db.query(Category).all()
-    return categories
+async def get_categories(db: AsyncSession = Depends(get_async_db)):
+    """获取所有新闻分类（缓存，新文章入库后失效）"""
+    async def compute():
+        categories = (await db.execute(select(Category))).scalars().all()
+        return [CategoryResponse.model_validate(c).model_dump() for c in categories]
+
+    return await get_response_cache().get_or_compute("categories", {}, compute)
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: str, db: Session = Depends(get_db)):
+async def get_category(category_id: str, db: AsyncSession = Depends(get_async_db)):
     """根据ID获取分类详情"""
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     
     if not category:
         raise HTTPException(status_code=404, detail="分类不存在")
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, HttpUrl
-import asyncio
 import logging
 
-from ..db.database import get_db
-from ..services.crawler import NewsCrawlerService
-from ..services.scheduler import get_scheduler
+from ..config import RUNS_WORKER
+from ..services.crawler import get_crawler_service
+from ..services.scheduler import get_cluster_scheduler_status
+from ..services.crawl_jobs import get_crawl_job_manager
+from ..services.crawl_ledger import get_crawl_ledger
+from ..services import llm_telemetry
+from ..services.metrics import PROMETHEUS_CONTENT_TYPE
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -16,14 +19,13 @@ router = APIRouter()
 # 请求模型
 class CrawlUrlRequest(BaseModel):
     url: HttpUrl
-    
-# 创建服务实例
-crawler_service = NewsCrawlerService()
 
 @router.post("/crawler/url")
 async def crawl_url(request: CrawlUrlRequest, background_tasks: BackgroundTasks):
-    """爬取指定URL的新闻内容"""
+    """爬取指定URL的新闻内容（只在启用爬虫的进程中处理）"""
     logger.info(f"收到爬取请求: {request.url}")
+    if not RUNS_WORKER:
+        raise HTTPException(status_code=503, detail="当前进程未启用爬虫 (RUN_MODE=api)，请提交到 worker 进程")
     
     # 使用后台任务处理爬取
     background_tasks.add_task(_process_url_crawl, str(request.url))
@@ -33,59 +35,125 @@ async def crawl_url(request: CrawlUrlRequest, background_tasks: BackgroundTasks)
         "url": str(request.url)
     }
 
-@router.post("/crawler/discover")
-async def discover_news(background_tasks: BackgroundTasks):
-    """触发新闻自动发现流程"""
+@router.post("/crawler/discover", status_code=202)
+async def discover_news():
+    """触发新闻自动发现流程（与 /admin/crawl-now 相同，作为爬取任务在后台执行）"""
     logger.info("收到新闻发现请求")
-    
-    # 使用后台任务处理发现
-    background_tasks.add_task(_process_news_discovery)
-    
-    return {
-        "message": "新闻发现流程已启动，正在后台处理"
-    }
+    return await _submit_crawl_job("api")
 
 @router.get("/crawler/status")
 async def get_crawler_status():
-    """获取爬虫调度器状态"""
+    """获取爬虫调度器状态
+
+    调度器只在持有租约的主节点上运行，这里返回主节点上报的状态，可由任意工作进程响应。
+    """
     try:
-        scheduler = get_scheduler()
-        status = scheduler.get_status()
+        cluster_status = await get_cluster_scheduler_status()
         return {
-            "scheduler_status": status,
+            "scheduler_status": cluster_status["status"],
+            "leader": cluster_status["leader"],
             "message": "调度器状态获取成功"
         }
     except Exception as e:
         logger.error(f"获取调度器状态失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取状态失败: {str(e)}")
 
-@router.post("/admin/crawl-now")
+def _require_llm_process():
+    """LLM 调用只发生在启用爬虫的进程中，统计保存在各进程内存里，API 进程没有可返回的数据"""
+    if not RUNS_WORKER:
+        raise HTTPException(status_code=503, detail="当前进程不调用大模型 (RUN_MODE=api)，请向 worker 进程查询")
+
+@router.get("/crawler/llm-stats")
+async def get_llm_stats():
+    """获取 LLM 调用统计（按任务和模型的延迟、token、错误与成本）
+
+    统计只覆盖响应请求的这个进程，多个 worker 时需分别查询。
+    """
+    _require_llm_process()
+    return llm_telemetry.get_llm_stats(get_crawler_service().get_model_health())
+
+@router.get("/crawler/llm-metrics", response_class=PlainTextResponse)
+async def get_llm_metrics():
+    """以 Prometheus 文本格式输出本进程的 LLM 调用指标（按进程抓取）"""
+    _require_llm_process()
+    return PlainTextResponse(llm_telemetry.render_llm_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.post("/admin/crawl-now", status_code=202)
 async def admin_crawl_now():
-    """管理员触发立即爬取任务"""
+    """管理员触发立即爬取任务
+
+    立即返回任务ID，爬取在后台执行；通过 /crawler/jobs/{job_id} 查询进度。
+    已有爬取任务在运行时（包括定时任务）不会重复启动，直接返回该任务。
+    """
     logger.info("管理员触发立即爬取")
-    
-    # 使用调度器的手动执行功能
+    return await _submit_crawl_job("manual")
+
+@router.get("/crawler/jobs")
+async def list_crawl_jobs():
+    """最近的爬取任务（新的在前）"""
+    return {"jobs": await get_crawl_job_manager().list_jobs()}
+
+@router.get("/crawler/jobs/{job_id}")
+async def get_crawl_job(job_id: str):
+    """获取爬取任务的状态与进度"""
+    job = await get_crawl_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="爬取任务不存在")
+    return job
+
+@router.post("/crawler/jobs/{job_id}/cancel")
+async def cancel_crawl_job(job_id: str):
+    """取消爬取任务"""
+    job = await get_crawl_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="爬取任务不存在")
+    if job["state"] in ("succeeded", "failed"):
+        raise HTTPException(status_code=409, detail=f"爬取任务已结束: {job['state']}")
+    return job
+
+@router.get("/crawler/runs")
+async def list_crawl_runs(limit: int = Query(20, ge=1, le=200)):
+    """爬取运行记录（持久化，重启后仍可查询）"""
+    return {"runs": await get_crawl_ledger().list_runs(limit)}
+
+@router.get("/crawler/runs/{run_id}/attempts")
+async def list_crawl_attempts(run_id: str):
+    """某次运行中每篇文章的处理结果与各阶段耗时（明细压缩后不再可查）"""
+    return {"attempts": await get_crawl_ledger().list_attempts(run_id)}
+
+@router.get("/crawler/ledger/throughput")
+async def get_crawl_throughput(
+    hours: float = Query(24, gt=0, le=24 * 30),
+    bucket_minutes: int = Query(60, ge=5, le=24 * 60),
+):
+    """时间窗口内的爬取吞吐与各阶段耗时分位数"""
+    return await get_crawl_ledger().throughput(hours, bucket_minutes)
+
+@router.get("/crawler/ledger/sources")
+async def get_slowest_sources(days: int = Query(7, ge=1, le=365), limit: int = Query(10, ge=1, le=100)):
+    """按平均单篇耗时排序的最慢来源"""
+    return {"sources": await get_crawl_ledger().slowest_sources(days, limit)}
+
+async def _submit_crawl_job(trigger: str):
     try:
-        scheduler = get_scheduler()
-        result = await scheduler.run_once()
-        
-        if result["success"]:
-            return {
-                "message": f"爬取任务完成，发现 {result['news_count']} 条新闻",
-                "duration": result["duration"],
-                "news_count": result["news_count"]
-            }
-        else:
-            raise HTTPException(status_code=500, detail=result["error"])
+        job, coalesced = await get_crawl_job_manager().submit(trigger)
     except Exception as e:
-        logger.error(f"爬取任务失败: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"爬取任务失败: {str(e)}")
+        logger.error(f"创建爬取任务失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"创建爬取任务失败: {str(e)}")
+    if coalesced:
+        message = "已有爬取任务在运行，已并入该任务"
+    elif not RUNS_WORKER:
+        message = "爬取请求已提交，等待 worker 进程执行"
+    else:
+        message = "爬取任务已启动，正在后台执行"
+    return {"message": message, "job_id": job["id"], "coalesced": coalesced, "job": job}
 
 # 后台任务处理函数
 async def _process_url_crawl(url: str):
     """处理URL爬取的后台任务"""
     try:
         logger.info(f"后台任务：开始爬取URL: {url}")
+        crawler_service = get_crawler_service()
         result = await crawler_service.crawl_url(url)
 
         if result["success"]:
@@ -102,7 +170,7 @@ async def _process_url_crawl(url: str):
             logger.info(f"后台任务：爬取URL成功，且判断为相关内容: {url}")
             # 准备数据并保存
             news_data = await crawler_service._prepare_news_data(result, source_name="Manual Submit")
-            save_result = crawler_service._save_news(news_data)
+            save_result = await crawler_service._save_news(news_data)
             if save_result['success']:
                  logger.info(f"后台任务：手动提交的内容已保存: {save_result['news_id']}")
             else:
@@ -112,12 +180,3 @@ async def _process_url_crawl(url: str):
             logger.error(f"后台任务：爬取URL失败: {url}, 错误: {result.get('error', '未知错误')}")
     except Exception as e:
         logger.error(f"后台任务：处理URL爬取时出错: {str(e)}", exc_info=True)
-
-async def _process_news_discovery():
-    """处理新闻发现的后台任务"""
-    try:
-        logger.info("开始新闻发现流程")
-        results = await crawler_service.discover_news()
-        logger.info(f"新闻发现完成，发现 {len(results)} 条新闻")
-    except Exception as e:
-        logger.error(f"新闻发现流程失败: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+from ..services.events import get_event_bus, sse_stream
+
+router = APIRouter()
+
+@router.get("/events")
+async def stream_events(
+    types: Optional[str] = Query(None, description="逗号分隔的事件类型，如 news,crawler；不传表示全部"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Server-Sent Events 推送：新文章入库 (news) 与爬虫进度 (crawler)"""
+    bus = get_event_bus()
+    wanted = {t.strip() for t in types.split(",") if t.strip()} if types else None
+    return StreamingResponse(
+        sse_stream(bus, wanted, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/events/status")
+async def get_events_status():
+    """推送通道状态：当前订阅数、已发布与丢弃的事件数"""
+    return get_event_bus().get_status()
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from ..db.database import get_async_db
+from ..services.feed import fetch_feed_page
+from ..services.pagination import NEXT_CURSOR_HEADER
+from .news import NewsResponse
+
+router = APIRouter()
+
+@router.get("/feed", response_model=List[NewsResponse])
+async def get_feed(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 返回的游标"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """获取用户的个性化信息流（订阅的分类和信息源），按发布时间倒序"""
+    # 实际项目应通过token获取当前用户，这里用user_id做演示
+    try:
+        items, cursor_out = await fetch_feed_page(db, user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {NEXT_CURSOR_HEADER: cursor_out} if cursor_out else None
+    return JSONResponse(content=items, headers=headers)
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db.database import get_async_db
 from ..models.history import BrowseHistory
 from ..models.news import News
-from ..models.user import User
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
+from ..services.history_buffer import get_history_buffer
+from ..services.pagination import NEXT_CURSOR_HEADER, decode_cursor, keyset_after_desc, next_cursor
 
 router = APIRouter()
 
@@ -19,40 +22,53 @@ class HistoryOut(BaseModel):
     summary: str
     viewed_at: str
 
-    class Config:
-        orm_mode = True
-
 @router.post("/add", status_code=201)
-def add_history(data: HistoryIn, db: Session = Depends(get_db)):
-    print(f"[调试] 收到添加历史请求 user_id={data.user_id}, news_id={data.news_id}")
-    news = db.query(News).filter(News.id == data.news_id).first()
-    if not news:
-        print(f"[调试] 新闻不存在: news_id={data.news_id}")
+async def add_history(data: HistoryIn, db: AsyncSession = Depends(get_async_db)):
+    # 浏览记录进入写缓冲，由后台批量写入
+    buffer = get_history_buffer()
+    if not await buffer.user_exists(db, data.user_id):
+        raise HTTPException(status_code=404, detail="用户不存在")
+    if not await buffer.news_exists(db, data.news_id):
         raise HTTPException(status_code=404, detail="新闻不存在")
-    try:
-        history = BrowseHistory(user_id=data.user_id, news_id=data.news_id)
-        db.add(history)
-        db.commit()
-        print(f"[调试] 浏览历史写入成功 user_id={data.user_id}, news_id={data.news_id}")
-        return {"msg": "ok"}
-    except Exception as e:
-        print(f"[调试] 浏览历史写入失败: {e}")
-        raise HTTPException(status_code=500, detail="写入历史失败")
-    summary: str
-    viewed_at: str
-
-    class Config:
-        orm_mode = True
+    await buffer.add(data.user_id, data.news_id)
+    return {"msg": "ok"}
 
 @router.get("/", response_model=List[HistoryOut])
-def get_history(user_id: str, db: Session = Depends(get_db)):
+async def get_history(
+    user_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 返回的游标"),
+    db: AsyncSession = Depends(get_async_db)
+):
     # 实际项目应通过token获取当前用户，这里用user_id做演示
-    history = db.query(BrowseHistory).join(News).filter(BrowseHistory.user_id == user_id).order_by(BrowseHistory.viewed_at.desc()).limit(20).all()
+    # 该用户还有未提交的浏览记录（含正在写入的一批）时先刷新缓冲，保证能读到自己刚写入的记录
+    buffer = get_history_buffer()
+    if buffer.has_pending(user_id):
+        await buffer.flush()
+
+    # 按 (viewed_at, id) 做 keyset 分页，走 browse_history(user_id, viewed_at, id) 索引
+    stmt = (
+        select(BrowseHistory.id, BrowseHistory.news_id, BrowseHistory.viewed_at, News.title, News.summary)
+        .join(News, News.id == BrowseHistory.news_id)
+        .where(BrowseHistory.user_id == user_id)
+    )
+    if cursor:
+        try:
+            values = decode_cursor(cursor, [datetime, str])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        stmt = stmt.where(keyset_after_desc([BrowseHistory.viewed_at, BrowseHistory.id], values))
+    stmt = stmt.order_by(BrowseHistory.viewed_at.desc(), BrowseHistory.id.desc()).limit(limit)
+    history = (await db.execute(stmt)).all()
+    cursor_out = next_cursor(history, limit, lambda h: [h.viewed_at, h.id])
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
     return [
         HistoryOut(
             news_id=h.news_id,
-            title=h.news.title,
-            summary=h.news.summary,
+            title=h.title,
+            summary=h.summary,
             viewed_at=h.viewed_at.isoformat()
         ) for h in history
     ]
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..services.instrumentation import get_loop_lag_monitor, get_slow_request_profiler
+from ..services.metrics import PROMETHEUS_CONTENT_TYPE, registry
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """以 Prometheus 文本格式输出本进程的全部指标（请求、数据库、事件循环、爬虫与 LLM）"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/metrics/slow-requests")
+async def get_slow_requests():
+    """最近的慢请求采样分析结果（需设置 SLOW_REQUEST_PROFILE_SECONDS 开启）"""
+    profiler = get_slow_request_profiler()
+    return {
+        "enabled": profiler.enabled,
+        "threshold_seconds": profiler.threshold,
+        "max_event_loop_lag_seconds": round(get_loop_lag_monitor().max_lag, 6),
+        "profiles": profiler.get_profiles(),
+    }
@@ -1,11 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, selectinload
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..models.news import News
-from ..models.category import Category
+from ..services.news_reader import LIST_COLUMNS, fetch_news_page, serialize_rows
+from ..services.pagination import NEXT_CURSOR_HEADER
+from ..services.response_cache import get_response_cache
+from ..services.vector_index import find_related
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -31,6 +37,9 @@ class NewsResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class RelatedNewsResponse(NewsResponse):
+    similarity: float
+
 class NewsDetailResponse(NewsResponse):
     content: str
     crawled_at: datetime
@@ -45,36 +54,60 @@ async def get_news(
     days: Optional[int] = Query(7, ge=1, le=30),
     skip: Optional[int] = Query(0, ge=0),
     limit: Optional[int] = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 返回的游标"),
+    sort: str = Query("importance", pattern="^(importance|hot)$", description="importance 按重要性，hot 按随时间衰减的热度"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取新闻列表，可根据分类、重要性评分和时间范围筛选"""
-    # 构建基础查询
-    query = db.query(News)
-    
-    # 应用分类过滤
-    if category:
-        query = query.join(News.categories).filter(Category.name == category)
-    
-    # 应用评分过滤
-    if min_score > 0:
-        query = query.filter(News.importance_score >= min_score)
-    
-    # 应用时间范围过滤
-    if days:
-        time_threshold = datetime.now() - timedelta(days=days)
-        query = query.filter(News.published_at >= time_threshold)
-    
-    # 排序、分页
-    total = query.count()
-    news_items = query.order_by(News.importance_score.desc(), News.published_at.desc()).offset(skip).limit(limit).all()
-    return news_items
+    """获取新闻列表，可根据分类、重要性评分和时间范围筛选
+
+    直接返回列投影后的字典，不经过 ORM 实体和 Pydantic 校验。
+    下一页游标放在 X-Next-Cursor 响应头中，没有更多数据时不返回该头。
+    结果按查询参数缓存，新文章入库后失效。
+    """
+    async def compute():
+        news_items, cursor_out = await fetch_news_page(db, category, min_score, days, skip, limit, cursor, sort)
+        return {"items": news_items, "cursor": cursor_out}
+
+    params = {"category": category, "min_score": min_score, "days": days,
+              "skip": skip, "limit": limit, "cursor": cursor, "sort": sort}
+    try:
+        page = await get_response_cache().get_or_compute("news_list", params, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {NEXT_CURSOR_HEADER: page["cursor"]} if page["cursor"] else None
+    return JSONResponse(content=page["items"], headers=headers)
 
 @router.get("/news/{news_id}", response_model=NewsDetailResponse)
-async def get_news_detail(news_id: str, db: Session = Depends(get_db)):
+async def get_news_detail(news_id: str, db: AsyncSession = Depends(get_async_db)):
     """根据ID获取新闻详情"""
-    news = db.query(News).filter(News.id == news_id).first()
-    
+    async def compute():
+        news = (await db.execute(
+            select(News).options(defer(News.raw_html), selectinload(News.categories)).where(News.id == news_id)
+        )).scalar_one_or_none()
+        return NewsDetailResponse.model_validate(news).model_dump(mode="json") if news else None
+
+    news = await get_response_cache().get_or_compute("news_detail", {"id": news_id}, compute)
     if not news:
         raise HTTPException(status_code=404, detail="新闻不存在")
     
-    return news
\ No newline at end of file
+    return JSONResponse(content=news)
+
+@router.get("/news/{news_id}/related", response_model=List[RelatedNewsResponse])
+async def get_related_news(
+    news_id: str,
+    limit: int = Query(5, ge=1, le=20),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """根据向量相似度获取相关新闻"""
+    related = await find_related(db, news_id, limit)
+    if related is None:
+        raise HTTPException(status_code=404, detail="新闻不存在")
+    if not related:
+        return JSONResponse(content=[])
+
+    similarity = dict(related)
+    rows = (await db.execute(select(*LIST_COLUMNS).where(News.id.in_(similarity)))).all()
+    items = await serialize_rows(db, sorted(rows, key=lambda row: similarity[row.id], reverse=True))
+    for item in items:
+        item["similarity"] = round(similarity[item["id"]], 4)
+    return JSONResponse(content=items)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from ..db.database import get_async_db
+from ..services.search import search_news
+from .news import NewsResponse
+
+router = APIRouter()
+
+class SearchResult(NewsResponse):
+    search_score: float
+
+@router.get("/search", response_model=List[SearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="搜索关键词，支持中英文混合"),
+    days: Optional[int] = Query(None, ge=1, le=365),
+    skip: int = Query(0, ge=0, le=500),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """全文搜索新闻（标题、摘要、正文），按 BM25 相关度结合重要性与时效排序"""
+    results = await search_news(db, q, skip=skip, limit=limit, days=days)
+    return JSONResponse(content=results)
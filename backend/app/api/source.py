@@ -5,6 +5,7 @@ from pydantic import BaseModel
 from ..db.database import get_db
 from ..models.source import Source, UserSourceSubscription
 from ..models.user import User
+from ..services.feed import rebuild_user_feed_sync
 
 router = APIRouter()
 
@@ -62,6 +63,9 @@ def subscribe_source(data: SourceSubIn, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="已订阅该信息源")
     sub = UserSourceSubscription(user_id=data.user_id, source_id=data.source_id)
     db.add(sub)
+    db.flush()
+    # 订阅变更后重建该用户的信息流
+    rebuild_user_feed_sync(db, data.user_id)
     db.commit()
     db.refresh(sub)
     return sub
@@ -72,6 +76,8 @@ def unsubscribe_source(data: SourceSubIn, db: Session = Depends(get_db)):
     if not sub:
         raise HTTPException(status_code=404, detail="未订阅该信息源")
     db.delete(sub)
+    db.flush()
+    rebuild_user_feed_sync(db, data.user_id)
     db.commit()
     return {"message": "取消订阅成功"}
 
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, timedelta
+
+from ..db.database import get_async_db
+from ..models.news import News
+from ..models.story import StoryCluster
+from ..services.news_reader import LIST_COLUMNS, serialize_rows
+from ..services.response_cache import get_response_cache
+from .news import NewsResponse
+
+router = APIRouter()
+
+class StoryResponse(NewsResponse):
+    story_id: str
+    story_size: int
+
+@router.get("/stories", response_model=List[StoryResponse])
+async def get_stories(
+    days: Optional[int] = Query(2, ge=1, le=30),
+    min_size: int = Query(1, ge=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """获取事件列表：每个事件簇返回一篇代表文章（簇内重要性最高），附带报道数量"""
+    async def compute():
+        stmt = (
+            select(*LIST_COLUMNS, StoryCluster.id.label("story_id"), StoryCluster.size.label("story_size"))
+            .join(News, News.id == StoryCluster.representative_id)
+            .where(StoryCluster.last_updated_at >= datetime.now() - timedelta(days=days))
+        )
+        if min_size > 1:
+            stmt = stmt.where(StoryCluster.size >= min_size)
+        stmt = stmt.order_by(
+            StoryCluster.importance_score.desc(), StoryCluster.last_updated_at.desc(), StoryCluster.id.desc()
+        ).offset(skip).limit(limit)
+        rows = (await db.execute(stmt)).all()
+        items = await serialize_rows(db, rows)
+        for item, row in zip(items, rows):
+            item["story_id"] = row.story_id
+            item["story_size"] = row.story_size
+        return items
+
+    params = {"days": days, "min_size": min_size, "skip": skip, "limit": limit}
+    return JSONResponse(content=await get_response_cache().get_or_compute("stories", params, compute))
+
+@router.get("/stories/{story_id}/news", response_model=List[NewsResponse])
+async def get_story_news(story_id: str, db: AsyncSession = Depends(get_async_db)):
+    """获取同一事件簇内的全部报道，按发布时间倒序"""
+    if await db.get(StoryCluster, story_id) is None:
+        raise HTTPException(status_code=404, detail="事件不存在")
+    rows = (await db.execute(
+        select(*LIST_COLUMNS).where(News.story_id == story_id).order_by(News.published_at.desc(), News.id.desc())
+    )).all()
+    return JSONResponse(content=await serialize_rows(db, rows))
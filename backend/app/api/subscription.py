@@ -6,6 +6,7 @@ from ..db.database import get_db
 from ..models.subscription import UserCategorySubscription
 from ..models.category import Category
 from ..models.user import User
+from ..services.feed import rebuild_user_feed_sync
 
 router = APIRouter()
 
@@ -31,6 +32,9 @@ def subscribe(data: SubscriptionIn, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="已订阅该频道")
     sub = UserCategorySubscription(user_id=data.user_id, category_id=data.category_id)
     db.add(sub)
+    db.flush()
+    # 订阅变更后重建该用户的信息流
+    rebuild_user_feed_sync(db, data.user_id)
     db.commit()
     db.refresh(sub)
     return sub
@@ -41,6 +45,8 @@ def unsubscribe(data: SubscriptionIn, db: Session = Depends(get_db)):
     if not sub:
         raise HTTPException(status_code=404, detail="未订阅该频道")
     db.delete(sub)
+    db.flush()
+    rebuild_user_feed_sync(db, data.user_id)
     db.commit()
     return {"message": "取消订阅成功"}
 
@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 # 先尝试加载根目录的 .env 文件
@@ -6,12 +7,47 @@ load_dotenv(dotenv_path="../.env")  # 根目录的环境变量文件
 # 再加载当前目录的 .env 文件（如果存在的话）
 load_dotenv()  # 当前目录的环境变量文件
 
+# 进程角色：api 只提供接口（不导入爬虫、不需要 LLM 密钥），worker 负责爬取、写入与后台任务，all 两者兼有
+RUN_MODE = os.getenv("RUN_MODE", "all").lower()
+if RUN_MODE not in ("api", "worker", "all"):
+    raise ValueError(f"RUN_MODE 必须是 api、worker 或 all，当前为: {RUN_MODE}")
+RUNS_API = RUN_MODE in ("api", "all")
+RUNS_WORKER = RUN_MODE in ("worker", "all")
+
 # 数据库配置
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./news.db")
+# 异步驱动的数据库地址，默认由 DATABASE_URL 推导 (sqlite -> aiosqlite, postgresql -> psycopg 异步模式)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# 存储配置档：auto 按 DATABASE_URL 自动选择，也可显式指定 sqlite / postgres
+DB_PROFILE = os.getenv("DB_PROFILE", "auto")
+# SQLite 配置档：WAL 模式让爬虫写入时读请求不被阻塞
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # 负数表示 KB，即 64MB
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+# Postgres 配置档：连接池与语句超时
+POSTGRES_POOL = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "True").lower() == "true",
+}
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
 
 # Redis配置
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
+# 响应缓存配置：默认进程内 LRU，设为 redis 时使用 REDIS_URL（多进程共享失效）
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))  # 秒，兜底过期时间
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+
 # 爬虫配置
 CRAWLER_USER_AGENT = os.getenv("CRAWLER_USER_AGENT", "NewsMinimalist/1.0")
 CRAWLER_REQUEST_TIMEOUT = int(os.getenv("CRAWLER_REQUEST_TIMEOUT", "30"))
@@ -19,11 +55,118 @@ CRAWLER_HEADLESS = os.getenv("CRAWLER_HEADLESS", "True").lower() == "true"
 
 # --- 新增 OpenRouter 配置 ---
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+# OpenAI 兼容接口地址，压测时可指向本地桩服务 (tools/openrouter_stub.py)
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 # 推荐使用一个性价比较高的模型，例如 mistralai/mistral-7b-instruct
 # 你可以根据需要选择其他模型: https://openrouter.ai/docs#models
 OPENROUTER_MODEL_NAME = os.getenv("OPENROUTER_MODEL_NAME", "qwen/qwen2.5-vl-72b-instruct:free")
 # --- 结束新增 ---
 
+# --- 模型路由配置 ---
+# 小模型：负责相关性判断、重要性评分、分类等短输出任务
+OPENROUTER_FAST_MODEL_NAME = os.getenv("OPENROUTER_FAST_MODEL_NAME", "mistralai/mistral-7b-instruct:free")
+# 大模型：负责正文提取、摘要生成等长输出任务（默认沿用 OPENROUTER_MODEL_NAME）
+OPENROUTER_LARGE_MODEL_NAME = os.getenv("OPENROUTER_LARGE_MODEL_NAME", OPENROUTER_MODEL_NAME)
+# 备用模型链（逗号分隔，按顺序尝试），超时或 429 时切换到下一个模型
+OPENROUTER_FALLBACK_MODELS = [
+    m.strip() for m in os.getenv("OPENROUTER_FALLBACK_MODELS", "").split(",") if m.strip()
+]
+# 单次调用超时（秒）：小模型任务使用更短的超时，尽快切换到备用模型
+LLM_FAST_TIMEOUT = float(os.getenv("LLM_FAST_TIMEOUT", "15"))
+LLM_LARGE_TIMEOUT = float(os.getenv("LLM_LARGE_TIMEOUT", "60"))
+# 模型健康度：平均延迟超过该值（秒）视为变慢，优先使用其他模型
+LLM_SLOW_LATENCY_THRESHOLD = float(os.getenv("LLM_SLOW_LATENCY_THRESHOLD", "20"))
+# 模型超时或被限流后的冷却时间（秒）
+LLM_MODEL_COOLDOWN = float(os.getenv("LLM_MODEL_COOLDOWN", "120"))
+# 模型价格（美元 / 百万 token），用于估算调用成本。格式为 JSON:
+# {"model-name": {"prompt": 0.2, "completion": 0.6}}，以 ":free" 结尾的模型视为免费
+LLM_MODEL_PRICES = json.loads(os.getenv("LLM_MODEL_PRICES", "{}"))
+
+# 全文搜索配置
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "200"))  # BM25 候选集大小
+SEARCH_CONTENT_LIMIT = int(os.getenv("SEARCH_CONTENT_LIMIT", "20000"))  # 正文最多索引的字符数
+SEARCH_IMPORTANCE_WEIGHT = float(os.getenv("SEARCH_IMPORTANCE_WEIGHT", "0.5"))
+SEARCH_RECENCY_HALF_LIFE_HOURS = float(os.getenv("SEARCH_RECENCY_HALF_LIFE_HOURS", "72"))
+
+# 新闻批量写入配置：攒够批大小或等待超时后在一个事务中写入
+NEWS_WRITER_BATCH_SIZE = int(os.getenv("NEWS_WRITER_BATCH_SIZE", "20"))
+NEWS_WRITER_MAX_WAIT = float(os.getenv("NEWS_WRITER_MAX_WAIT", "0.5"))  # 秒
+
+# 浏览历史写缓冲配置：缓冲条数达到上限或定时批量写入
+HISTORY_BUFFER_SIZE = int(os.getenv("HISTORY_BUFFER_SIZE", "200"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "5"))  # 秒
+HISTORY_NEWS_ID_CACHE_SIZE = int(os.getenv("HISTORY_NEWS_ID_CACHE_SIZE", "10000"))  # 已确认存在的新闻ID缓存
+
+# 个性化信息流配置
+FEED_RETENTION_DAYS = int(os.getenv("FEED_RETENTION_DAYS", "30"))  # 信息流条目保留天数
+FEED_PRUNE_INTERVAL_HOURS = float(os.getenv("FEED_PRUNE_INTERVAL_HOURS", "6"))
+# 订阅数（分类 + 信息源）超过该值的用户不做写扩散，读取时直接查询
+FEED_BROAD_SUBSCRIPTION_THRESHOLD = int(os.getenv("FEED_BROAD_SUBSCRIPTION_THRESHOLD", "20"))
+
+# 相关新闻向量索引配置（哈希 TF-IDF，int8 内存映射文件）
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "./data/vector_index")
+VECTOR_INDEX_DIM = int(os.getenv("VECTOR_INDEX_DIM", "512"))
+# 向量索引与事件簇只由持有 index_writer 租约的工作进程写入，其他进程入库的新闻按该间隔补齐
+INDEX_WRITER_SYNC_SECONDS = float(os.getenv("INDEX_WRITER_SYNC_SECONDS", "30"))
+
+# 事件聚类配置：时间窗口内余弦相似度超过阈值的文章归入同一事件簇
+STORY_CLUSTER_WINDOW_HOURS = float(os.getenv("STORY_CLUSTER_WINDOW_HOURS", "48"))
+STORY_CLUSTER_THRESHOLD = float(os.getenv("STORY_CLUSTER_THRESHOLD", "0.5"))
+
+# 热度排序配置：按 重要性 × 2^(-发布时长 / 半衰期) 排序，入库时写入与时间无关的排序键（见 services/ranking.py）
+HOT_RANK_HALF_LIFE_HOURS = float(os.getenv("HOT_RANK_HALF_LIFE_HOURS", "24"))
+HOT_RANK_HORIZON_DAYS = float(os.getenv("HOT_RANK_HORIZON_DAYS", "7"))  # 超出该范围的新闻热度固定为 0
+HOT_RANK_REFRESH_MINUTES = float(os.getenv("HOT_RANK_REFRESH_MINUTES", "10"))  # 超出时间范围的热度归零的检查间隔
+
+# 调度器选主配置：多个工作进程通过数据库租约选出唯一的调度器
+SCHEDULER_LEASE_TTL_SECONDS = float(os.getenv("SCHEDULER_LEASE_TTL_SECONDS", "30"))  # 超过该时间未续约视为失效
+SCHEDULER_HEARTBEAT_SECONDS = float(os.getenv("SCHEDULER_HEARTBEAT_SECONDS", "10"))  # 续约/竞选间隔，应明显小于 TTL
+
+# 爬取任务配置
+CRAWL_JOB_HISTORY_SIZE = int(os.getenv("CRAWL_JOB_HISTORY_SIZE", "50"))  # 每个工作进程保留的最近任务数
+CRAWL_REQUEST_TTL_SECONDS = float(os.getenv("CRAWL_REQUEST_TTL_SECONDS", "300"))  # api 进程提交的爬取请求等待 worker 接手的时限
+# 爬取记录：文章明细保留 N 天后压缩为按日、按来源的汇总，汇总与运行记录保留更久
+CRAWL_LEDGER_COMPACT_AFTER_DAYS = int(os.getenv("CRAWL_LEDGER_COMPACT_AFTER_DAYS", "7"))
+CRAWL_LEDGER_RETENTION_DAYS = int(os.getenv("CRAWL_LEDGER_RETENTION_DAYS", "180"))
+CRAWL_LEDGER_COMPACT_INTERVAL_HOURS = float(os.getenv("CRAWL_LEDGER_COMPACT_INTERVAL_HOURS", "6"))
+
+# 日志配置：日志记录经有界队列交给后台线程输出，事件循环上不做磁盘/终端 I/O
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# 按模块覆盖级别，格式 "模块=级别,模块=级别"，例如 app.services.crawler=DEBUG
+LOG_LEVELS = {
+    name.strip(): level.strip().upper()
+    for name, _, level in (
+        item.partition("=") for item in os.getenv(
+            "LOG_LEVELS", "httpx=WARNING,httpcore=WARNING,openai=WARNING,sqlalchemy.engine=WARNING"
+        ).split(",")
+    )
+    if name.strip() and level.strip()
+}
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # text 或 json（每行一个 JSON 对象）
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # 队列满时丢弃新记录而不阻塞
+LOG_PAYLOAD_CHARS = int(os.getenv("LOG_PAYLOAD_CHARS", "200"))  # 正文、LLM 响应等大段文本的截断长度
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))  # 大段文本日志的采样比例
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "4000"))  # 单条日志（含异常堆栈）的长度上限
+
+# 监控配置：请求耗时、数据库查询与事件循环延迟通过 /metrics 输出
+EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))  # 事件循环延迟采样间隔
+# 慢请求采样分析：请求耗时超过该值（秒）时记录期间事件循环线程的调用栈采样，0 表示关闭
+SLOW_REQUEST_PROFILE_SECONDS = float(os.getenv("SLOW_REQUEST_PROFILE_SECONDS", "0"))
+PROFILER_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILER_SAMPLE_INTERVAL_MS", "10"))
+SLOW_REQUEST_HISTORY_SIZE = int(os.getenv("SLOW_REQUEST_HISTORY_SIZE", "20"))  # 保留最近的慢请求分析结果数
+
+# 推送通道 (SSE) 配置
+EVENTS_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENTS_SUBSCRIBER_QUEUE_SIZE", "100"))  # 每个连接最多积压的事件数
+EVENTS_REPLAY_SIZE = int(os.getenv("EVENTS_REPLAY_SIZE", "200"))  # 断线重连时可补发的最近事件数
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# 事件分发方式：database（默认，经 push_events 表在进程间分发，适用于 api/worker 分离与多进程部署）
+# 或 memory（只在本进程内分发，仅适用于单进程）
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "database").lower()
+if EVENTS_BACKEND not in ("database", "memory"):
+    raise ValueError(f"EVENTS_BACKEND 必须是 database 或 memory，当前为: {EVENTS_BACKEND}")
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", "1"))  # 各进程轮询新事件的间隔
+EVENTS_RETENTION_MINUTES = float(os.getenv("EVENTS_RETENTION_MINUTES", "60"))  # push_events 保留时长
+
 # 新闻源配置
 NEWS_SOURCES = [
     {"name": "BBC中文网", "url": "https://www.bbc.com/zhongwen/simp", "category": "国际"}, 
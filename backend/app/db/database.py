@@ -1,23 +1,86 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import logging
+import os
 
-from ..config import DATABASE_URL
+from ..config import (
+    DATABASE_URL, ASYNC_DATABASE_URL, DB_PROFILE, SQLITE_PRAGMAS, POSTGRES_POOL, DB_STATEMENT_TIMEOUT_MS
+)
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+def _resolve_profile(url: str) -> str:
+    if DB_PROFILE != "auto":
+        return DB_PROFILE
+    if url.startswith("sqlite"):
+        return "sqlite"
+    if url.startswith("postgres"):
+        return "postgres"
+    return "default"
+
+DB_PROFILE_NAME = _resolve_profile(DATABASE_URL)
+
+def _engine_options(profile: str, is_async: bool = False) -> dict:
+    """按存储配置档生成引擎参数"""
+    if profile == "sqlite":
+        # aiosqlite 在自己的线程里访问连接，不需要 check_same_thread
+        return {} if is_async else {"connect_args": {"check_same_thread": False}}
+    if profile == "postgres":
+        return {
+            **POSTGRES_POOL,
+            # 通过 libpq options 为每个连接设置语句超时，防止慢查询占满连接池
+            "connect_args": {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+        }
+    return {}
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """每个新连接建立时设置 SQLite PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def _configure_engine(sync_engine, profile: str):
+    if profile == "sqlite":
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+
 # 创建SQLAlchemy引擎
 engine = create_engine(
     DATABASE_URL, 
     echo=False,  # 设置为True可以查看SQL语句
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+    **_engine_options(DB_PROFILE_NAME)
 )
+_configure_engine(engine, DB_PROFILE_NAME)
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _to_async_url(url: str) -> str:
+    """把同步驱动的地址转换为对应的异步驱动地址"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2:", "postgresql+psycopg:", "postgresql:", "postgres:"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg:" + url[len(prefix):]
+    return url
+
+# 创建异步引擎：async def 路由和爬虫使用，数据库 I/O 不再阻塞事件循环
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL or _to_async_url(DATABASE_URL),
+    echo=False,
+    **_engine_options(DB_PROFILE_NAME, is_async=True)
+)
+_configure_engine(async_engine.sync_engine, DB_PROFILE_NAME)
+logger.info(f"数据库存储配置档: {DB_PROFILE_NAME}")
+
+# 异步会话工厂；提交后不过期对象，避免在异步上下文中触发隐式懒加载
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # 创建Base类
 Base = declarative_base()
 
@@ -29,11 +92,42 @@ def get_db():
     finally:
         db.close()
 
+# 创建异步数据库依赖项
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# 迁移脚本目录 (backend/alembic.ini, backend/migrations)
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+MIGRATIONS_DIR = os.path.join(BACKEND_DIR, "migrations")
+# 引入迁移之前由 create_all 创建的结构对应的版本
+BASELINE_REVISION = "0001_baseline"
+
+def run_migrations(revision: str = "head"):
+    """将数据库结构升级到指定版本
+
+    由 create_all 创建、没有 alembic_version 表的旧数据库会先标记为基线版本，
+    再在原库上执行后续迁移。
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "news" in tables:
+            logger.info(f"检测到未纳入迁移管理的旧数据库，标记为基线版本 {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
+
 # 创建数据库表
 def create_tables():
-    """创建所有数据库表"""
+    """创建/升级所有数据库表 (通过迁移)"""
     try:
-        Base.metadata.create_all(bind=engine)
+        run_migrations()
         logger.info("数据库表创建成功")
     except Exception as e:
         logger.error(f"创建数据库表时出错: {e}")
@@ -0,0 +1,149 @@
+import atexit
+import json
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from .config import (
+    LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_MAX_MESSAGE_CHARS,
+    LOG_PAYLOAD_CHARS, LOG_PAYLOAD_SAMPLE_RATE, LOG_QUEUE_SIZE,
+)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# uvicorn 自带处理器，改为交给根日志器，使访问日志同样经过队列
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+# 大段文本日志的标记：logger.debug("...%s", payload(text), extra=SAMPLED)
+SAMPLED = {"payload": True}
+
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "payload", "color_message"}
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...(共 {len(text)} 字符)"
+
+
+class Payload:
+    """大段文本（正文、LLM 响应）的惰性截断包装"""
+
+    __slots__ = ("text", "limit")
+
+    def __init__(self, text, limit: int = LOG_PAYLOAD_CHARS):
+        self.text = text
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return _truncate(str(self.text or ""), self.limit)
+
+    __repr__ = __str__
+
+
+def payload(text, limit: int = LOG_PAYLOAD_CHARS) -> Payload:
+    """作为 % 格式化参数传入，只有日志级别开启、记录真正输出时才会截断并转成字符串"""
+    return Payload(text, limit)
+
+
+class PayloadSampler(logging.Filter):
+    """按比例采样带 payload 标记的日志，其余日志全部放行"""
+
+    def __init__(self, rate: float = LOG_PAYLOAD_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "payload", False):
+            return self.rate >= 1 or random.random() < self.rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """入队不阻塞：队列满时丢弃记录并计数，而不是让事件循环等待输出线程"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return _truncate(super().format(record), LOG_MAX_MESSAGE_CHARS)
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出一行 JSON，extra 传入的字段原样保留"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": _truncate(record.getMessage(), LOG_MAX_MESSAGE_CHARS),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS:
+                data[key] = value
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging():
+    """配置根日志器：记录在调用线程完成 % 格式化后入队，由后台线程格式化并写出
+
+    可重复调用（例如热重载），已有的输出线程会先停止再重建。
+    """
+    global _queue_handler, _listener
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter(TEXT_FORMAT))
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(PayloadSampler())
+    _listener = QueueListener(log_queue, output)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    for name, level in LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+
+def stop_logging():
+    """停止输出线程并写完队列中剩余的日志（进程退出时自动调用）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def get_logging_status() -> Dict:
+    return {
+        "level": LOG_LEVEL,
+        "format": LOG_FORMAT,
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+    }
@@ -7,14 +7,26 @@ import logging
 from app.api import news, categories, crawler, user, history
 from app.api import source
 from app.api import subscription
+from app.api import search
+from app.api import feed
+from app.api import events
+from app.api import stories
+from app.api import metrics
 from app.services.scheduler import start_crawler_scheduler, stop_crawler_scheduler
-from app.db.database import create_tables
+from app.services.crawl_jobs import start_crawl_jobs, stop_crawl_jobs
+from app.services.news_writer import get_news_writer, start_news_writer, stop_news_writer
+from app.services.response_cache import invalidate_on_save
+from app.services.feed import fan_out_on_save
+from app.services.events import publish_saved_news, start_event_bus, stop_event_bus
+from app.services.index_writer import start_index_writer, stop_index_writer, write_saved_news
+from app.services.history_buffer import start_history_buffer, stop_history_buffer
+from app.services.instrumentation import RequestMetricsMiddleware, start_instrumentation, stop_instrumentation
+from app.db.database import create_tables, async_engine
+from app.config import EVENTS_BACKEND, RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_TTL, RUN_MODE, RUNS_WORKER
+from app.logging_setup import setup_logging
 
-# 配置日志
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# 配置日志：经队列由后台线程输出，级别见 config.py 的 LOG_LEVEL / LOG_LEVELS
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # 创建FastAPI实例
@@ -27,7 +39,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # 分页游标通过响应头返回
 )
+# 请求耗时与数据库统计（按路由模板），通过 /metrics 输出
+app.add_middleware(RequestMetricsMiddleware)
 
 # 注册路由
 app.include_router(news.router, prefix="/api")
@@ -37,23 +52,79 @@ app.include_router(user.router, prefix="/api")
 app.include_router(history.router, prefix="/api/history")
 app.include_router(source.router, prefix="/api")
 app.include_router(subscription.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+app.include_router(feed.router, prefix="/api")
+app.include_router(events.router, prefix="/api")
+app.include_router(stories.router, prefix="/api")
+app.include_router(metrics.router)
 
 @app.on_event("startup")
 async def startup_event():
-    """应用启动时执行的操作"""
+    """应用启动时执行的操作
+
+    RUN_MODE=api 时只提供接口（爬取请求交给 worker 进程执行），RUN_MODE=worker 时只运行后台任务，
+    默认 all 两者兼有。路由始终全部注册，便于 worker 进程提供健康检查与状态接口。
+    """
     # 创建数据库表
     create_tables()
+    logger.info(f"运行模式: {RUN_MODE}")
+    # 新闻入库、热度刷新与事件聚类可能发生在其他进程，进程内缓存的失效与推送经事件总线跨进程传递；
+    # EVENTS_BACKEND=memory 时只在本进程内有效（多个 uvicorn --workers 同样如此）
+    if EVENTS_BACKEND == "memory" and RUN_MODE != "all":
+        logger.warning("EVENTS_BACKEND=memory 只在本进程内推送，API 进程收不到 worker 发布的事件，请改用 database")
+        if RESPONSE_CACHE_BACKEND == "memory":
+            logger.warning(
+                f"进程内响应缓存收不到其他进程的失效通知，新数据最长 {RESPONSE_CACHE_TTL:.0f} 秒后才可见，"
+                "请设置 EVENTS_BACKEND=database 或 RESPONSE_CACHE_BACKEND=redis"
+            )
+    # 数据库查询计时与事件循环延迟监控
+    await start_instrumentation()
+    # 开始轮询跨进程推送事件
+    await start_event_bus()
+    
+    if RUNS_WORKER:
+        # 预热分类缓存并启动新闻批量写入器。新文章入库后依次：写扩散到用户信息流、推送给前端、
+        # 追加相关新闻向量并归入事件簇（仅索引写入者进程），最后使响应缓存失效（事件列表也已更新）
+        writer = get_news_writer()
+        writer.add_listener(fan_out_on_save)
+        writer.add_listener(publish_saved_news)
+        writer.add_listener(write_saved_news)
+        writer.add_listener(invalidate_on_save)
+        await start_news_writer()
+        # 参与索引写入者选主：当选的进程以可写方式打开向量索引、补齐向量与事件簇并刷新热度，其他进程只读
+        await start_index_writer()
+    
+    # 启动浏览历史写缓冲（路由在各模式下都注册）
+    await start_history_buffer()
     
-    # 启动爬虫调度器
-    await start_crawler_scheduler()
-    logger.info("爬虫调度器已启动，将每1.5小时自动执行一次")
+    if RUNS_WORKER:
+        # 启动爬取任务管理器（领取 API 进程提交的爬取请求）
+        await start_crawl_jobs()
+        
+        # 启动爬虫调度器
+        await start_crawler_scheduler()
+        logger.info("已加入爬虫调度器选主，当选的工作进程将每1.5小时自动执行一次")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭时执行的操作"""
-    # 停止爬虫调度器
-    await stop_crawler_scheduler()
-    logger.info("爬虫调度器已关闭")
+    if RUNS_WORKER:
+        # 停止爬虫调度器
+        await stop_crawler_scheduler()
+        logger.info("爬虫调度器已关闭")
+        # 取消本进程正在运行的爬取任务并释放运行锁
+        await stop_crawl_jobs()
+        # 写完队列中剩余的新闻
+        await stop_news_writer()
+        # 退出索引写入者并释放租约
+        await stop_index_writer()
+    # 写入缓冲中剩余的浏览历史
+    await stop_history_buffer()
+    # 写入未发出的推送事件（写入器与爬取任务停止时仍会发布）
+    await stop_event_bus()
+    await stop_instrumentation()
+    # 释放异步数据库连接池
+    await async_engine.dispose()
 
 @app.get("/")
 async def root():
@@ -6,6 +6,11 @@ from .category import Category
 from .history import BrowseHistory
 from .source import Source, UserSourceSubscription
 from .subscription import UserCategorySubscription
+from .feed import FeedEntry
+from .story import StoryCluster
+from .lease import ServiceLease
+from .crawl_ledger import CrawlRun, CrawlAttempt, CrawlSourceDaily
+from .event import PushEvent
 
 __all__ = [
     'User',
@@ -15,5 +20,12 @@ __all__ = [
     'Source',
     'UserSourceSubscription',
     'UserCategorySubscription',
+    'FeedEntry',
+    'StoryCluster',
+    'ServiceLease',
+    'CrawlRun',
+    'CrawlAttempt',
+    'CrawlSourceDaily',
+    'PushEvent',
     'news_category'
 ]
\ No newline at end of file
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, String, ForeignKey, Table
+from sqlalchemy import Column, String, ForeignKey, Table, Index
 from ..db.database import Base
 
 # 新闻-分类关联表
+# (news_id, category_id) 作为联合主键，同时覆盖按新闻查分类的查询；
+# 按分类筛选新闻时走 (category_id, news_id) 索引
 news_category = Table(
     'news_category', 
     Base.metadata,
-    Column('news_id', String, ForeignKey('news.id')),
-    Column('category_id', String, ForeignKey('categories.id'))
+    Column('news_id', String, ForeignKey('news.id'), primary_key=True),
+    Column('category_id', String, ForeignKey('categories.id'), primary_key=True),
+    Index('ix_news_category_category_id', 'category_id', 'news_id'),
 )
\ No newline at end of file
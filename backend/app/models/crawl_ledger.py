@@ -0,0 +1,83 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Date, Index
+from datetime import datetime
+
+from ..db.database import Base
+
+class CrawlRun(Base):
+    """
+    爬取运行记录：每次发现流程一行（id 与爬取任务ID相同）
+    """
+    __tablename__ = "crawl_runs"
+    __table_args__ = (
+        Index('ix_crawl_runs_started_at', 'started_at'),
+    )
+    id = Column(String, primary_key=True)
+    trigger = Column(String, nullable=False)
+    state = Column(String, nullable=False)
+    worker_id = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=False, default=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    sources_total = Column(Integer, nullable=False, default=0)
+    sources_done = Column(Integer, nullable=False, default=0)
+    articles_queued = Column(Integer, nullable=False, default=0)
+    articles_fetched = Column(Integer, nullable=False, default=0)
+    articles_analysed = Column(Integer, nullable=False, default=0)
+    articles_saved = Column(Integer, nullable=False, default=0)
+    articles_failed = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"<CrawlRun(id={self.id}, state={self.state})>"
+
+class CrawlAttempt(Base):
+    """
+    单篇文章的处理记录：各阶段耗时（毫秒，未执行的阶段为空）、抓取字节数与 LLM token 数
+    """
+    __tablename__ = "crawl_attempts"
+    __table_args__ = (
+        # 时间窗口聚合与按期压缩: WHERE started_at >= ?
+        Index('ix_crawl_attempts_started_at', 'started_at'),
+        Index('ix_crawl_attempts_run_id', 'run_id'),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String, nullable=True)
+    source = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    # saved / duplicate / fetch_failed / extract_failed / irrelevant / save_failed / error / cancelled
+    outcome = Column(String, nullable=False)
+    started_at = Column(DateTime, nullable=False, default=datetime.now)
+    total_ms = Column(Integer, nullable=False, default=0)
+    fetch_ms = Column(Integer, nullable=True)
+    extract_ms = Column(Integer, nullable=True)
+    relevance_ms = Column(Integer, nullable=True)
+    summary_ms = Column(Integer, nullable=True)
+    score_ms = Column(Integer, nullable=True)
+    classify_ms = Column(Integer, nullable=True)
+    save_ms = Column(Integer, nullable=True)
+    bytes_fetched = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"<CrawlAttempt(url={self.url}, outcome={self.outcome})>"
+
+class CrawlSourceDaily(Base):
+    """
+    压缩后的按日、按来源汇总（明细超过 CRAWL_LEDGER_COMPACT_AFTER_DAYS 后并入本表并删除）
+    """
+    __tablename__ = "crawl_source_daily"
+    day = Column(Date, primary_key=True)
+    source = Column(String, primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    saved = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    total_ms = Column(BigInteger, nullable=False, default=0)
+    fetch_ms = Column(BigInteger, nullable=False, default=0)
+    llm_ms = Column(BigInteger, nullable=False, default=0)
+    bytes_fetched = Column(BigInteger, nullable=False, default=0)
+    tokens = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CrawlSourceDaily(day={self.day}, source={self.source})>"
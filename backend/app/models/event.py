@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from datetime import datetime
+
+from ..db.database import Base
+
+class PushEvent(Base):
+    """
+    跨进程推送事件：发布方写入，各进程按自增ID轮询后推送给本进程的 SSE 连接，只保留最近一段时间
+    """
+    __tablename__ = "push_events"
+    __table_args__ = (
+        # 按时间清理: created_at < ?
+        Index('ix_push_events_created_at', 'created_at'),
+        # SQLite 删除末尾行后不复用ID，保证事件ID单调递增
+        {'sqlite_autoincrement': True},
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # 事件类型 (news / crawler)
+    type = Column(String, nullable=False)
+    # 事件内容 (JSON)
+    data = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<PushEvent(id={self.id}, type={self.type})>"
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from datetime import datetime
+
+from ..db.database import Base
+
+class FeedEntry(Base):
+    """
+    用户个性化信息流条目（由订阅的分类/信息源在新闻入库时扇出写入）
+    """
+    __tablename__ = "user_feed_entries"
+    __table_args__ = (
+        # 信息流 keyset 分页: WHERE user_id = ? ORDER BY published_at DESC, news_id DESC
+        Index('ix_user_feed_entries_user_published', 'user_id', 'published_at', 'news_id'),
+        # 按保留期清理
+        Index('ix_user_feed_entries_published_at', 'published_at'),
+    )
+    user_id = Column(String, ForeignKey('users.id'), primary_key=True)
+    news_id = Column(String, ForeignKey('news.id'), primary_key=True)
+    # 冗余新闻的发布时间，排序与清理不需要回表
+    published_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<FeedEntry(user_id={self.user_id}, news_id={self.news_id})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -7,6 +7,10 @@ from ..db.database import Base
 
 class BrowseHistory(Base):
     __tablename__ = "browse_history"
+    __table_args__ = (
+        # 用户历史与 keyset 分页: WHERE user_id = ? ORDER BY viewed_at DESC, id DESC
+        Index('ix_browse_history_user_viewed_id', 'user_id', 'viewed_at', 'id'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey('users.id'), nullable=False)
     news_id = Column(String, ForeignKey('news.id'), nullable=False)
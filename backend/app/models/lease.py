@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, Text
+from datetime import datetime
+
+from ..db.database import Base
+
+class ServiceLease(Base):
+    """
+    集群内单实例任务的租约（如爬虫调度器）：持有者定期续约，过期后其他工作进程可接管
+    """
+    __tablename__ = "service_leases"
+    # 租约名称，如 "crawler_scheduler"
+    name = Column(String, primary_key=True)
+    # 当前持有者 (主机名:进程号:随机后缀)，释放后为空
+    holder = Column(String, nullable=True)
+    acquired_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False, default=datetime.now)
+    # 持有者随心跳上报的任务状态 (JSON)，供其他工作进程查询
+    status = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<ServiceLease(name={self.name}, holder={self.holder})>"
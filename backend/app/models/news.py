@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -9,6 +9,18 @@ from .associations import news_category
 class News(Base):
     """新闻模型"""
     __tablename__ = "news"
+    __table_args__ = (
+        # 列表页排序与 keyset 分页: ORDER BY importance_score DESC, published_at DESC, id DESC
+        Index('ix_news_score_published_id', 'importance_score', 'published_at', 'id'),
+        # 热度排序 (sort=hot): ORDER BY hot_score DESC, published_at DESC, id DESC
+        Index('ix_news_hot_published_id', 'hot_score', 'published_at', 'id'),
+        # 时间范围过滤: published_at >= ?
+        Index('ix_news_published_at', 'published_at'),
+        # 索引写入者的增量同步: crawled_at >= ?
+        Index('ix_news_crawled_at', 'crawled_at'),
+        # 事件簇内的文章: WHERE story_id = ?
+        Index('ix_news_story_id', 'story_id'),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
@@ -19,7 +31,11 @@ class News(Base):
     published_at = Column(DateTime, nullable=False, default=datetime.now)
     crawled_at = Column(DateTime, nullable=False, default=datetime.now)
     importance_score = Column(Float, nullable=False, default=5.0)
+    # 热度排序键（与时间无关），入库时写入，超出时间范围后由后台任务归零（见 services/ranking.py）
+    hot_score = Column(Float, nullable=False, default=0.0, server_default="0")
     raw_html = Column(Text, nullable=True)
+    # 所属事件簇 (story_clusters.id)，入库后由聚类阶段填写
+    story_id = Column(String, nullable=True)
     
     # 关系
     categories = relationship("Category", secondary=news_category, back_populates="news")
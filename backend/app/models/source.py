@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -24,6 +24,9 @@ class UserSourceSubscription(Base):
     用户-信息源订阅关系
     """
     __tablename__ = "user_source_subscriptions"
+    __table_args__ = (
+        Index('ix_user_source_subscriptions_user_source', 'user_id', 'source_id'),
+    )
     id = Column(String, primary_key=True, default=lambda: str(datetime.now().timestamp()))
     user_id = Column(String, ForeignKey('users.id'), nullable=False)
     source_id = Column(String, ForeignKey('sources.id'), nullable=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, LargeBinary, Index
+from datetime import datetime
+import uuid
+
+from ..db.database import Base
+
+class StoryCluster(Base):
+    """
+    新闻事件簇：不同来源报道同一事件的文章归为一簇（news.story_id 指向本表）
+    """
+    __tablename__ = "story_clusters"
+    __table_args__ = (
+        # 事件列表: WHERE last_updated_at >= ? ORDER BY importance_score DESC, last_updated_at DESC
+        Index('ix_story_clusters_score_updated', 'importance_score', 'last_updated_at'),
+        Index('ix_story_clusters_last_updated_at', 'last_updated_at'),
+    )
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    # 簇中心向量 (float32 字节串，维度与相关新闻向量索引一致)
+    centroid = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False, default=1)
+    # 代表文章：簇内重要性最高的新闻
+    representative_id = Column(String, nullable=False)
+    importance_score = Column(Float, nullable=False, default=5.0)
+    first_seen_at = Column(DateTime, nullable=False, default=datetime.now)
+    last_updated_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<StoryCluster(id={self.id}, size={self.size})>"
@@ -1,14 +1,95 @@
 import os
 import logging
 import re
+import time
 from typing import List, Optional, Dict, Any
-from openai import AsyncOpenAI, APIError, APITimeoutError
+from openai import (
+    AsyncOpenAI, APIError, APITimeoutError, APIConnectionError, RateLimitError, InternalServerError
+)
 
-from ..config import OPENROUTER_API_KEY, OPENROUTER_MODEL_NAME
+from ..config import (
+    OPENROUTER_API_KEY, OPENROUTER_BASE_URL, OPENROUTER_MODEL_NAME,
+    OPENROUTER_FAST_MODEL_NAME, OPENROUTER_LARGE_MODEL_NAME, OPENROUTER_FALLBACK_MODELS,
+    LLM_FAST_TIMEOUT, LLM_LARGE_TIMEOUT, LLM_SLOW_LATENCY_THRESHOLD, LLM_MODEL_COOLDOWN,
+)
+
+from . import llm_telemetry
+from ..logging_setup import SAMPLED, payload
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 任务 -> 模型档位：短输出任务走小模型，长输出任务走大模型
+FAST_TASKS = {"relevance", "score", "classify"}
+LARGE_TASKS = {"extract", "summary"}
+
+# 这些错误说明当前模型暂时不可用，应切换到下一个模型
+_FALLBACK_ERRORS = (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError)
+
+
+class ModelHealth:
+    """单个模型的健康度统计（基于延迟的指数滑动平均与失败冷却）"""
+
+    def __init__(self, model: str, alpha: float = 0.3):
+        self.model = model
+        self.alpha = alpha
+        self.avg_latency: Optional[float] = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def _update_latency(self, latency: float):
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = self.alpha * latency + (1 - self.alpha) * self.avg_latency
+
+    def record_success(self, latency: float):
+        self._update_latency(latency)
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record_failure(self, latency: float):
+        # 超时/限流也计入延迟，让慢模型的评分及时变差
+        self._update_latency(latency)
+        self.failures += 1
+        self.consecutive_failures += 1
+        # 连续失败时冷却时间指数增长，最多 8 倍
+        backoff = min(2 ** (self.consecutive_failures - 1), 8)
+        self.cooldown_until = time.monotonic() + LLM_MODEL_COOLDOWN * backoff
+
+    @property
+    def in_cooldown(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    @property
+    def is_healthy(self) -> bool:
+        if self.in_cooldown:
+            return False
+        return self.avg_latency is None or self.avg_latency <= LLM_SLOW_LATENCY_THRESHOLD
+
+    def score(self) -> float:
+        """健康评分，越小越好：平均延迟乘以失败率惩罚"""
+        total = self.successes + self.failures
+        failure_rate = self.failures / total if total else 0.0
+        latency = self.avg_latency if self.avg_latency is not None else 0.0
+        return latency * (1 + 4 * failure_rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "avg_latency": round(self.avg_latency, 3) if self.avg_latency is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "in_cooldown": self.in_cooldown,
+            "healthy": self.is_healthy,
+            "score": round(self.score(), 3),
+        }
+
+
 class OpenRouterService:
     """使用 OpenRouter 处理新闻内容的 AI 服务"""
 
@@ -18,47 +99,120 @@ class OpenRouterService:
             raise ValueError("OpenRouter API 密钥未配置")
 
         # 配置 OpenAI 客户端以使用 OpenRouter
+        # 关闭 SDK 自带的重试：超时/429 由下面的模型备用链处理，避免在同一个慢模型上反复等待
         self.client = AsyncOpenAI(
-            base_url="https://openrouter.ai/api/v1",
+            base_url=OPENROUTER_BASE_URL,
             api_key=OPENROUTER_API_KEY,
             timeout=30.0,
+            max_retries=0,
         )
         self.model = OPENROUTER_MODEL_NAME
-        logger.info(f"OpenRouterService 初始化完成，使用模型: {self.model}")
-
-    async def _call_llm(self, prompt: str, max_tokens: int = 150, temperature: float = 0.3) -> Optional[str]:
-        """调用 OpenRouter LLM 的通用方法"""
-        try:
-            logger.debug(f"向 OpenRouter 发送请求，模型: {self.model}, Prompt: {prompt[:100]}...")
-            completion = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant for processing news articles."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature,
-            )
-            # --- 修改：在 strip() 之前记录原始响应 ---
-            raw_response_text = completion.choices[0].message.content
-            logger.info(f"LLM 原始响应 (未处理): '{raw_response_text}'") # 使用 INFO 级别
-            # --- 结束修改 ---
-
-            response_text = raw_response_text.strip()
-            # logger.debug(f"收到 OpenRouter 响应: {response_text[:100]}...") # 这行可以保留或注释掉
-            return response_text
-        except APITimeoutError:
-            logger.error("调用 OpenRouter API 超时")
-            return None
-        except APIError as e:
-            logger.error(f"调用 OpenRouter API 时出错: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"调用 LLM 时发生未知错误: {e}", exc_info=True)
-            return None
+        self.fast_model = OPENROUTER_FAST_MODEL_NAME
+        self.large_model = OPENROUTER_LARGE_MODEL_NAME
+        self.fallback_models = list(OPENROUTER_FALLBACK_MODELS)
+        self.model_health: Dict[str, ModelHealth] = {}
+        logger.info(
+            f"OpenRouterService 初始化完成，接口: {OPENROUTER_BASE_URL}，"
+            f"小模型: {self.fast_model}，大模型: {self.large_model}，"
+            f"备用模型: {self.fallback_models}"
+        )
+
+    def _get_health(self, model: str) -> ModelHealth:
+        health = self.model_health.get(model)
+        if health is None:
+            health = ModelHealth(model)
+            self.model_health[model] = health
+        return health
+
+    def _model_chain(self, task: str) -> List[str]:
+        """按任务生成模型尝试顺序：首选模型 -> 另一档模型 -> 配置的备用模型，
+        健康的模型保持配置顺序，变慢或冷却中的模型按健康评分排到后面"""
+        if task in FAST_TASKS:
+            preferred = [self.fast_model, self.large_model]
+        else:
+            preferred = [self.large_model, self.fast_model]
+
+        chain: List[str] = []
+        for model in preferred + self.fallback_models:
+            if model and model not in chain:
+                chain.append(model)
+
+        healthy = [m for m in chain if self._get_health(m).is_healthy]
+        degraded = [m for m in chain if not self._get_health(m).is_healthy]
+        degraded.sort(key=lambda m: (self._get_health(m).in_cooldown, self._get_health(m).score()))
+        return healthy + degraded
+
+    def get_model_health(self) -> List[Dict[str, Any]]:
+        """获取所有已使用模型的健康状态"""
+        return [health.to_dict() for health in self.model_health.values()]
+
+    async def _call_llm(
+        self, prompt: str, max_tokens: int = 150, temperature: float = 0.3, task: str = "summary"
+    ) -> Optional[str]:
+        """调用 OpenRouter LLM 的通用方法，按任务路由模型并在超时/限流时依次尝试备用模型"""
+        timeout = LLM_FAST_TIMEOUT if task in FAST_TASKS else LLM_LARGE_TIMEOUT
+        llm_telemetry.record_task_call(task)
+        for model in self._model_chain(task):
+            health = self._get_health(model)
+            start = time.monotonic()
+            try:
+                logger.debug("向 OpenRouter 发送请求，任务: %s, 模型: %s, Prompt: %s", task, model, payload(prompt, 100))
+                llm_telemetry.llm_requests_in_flight.inc(task=task)
+                try:
+                    completion = await self.client.chat.completions.create(
+                        model=model,
+                        messages=[
+                            {"role": "system", "content": "You are a helpful assistant for processing news articles."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        timeout=timeout,
+                    )
+                finally:
+                    llm_telemetry.llm_requests_in_flight.dec(task=task)
+                latency = time.monotonic() - start
+                health.record_success(latency)
+                llm_telemetry.record_call(
+                    task, model, llm_telemetry.OUTCOME_SUCCESS, latency, getattr(completion, "usage", None)
+                )
+                raw_response_text = completion.choices[0].message.content
+                logger.debug("LLM 原始响应 (任务: %s, 模型: %s): %s", task, model, payload(raw_response_text),
+                             extra=SAMPLED)
+
+                if raw_response_text is None:
+                    return None
+                response_text = raw_response_text.strip()
+                # logger.debug(f"收到 OpenRouter 响应: {response_text[:100]}...") # 这行可以保留或注释掉
+                return response_text
+            except _FALLBACK_ERRORS as e:
+                latency = time.monotonic() - start
+                health.record_failure(latency)
+                if isinstance(e, APITimeoutError):
+                    outcome = llm_telemetry.OUTCOME_TIMEOUT
+                    logger.warning("调用 OpenRouter API 超时 (模型: %s)，尝试下一个模型", model)
+                else:
+                    outcome = (llm_telemetry.OUTCOME_RATE_LIMITED if isinstance(e, RateLimitError)
+                               else llm_telemetry.OUTCOME_API_ERROR)
+                    logger.warning("OpenRouter 模型 %s 暂不可用: %s，尝试下一个模型", model, e)
+                llm_telemetry.record_call(task, model, outcome, latency)
+                llm_telemetry.record_model_fallback(task, model)
+                continue
+            except APIError as e:
+                llm_telemetry.record_call(task, model, llm_telemetry.OUTCOME_API_ERROR, time.monotonic() - start)
+                logger.error("调用 OpenRouter API 时出错 (模型: %s): %s", model, e)
+                return None
+            except Exception as e:
+                llm_telemetry.record_call(task, model, llm_telemetry.OUTCOME_ERROR, time.monotonic() - start)
+                logger.error("调用 LLM 时发生未知错误: %s", e, exc_info=True)
+                return None
+
+        logger.error("任务 %s 的所有模型均调用失败", task)
+        return None
+
     async def extract_main_content(self, markdown_input: str) -> Optional[str]:
         """使用 LLM 从原始 Markdown 中提取文章主要内容"""
-        logger.info("使用 LLM 提取主要内容...")
+        logger.debug("使用 LLM 提取主要内容...")
         if not markdown_input:
             return None
 
@@ -81,27 +235,27 @@ class OpenRouterService:
         """
         # 允许较长的输出，因为正文可能很长，但也要考虑成本
         # 可以根据平均文章长度调整 max_tokens
-        extracted_content = await self._call_llm(prompt, max_tokens=2000, temperature=0.1)
+        extracted_content = await self._call_llm(prompt, max_tokens=2000, temperature=0.1, task="extract")
 
         if extracted_content:
             # 可以添加一些基本的后处理，例如移除可能的引言 "提取的文章正文:"
             if extracted_content.startswith("提取的文章正文:"):
                  extracted_content = extracted_content[len("提取的文章正文:"):].strip()
-            logger.info(f"LLM 提取正文成功 (前 100 字符): {extracted_content[:100]}...")
+            logger.debug("LLM 提取正文成功: %s", payload(extracted_content, 100), extra=SAMPLED)
             return extracted_content
         else:
             logger.warning("无法从 LLM 提取主要内容")
+            llm_telemetry.record_fallback_default("extract")
             return None
     async def is_relevant_content(self, title: str, content_preview: str) -> bool:
         """使用 LLM 判断给定内容是否属于相关类别 (新闻、商业、科技等)"""
-        logger.info(f"使用 LLM 判断内容相关性: '{title}'")
+        logger.debug("使用 LLM 判断内容相关性: '%s'", title)
         if not title or not content_preview:
             return False # 基本信息缺失
 
         # 截取内容预览，避免过长
         preview = content_preview[:5000] # 取前1000个字符作为预览
-        # --- 修改：使用 INFO 级别记录更长的预览 ---
-        logger.info(f"发送给 LLM 的内容预览 (前 500 字符): {preview[:3000]}...")
+        logger.debug("发送给 LLM 的内容预览: %s", payload(preview), extra=SAMPLED)
 
         prompt = f"""
         请判断以下内容的性质。它是否代表一篇独立、完整的新闻报道、分析文章或评论文章？
@@ -116,23 +270,24 @@ class OpenRouterService:
         是否为单篇新闻文章 (是/否):
         """
         # 使用较低的 temperature 获取更确定的 "是/否" 回答
-        response = await self._call_llm(prompt, max_tokens=10, temperature=0.1)
+        response = await self._call_llm(prompt, max_tokens=10, temperature=0.1, task="relevance")
 
         if response:
             raw_response_text = response
-            logger.info(f"LLM 原始响应 (判断是否单篇): '{raw_response_text}'")
+            logger.debug("LLM 原始响应 (判断是否单篇): %s", payload(raw_response_text))
             # 检查响应是否以 "是" 开头 (允许后面有标点等)
             is_single_article = response.strip().startswith("是")
             if not is_single_article:
-                 logger.warning(f"LLM 判断内容不是单篇新闻文章: 标题='{title}'")
+                 logger.warning("LLM 判断内容不是单篇新闻文章: 标题='%s'", title)
             return is_single_article
         else:
             logger.warning("无法从 LLM 获取内容类型判断，默认视为非单篇新闻文章")
+            llm_telemetry.record_fallback_default("relevance")
             return False # 如果 LLM 调用失败，保守地认为不是单篇
 
     async def calculate_importance(self, title: str, content_preview: str) -> float:
         """使用 LLM 评估新闻重要性 (1-10分)"""
-        logger.info(f"使用 LLM 评估重要性: '{title}'")
+        logger.debug("使用 LLM 评估重要性: '%s'", title)
         if not title or not content_preview:
             return 3.0 # 基本信息缺失，默认较低分数
 
@@ -149,7 +304,7 @@ class OpenRouterService:
 
         重要性评分 (1-10):
         """
-        response = await self._call_llm(prompt, max_tokens=50, temperature=0.3)
+        response = await self._call_llm(prompt, max_tokens=50, temperature=0.3, task="score")
 
         if response:
             try:
@@ -160,18 +315,21 @@ class OpenRouterService:
                     # 限制在 1-10 范围
                     return max(1.0, min(10.0, score))
                 else:
-                    logger.warning(f"无法从 LLM 响应 '{response}' 中提取重要性评分，使用默认值 5.0")
+                    logger.warning("无法从 LLM 响应 '%s' 中提取重要性评分，使用默认值 5.0", payload(response))
+                    llm_telemetry.record_fallback_default("score")
                     return 5.0
             except ValueError:
-                logger.warning(f"无法将 LLM 响应 '{response}' 转换为评分，使用默认值 5.0")
+                logger.warning("无法将 LLM 响应 '%s' 转换为评分，使用默认值 5.0", payload(response))
+                llm_telemetry.record_fallback_default("score")
                 return 5.0
         else:
             logger.warning("无法从 LLM 获取重要性评分，使用默认值 5.0")
+            llm_telemetry.record_fallback_default("score")
             return 5.0
 
     async def generate_summary(self, title: str, content: str) -> str:
         """使用 LLM 生成新闻摘要"""
-        logger.info(f"使用 LLM 生成摘要: '{title}'")
+        logger.debug("使用 LLM 生成摘要: '%s'", title)
         if not content:
             return "内容为空"
 
@@ -188,12 +346,13 @@ class OpenRouterService:
 
         摘要:
         """
-        summary = await self._call_llm(prompt, max_tokens=1000, temperature=0.6) # 允许稍长的 token 输出以生成摘要
+        summary = await self._call_llm(prompt, max_tokens=1000, temperature=0.6, task="summary") # 允许稍长的 token 输出以生成摘要
 
         if summary:
             return summary
         else:
             logger.warning("无法从 LLM 生成摘要，返回基于规则的摘要")
+            llm_telemetry.record_fallback_default("summary")
             # Fallback: 使用简单的规则生成摘要
             sentences = re.split(r'[。！？!?.]', content[:5000]) # 基于前5000字符
             sentences = [s.strip() for s in sentences if s.strip()]
@@ -202,7 +361,7 @@ class OpenRouterService:
 
     async def classify_news(self, title: str, content_preview: str) -> List[str]:
         """使用 LLM 对新闻进行分类"""
-        logger.info(f"使用 LLM 分类新闻: '{title}'")
+        logger.debug("使用 LLM 分类新闻: '%s'", title)
         if not title or not content_preview:
             return ["其他"]
 
@@ -224,7 +383,7 @@ class OpenRouterService:
 
         分类:
         """
-        response = await self._call_llm(prompt, max_tokens=50, temperature=0.2)
+        response = await self._call_llm(prompt, max_tokens=50, temperature=0.2, task="classify")
 
         if response:
             # 清理并分割返回的分类
@@ -232,8 +391,10 @@ class OpenRouterService:
             # 过滤掉不在候选列表中的分类（可选，增加鲁棒性）
             valid_categories = [cat for cat in categories if cat in candidate_categories]
             if not valid_categories:
+                llm_telemetry.record_fallback_default("classify")
                 return ["其他"] # 如果LLM返回无效或空，则归为其他
             return valid_categories
         else:
             logger.warning("无法从 LLM 获取分类，返回 '其他'")
+            llm_telemetry.record_fallback_default("classify")
             return ["其他"]
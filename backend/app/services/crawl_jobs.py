@@ -0,0 +1,396 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from ..config import (
+    CRAWL_JOB_HISTORY_SIZE, CRAWL_REQUEST_TTL_SECONDS, RUNS_WORKER,
+    SCHEDULER_HEARTBEAT_SECONDS, SCHEDULER_LEASE_TTL_SECONDS,
+)
+from .crawl_ledger import get_crawl_ledger
+from .events import publish_crawler_event
+from .leader import acquire_lease, read_lease, release_lease, renew_lease, worker_id
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 集群范围的爬取运行锁（service_leases 中的租约名），同一时刻只允许一次爬取
+RUN_LOCK_NAME = "crawl_run"
+# 只读 API 进程提交、等待 worker 接手的爬取请求（持有者为预先分配的任务ID）
+REQUEST_LEASE_NAME = "crawl_request"
+
+JOB_STATES_FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class CrawlProgress:
+    """一次爬取的进度计数，由爬虫服务在各阶段累加"""
+
+    FIELDS = (
+        "sources_total",
+        "sources_done",
+        "articles_queued",
+        "articles_fetched",
+        "articles_analysed",
+        "articles_saved",
+        "articles_failed",
+    )
+
+    def __init__(self, run_id: Optional[str] = None):
+        # 所属运行（爬取任务ID），用于关联爬取记录中的文章明细
+        self.run_id = run_id
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.current_source: Optional[str] = None
+
+    def incr(self, field: str, amount: int = 1):
+        setattr(self, field, getattr(self, field) + amount)
+
+    def to_dict(self) -> Dict:
+        return {**{field: getattr(self, field) for field in self.FIELDS}, "current_source": self.current_source}
+
+
+class CrawlJob:
+    """一次爬取任务（手动触发、接口触发或定时调度）"""
+
+    def __init__(self, trigger: str, job_id: Optional[str] = None):
+        self.id = job_id or str(uuid.uuid4())
+        self.trigger = trigger
+        self.state = "pending"
+        self.worker_id = worker_id()
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.progress = CrawlProgress(self.id)
+        self.news_count = 0
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        # 本地记录的运行锁到期时间，无法续约时据此判断何时必须停止
+        self.lease_expires_at: Optional[datetime] = None
+
+    @property
+    def holder(self) -> str:
+        return f"{self.worker_id}/{self.id}"
+
+    @property
+    def finished(self) -> bool:
+        return self.state in JOB_STATES_FINISHED
+
+    def to_dict(self) -> Dict:
+        end = self.finished_at or datetime.now()
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "state": self.state,
+            "worker_id": self.worker_id,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration": (end - self.started_at).total_seconds() if self.started_at else None,
+            "progress": self.progress.to_dict(),
+            "news_count": self.news_count,
+            "error": self.error,
+        }
+
+
+class CrawlJobManager:
+    """爬取任务管理
+
+    触发爬取时立即返回任务ID，爬取在后台任务中执行。运行锁是一份数据库租约：
+    持有期间每次心跳续约并附带任务进度，其他工作进程据此查询进度；已有任务在运行时（无论在哪个工作进程），
+    新的触发直接并入该任务。取消其他工作进程上的任务时撤销运行锁，持有者在下一次心跳发现后自行取消。
+    不执行爬取的进程（RUN_MODE=api）只登记爬取请求，由 worker 进程轮询接手，任务ID在登记时就已确定；
+    请求在运行锁记录该任务（或请求并入其他任务）之后才撤下，按任务ID查询始终能查到。
+    """
+
+    def __init__(self, history_size: int = CRAWL_JOB_HISTORY_SIZE,
+                 ttl_seconds: float = SCHEDULER_LEASE_TTL_SECONDS,
+                 heartbeat_seconds: float = SCHEDULER_HEARTBEAT_SECONDS,
+                 runs_crawls: bool = RUNS_WORKER):
+        self.history_size = history_size
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.request_ttl = timedelta(seconds=CRAWL_REQUEST_TTL_SECONDS)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.runs_crawls = runs_crawls
+        # 本进程执行过的任务，按创建顺序
+        self.jobs: "OrderedDict[str, CrawlJob]" = OrderedDict()
+        self.current: Optional[CrawlJob] = None
+        self._submit_lock = asyncio.Lock()
+        self._crawler = None
+        self.poll_task: Optional[asyncio.Task] = None
+
+    def _get_crawler(self):
+        if self._crawler is None:
+            from .crawler import get_crawler_service
+            self._crawler = get_crawler_service()
+        return self._crawler
+
+    async def submit(self, trigger: str) -> Tuple[Dict, bool]:
+        """触发一次爬取，返回 (任务, 是否并入了已在运行或等待中的任务)"""
+        if not self.runs_crawls:
+            return await self._request(trigger)
+        return await self._start(trigger)
+
+    async def _request(self, trigger: str) -> Tuple[Dict, bool]:
+        """登记爬取请求，由 worker 进程接手执行"""
+        running = await read_lease(RUN_LOCK_NAME)
+        if running is not None and running["alive"] and running["status"]:
+            return running["status"], True
+        job = CrawlJob(trigger)
+        acquired, _ = await acquire_lease(REQUEST_LEASE_NAME, job.id, self.request_ttl, status=job.to_dict())
+        if not acquired:
+            pending = await read_lease(REQUEST_LEASE_NAME)
+            if pending is not None and pending["alive"] and pending["status"]:
+                return pending["status"], True
+            raise RuntimeError("无法登记爬取请求")
+        logger.info(f"已登记爬取请求，等待 worker 接手: {job.id}")
+        return job.to_dict(), False
+
+    async def _poll_requests(self):
+        """worker 进程：接手 API 进程登记的爬取请求（抢到运行锁的进程负责执行）
+
+        请求租约保留到运行锁已记录该任务之后才释放；请求并入了其他任务时，
+        在释放的请求租约上记下 merged_into，按请求的任务ID查询时转到实际运行的任务。
+        """
+        while True:
+            try:
+                pending = await read_lease(REQUEST_LEASE_NAME)
+                if pending is not None and pending["alive"] and pending["status"]:
+                    request_id = pending["holder"]
+                    job, coalesced = await self._start(pending["status"]["trigger"], request_id)
+                    merged = coalesced and job["id"] != request_id
+                    await release_lease(REQUEST_LEASE_NAME, request_id,
+                                        {**pending["status"], "merged_into": job["id"]} if merged else None)
+                    if merged:
+                        logger.info(f"爬取请求 {request_id} 已并入任务: {job['id']}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"接手爬取请求失败: {e}", exc_info=True)
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    async def _pending_request(self, job_id: str) -> Optional[Dict]:
+        """等待接手的请求；请求已并入其他任务时返回 {"merged_into": 任务ID}"""
+        pending = await read_lease(REQUEST_LEASE_NAME)
+        if pending is None or not pending["status"] or pending["status"]["id"] != job_id:
+            return None
+        if pending["status"].get("merged_into"):
+            return {"merged_into": pending["status"]["merged_into"]}
+        return pending["status"] if pending["alive"] else None
+
+    async def _start(self, trigger: str, job_id: Optional[str] = None) -> Tuple[Dict, bool]:
+        """在本进程启动爬取"""
+        async with self._submit_lock:
+            if self.current is not None and not self.current.finished:
+                return self.current.to_dict(), True
+
+            job = CrawlJob(trigger, job_id)
+            now = datetime.now()
+            acquired, _ = await acquire_lease(RUN_LOCK_NAME, job.holder, self.ttl, now=now, status=job.to_dict())
+            if not acquired:
+                lease = await read_lease(RUN_LOCK_NAME)
+                if lease is not None and lease["alive"] and lease["status"]:
+                    logger.info(f"已有爬取任务在其他工作进程运行，并入任务: {lease['status']['id']}")
+                    return lease["status"], True
+                # 租约刚好被释放，重新竞争一次
+                now = datetime.now()
+                acquired, _ = await acquire_lease(RUN_LOCK_NAME, job.holder, self.ttl, now=now, status=job.to_dict())
+                if not acquired:
+                    raise RuntimeError("无法获取爬取运行锁")
+
+            job.lease_expires_at = now + self.ttl
+            self.current = job
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.history_size:
+                self.jobs.popitem(last=False)
+            job.task = asyncio.create_task(self._run(job))
+            logger.info(f"爬取任务已创建: {job.id}，触发方式: {trigger}")
+            return job.to_dict(), False
+
+    async def wait(self, job_id: str) -> Optional[Dict]:
+        """等待本进程的任务结束并返回最终状态；等待方被取消时不影响任务本身"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.task is not None and not job.task.done():
+            await asyncio.shield(job.task)
+        return job.to_dict()
+
+    async def _run(self, job: CrawlJob):
+        job.state = "running"
+        job.started_at = datetime.now()
+        publish_crawler_event("job_started", job=job.to_dict())
+        await self._record(job)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            results = await self._get_crawler().discover_news(progress=job.progress)
+            job.news_count = len(results)
+            job.state = "succeeded"
+            logger.info(f"爬取任务完成: {job.id}，新增 {job.news_count} 条新闻")
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+            job.error = job.error or "任务已取消"
+            logger.info(f"爬取任务已取消: {job.id}")
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            logger.error(f"爬取任务失败: {job.id}，错误: {e}", exc_info=True)
+        finally:
+            job.finished_at = datetime.now()
+            heartbeat.cancel()
+            try:
+                await release_lease(RUN_LOCK_NAME, job.holder, job.to_dict())
+            except Exception as e:
+                logger.warning(f"释放爬取运行锁失败，将在过期后自动失效: {e}")
+            if self.current is job:
+                self.current = None
+            await self._record(job)
+            publish_crawler_event("job_finished", job=job.to_dict())
+            try:
+                await get_crawl_ledger().maybe_compact()
+            except Exception as e:
+                logger.error(f"压缩爬取记录失败: {e}", exc_info=True)
+
+    async def _record(self, job: CrawlJob):
+        """写入文章明细与运行记录；记录失败不影响爬取"""
+        ledger = get_crawl_ledger()
+        try:
+            await ledger.flush()
+            await ledger.record_run(job.to_dict())
+        except Exception as e:
+            logger.error(f"写入爬取记录失败: {e}", exc_info=True)
+
+    async def _heartbeat(self, job: CrawlJob):
+        """续约运行锁并上报进度；锁被撤销（其他工作进程取消了任务）时取消本任务"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            now = datetime.now()
+            try:
+                renewed = await renew_lease(RUN_LOCK_NAME, job.holder, self.ttl, now=now, status=job.to_dict())
+            except Exception as e:
+                logger.warning(f"爬取运行锁续约失败: {e}")
+                # 无法确认运行锁时，本地租期一过就必须停止，否则可能与接手的工作进程同时爬取
+                if datetime.now() >= job.lease_expires_at:
+                    job.error = "无法续约运行锁且租约已过期"
+                    job.task.cancel()
+                    return
+                continue
+            if not renewed:
+                job.error = "运行锁已被撤销"
+                job.task.cancel()
+                return
+            job.lease_expires_at = now + self.ttl
+            publish_crawler_event("job_progress", job=job.to_dict())
+            await self._record(job)
+
+    async def _remote_job(self, job_id: Optional[str] = None, lease: Optional[Dict] = None) -> Optional[Dict]:
+        """其他工作进程上正在运行的任务（从运行锁读取，可传入已读取的租约），可按任务ID过滤"""
+        if lease is None:
+            lease = await read_lease(RUN_LOCK_NAME)
+        if lease is None or not lease["status"]:
+            return None
+        status = lease["status"]
+        if job_id is not None and status["id"] != job_id:
+            return None
+        if not lease["alive"] and status["state"] not in JOB_STATES_FINISHED:
+            # 持有者异常退出，任务不会再有进展
+            status = {**status, "state": "failed", "error": "执行任务的工作进程已失联"}
+        return status
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        # 等待 worker 接手的请求、其他工作进程正在运行的任务，或已结束（包括重启前）的任务
+        pending = await self._pending_request(job_id)
+        if pending is not None and "merged_into" in pending:
+            return await self.get(pending["merged_into"])
+        return pending or await self._remote_job(job_id) or await get_crawl_ledger().get_run(job_id)
+
+    async def list_jobs(self) -> List[Dict]:
+        """最近的任务（新的在前），包括其他工作进程上正在运行或最近结束的任务"""
+        jobs = [job.to_dict() for job in reversed(self.jobs.values())]
+        remote = await self._remote_job()
+        if remote is not None and remote["id"] not in self.jobs:
+            jobs.insert(0, remote)
+        pending = await read_lease(REQUEST_LEASE_NAME)
+        if pending is not None and pending["alive"] and pending["status"]:
+            jobs.insert(0, pending["status"])
+        return jobs
+
+    async def cancel(self, job_id: str) -> Optional[Dict]:
+        """取消任务；任务已结束时原样返回，不存在时返回 None"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            if not job.finished and job.task is not None:
+                job.task.cancel()
+                try:
+                    await asyncio.shield(job.task)
+                except asyncio.CancelledError:
+                    pass
+            return job.to_dict()
+
+        pending = await self._pending_request(job_id)
+        if pending is not None and "merged_into" in pending:
+            return await self.cancel(pending["merged_into"])
+        if pending is not None and await release_lease(REQUEST_LEASE_NAME, job_id):
+            return {**pending, "state": "cancelled", "error": "任务已取消"}
+
+        lease = await read_lease(RUN_LOCK_NAME)
+        remote = await self._remote_job(job_id, lease)
+        if remote is None or remote["state"] in JOB_STATES_FINISHED:
+            return remote
+        # 撤销运行锁（只撤销该任务的持有者），持有者在下一次心跳时取消任务
+        if not await release_lease(RUN_LOCK_NAME, lease["holder"]):
+            return await self.get(job_id)
+        return {**remote, "state": "cancelling"}
+
+    async def start(self):
+        """worker 进程启动爬取请求轮询"""
+        if self.runs_crawls and (self.poll_task is None or self.poll_task.done()):
+            self.poll_task = asyncio.create_task(self._poll_requests())
+
+    async def stop(self):
+        """应用关闭时停止轮询并取消本进程正在运行的任务"""
+        if self.poll_task is not None:
+            self.poll_task.cancel()
+            try:
+                await self.poll_task
+            except asyncio.CancelledError:
+                pass
+            self.poll_task = None
+        if self.current is not None and self.current.task is not None:
+            self.current.task.cancel()
+            try:
+                await self.current.task
+            except asyncio.CancelledError:
+                pass
+
+    def get_status(self) -> Dict:
+        return {
+            "current_job": self.current.to_dict() if self.current else None,
+            "jobs_in_history": len(self.jobs),
+        }
+
+
+# 全局任务管理实例
+_manager_instance: Optional[CrawlJobManager] = None
+
+
+def get_crawl_job_manager() -> CrawlJobManager:
+    """获取全局爬取任务管理实例"""
+    global _manager_instance
+    if _manager_instance is None:
+        _manager_instance = CrawlJobManager()
+    return _manager_instance
+
+
+async def start_crawl_jobs():
+    """开始接手 API 进程登记的爬取请求（用于 worker 进程启动时调用）"""
+    await get_crawl_job_manager().start()
+
+
+async def stop_crawl_jobs():
+    """取消正在运行的爬取任务（用于应用关闭时调用）"""
+    await get_crawl_job_manager().stop()
@@ -0,0 +1,408 @@
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import case, delete, func, insert, select
+
+from ..config import (
+    CRAWL_LEDGER_COMPACT_AFTER_DAYS, CRAWL_LEDGER_COMPACT_INTERVAL_HOURS, CRAWL_LEDGER_RETENTION_DAYS
+)
+from ..db.database import AsyncSessionLocal
+from ..models.crawl_ledger import CrawlAttempt, CrawlRun, CrawlSourceDaily
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# LLM 任务 -> 记录耗时的列
+LLM_TASK_COLUMNS = {
+    "extract": "extract_ms",
+    "relevance": "relevance_ms",
+    "summary": "summary_ms",
+    "score": "score_ms",
+    "classify": "classify_ms",
+}
+STAGE_COLUMNS = ("fetch_ms", *LLM_TASK_COLUMNS.values(), "save_ms")
+FAILED_OUTCOMES = ("fetch_failed", "extract_failed", "save_failed", "error")
+ERROR_MAX_LENGTH = 200
+
+# 当前协程正在处理的文章（每篇文章在独立的任务中处理，互不干扰）
+_current_attempt: ContextVar[Optional["ArticleAttempt"]] = ContextVar("crawl_attempt", default=None)
+
+
+class ArticleAttempt:
+    """一篇文章的处理过程：各阶段耗时、抓取字节数与 LLM token 数"""
+
+    def __init__(self, url: str, source: str, run_id: Optional[str] = None):
+        self.url = url
+        self.source = source
+        self.run_id = run_id
+        self.started_at = datetime.now()
+        self._start = time.monotonic()
+        self.timings: Dict[str, int] = {}
+        self.bytes_fetched = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.outcome: Optional[str] = None
+        self.error: Optional[str] = None
+
+    def add_time(self, column: str, seconds: float):
+        self.timings[column] = self.timings.get(column, 0) + int(seconds * 1000)
+
+    @contextmanager
+    def timed(self, column: str) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_time(column, time.monotonic() - start)
+
+    def finish(self, outcome: str, error: Optional[str] = None):
+        self.outcome = outcome
+        self.error = error[:ERROR_MAX_LENGTH] if error else None
+
+    def to_row(self) -> Dict:
+        return {
+            "run_id": self.run_id,
+            "source": self.source,
+            "url": self.url,
+            "outcome": self.outcome,
+            "started_at": self.started_at,
+            "total_ms": int((time.monotonic() - self._start) * 1000),
+            **{column: self.timings.get(column) for column in STAGE_COLUMNS},
+            "bytes_fetched": self.bytes_fetched,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "error": self.error,
+        }
+
+
+def record_llm_call(task: str, latency: float, prompt_tokens: int = 0, completion_tokens: int = 0):
+    """LLM 调用遥测回调：计入当前文章的对应阶段耗时与 token 数（不在文章处理中时忽略）"""
+    attempt = _current_attempt.get()
+    if attempt is None:
+        return
+    column = LLM_TASK_COLUMNS.get(task)
+    if column:
+        attempt.add_time(column, latency)
+    attempt.prompt_tokens += prompt_tokens
+    attempt.completion_tokens += completion_tokens
+
+
+def _attempt_aggregates():
+    """按来源汇总文章明细的聚合列（与 CrawlSourceDaily 的字段对应）"""
+    llm_ms = sum(func.coalesce(getattr(CrawlAttempt, column), 0) for column in LLM_TASK_COLUMNS.values())
+    return (
+        func.count().label("attempts"),
+        func.sum(case((CrawlAttempt.outcome == "saved", 1), else_=0)).label("saved"),
+        func.sum(case((CrawlAttempt.outcome.in_(FAILED_OUTCOMES), 1), else_=0)).label("failed"),
+        func.sum(CrawlAttempt.total_ms).label("total_ms"),
+        func.coalesce(func.sum(CrawlAttempt.fetch_ms), 0).label("fetch_ms"),
+        func.sum(llm_ms).label("llm_ms"),
+        func.sum(CrawlAttempt.bytes_fetched).label("bytes_fetched"),
+        func.sum(CrawlAttempt.prompt_tokens + CrawlAttempt.completion_tokens).label("tokens"),
+    )
+
+
+def _percentile(values: List[int], q: float) -> Optional[int]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+class CrawlLedger:
+    """爬取记录
+
+    文章明细先缓存在内存，由爬取任务在心跳和结束时批量写入；运行记录随任务状态更新。
+    明细超过 CRAWL_LEDGER_COMPACT_AFTER_DAYS 后压缩为按日、按来源的汇总，汇总与运行记录按保留期删除。
+    """
+
+    def __init__(self):
+        self.pending: List[Dict] = []
+        self.last_compact: Optional[datetime] = None
+
+    @contextmanager
+    def track_article(self, url: str, source: str, run_id: Optional[str] = None) -> Iterator[ArticleAttempt]:
+        """在 with 块内处理一篇文章；未显式 finish 时按异常类型记为 error / cancelled"""
+        attempt = ArticleAttempt(url, source, run_id)
+        token = _current_attempt.set(attempt)
+        try:
+            yield attempt
+        except BaseException as e:
+            if attempt.outcome is None:
+                attempt.finish("error" if isinstance(e, Exception) else "cancelled", str(e) or type(e).__name__)
+            raise
+        finally:
+            _current_attempt.reset(token)
+            if attempt.outcome is None:
+                attempt.finish("error", "未记录处理结果")
+            self.pending.append(attempt.to_row())
+
+    async def flush(self) -> int:
+        """批量写入缓存的文章明细"""
+        if not self.pending:
+            return 0
+        rows, self.pending = self.pending, []
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(CrawlAttempt), rows)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"写入爬取明细失败，丢弃 {len(rows)} 条: {e}")
+            return 0
+        return len(rows)
+
+    async def record_run(self, job: Dict):
+        """写入或更新一次运行的记录（job 为爬取任务的状态字典）"""
+        progress = job["progress"]
+        async with AsyncSessionLocal() as db:
+            await db.merge(CrawlRun(
+                id=job["id"],
+                trigger=job["trigger"],
+                state=job["state"],
+                worker_id=job["worker_id"],
+                started_at=datetime.fromisoformat(job["started_at"] or job["created_at"]),
+                finished_at=datetime.fromisoformat(job["finished_at"]) if job["finished_at"] else None,
+                duration_ms=int(job["duration"] * 1000) if job["duration"] is not None else None,
+                sources_total=progress["sources_total"],
+                sources_done=progress["sources_done"],
+                articles_queued=progress["articles_queued"],
+                articles_fetched=progress["articles_fetched"],
+                articles_analysed=progress["articles_analysed"],
+                articles_saved=progress["articles_saved"],
+                articles_failed=progress["articles_failed"],
+                error=job["error"][:ERROR_MAX_LENGTH] if job["error"] else None,
+            ))
+            await db.commit()
+
+    async def compact(self, now: Optional[datetime] = None) -> Dict:
+        """把过期明细压缩为按日汇总，并删除超出保留期的汇总与运行记录"""
+        now = now or datetime.now()
+        cutoff = datetime.combine(now.date() - timedelta(days=CRAWL_LEDGER_COMPACT_AFTER_DAYS), datetime.min.time())
+        retention_start = now - timedelta(days=CRAWL_LEDGER_RETENTION_DAYS)
+        day = func.date(CrawlAttempt.started_at)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(
+                    day.label("day"),
+                    CrawlAttempt.source,
+                    *_attempt_aggregates(),
+                )
+                .where(CrawlAttempt.started_at < cutoff)
+                .group_by(day, CrawlAttempt.source)
+            )).all()
+
+            for row in rows:
+                key = (_as_date(row.day), row.source)
+                daily = await db.get(CrawlSourceDaily, key)
+                if daily is None:
+                    daily = CrawlSourceDaily(day=key[0], source=key[1], attempts=0, saved=0, failed=0, total_ms=0,
+                                             fetch_ms=0, llm_ms=0, bytes_fetched=0, tokens=0)
+                    db.add(daily)
+                for field in ("attempts", "saved", "failed", "total_ms", "fetch_ms", "llm_ms", "bytes_fetched", "tokens"):
+                    setattr(daily, field, getattr(daily, field) + int(getattr(row, field) or 0))
+
+            compacted = (await db.execute(delete(CrawlAttempt).where(CrawlAttempt.started_at < cutoff))).rowcount
+            expired_daily = (await db.execute(
+                delete(CrawlSourceDaily).where(CrawlSourceDaily.day < retention_start.date())
+            )).rowcount
+            expired_runs = (await db.execute(delete(CrawlRun).where(CrawlRun.started_at < retention_start))).rowcount
+            await db.commit()
+
+        self.last_compact = now
+        result = {"compacted_attempts": compacted, "expired_daily": expired_daily, "expired_runs": expired_runs}
+        if compacted or expired_daily or expired_runs:
+            logger.info(f"爬取记录压缩完成: {result}")
+        return result
+
+    async def maybe_compact(self):
+        """距上次压缩超过 CRAWL_LEDGER_COMPACT_INTERVAL_HOURS 时执行压缩"""
+        if self.last_compact is None or \
+                datetime.now() - self.last_compact >= timedelta(hours=CRAWL_LEDGER_COMPACT_INTERVAL_HOURS):
+            await self.compact()
+
+    async def list_runs(self, limit: int = 20) -> List[Dict]:
+        async with AsyncSessionLocal() as db:
+            runs = (await db.execute(
+                select(CrawlRun).order_by(CrawlRun.started_at.desc()).limit(limit)
+            )).scalars().all()
+        return [self._run_to_dict(run) for run in runs]
+
+    async def get_run(self, run_id: str) -> Optional[Dict]:
+        async with AsyncSessionLocal() as db:
+            run = await db.get(CrawlRun, run_id)
+        return self._run_to_dict(run) if run else None
+
+    async def list_attempts(self, run_id: str) -> List[Dict]:
+        async with AsyncSessionLocal() as db:
+            attempts = (await db.execute(
+                select(CrawlAttempt).where(CrawlAttempt.run_id == run_id).order_by(CrawlAttempt.id)
+            )).scalars().all()
+        return [
+            {
+                "source": attempt.source,
+                "url": attempt.url,
+                "outcome": attempt.outcome,
+                "started_at": attempt.started_at.isoformat(),
+                "total_ms": attempt.total_ms,
+                **{column: getattr(attempt, column) for column in STAGE_COLUMNS},
+                "bytes_fetched": attempt.bytes_fetched,
+                "prompt_tokens": attempt.prompt_tokens,
+                "completion_tokens": attempt.completion_tokens,
+                "error": attempt.error,
+            }
+            for attempt in attempts
+        ]
+
+    @staticmethod
+    def _run_to_dict(run: CrawlRun) -> Dict:
+        return {
+            "id": run.id,
+            "trigger": run.trigger,
+            "state": run.state,
+            "worker_id": run.worker_id,
+            "started_at": run.started_at.isoformat(),
+            "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+            "duration": run.duration_ms / 1000 if run.duration_ms is not None else None,
+            "progress": {
+                "sources_total": run.sources_total,
+                "sources_done": run.sources_done,
+                "articles_queued": run.articles_queued,
+                "articles_fetched": run.articles_fetched,
+                "articles_analysed": run.articles_analysed,
+                "articles_saved": run.articles_saved,
+                "articles_failed": run.articles_failed,
+            },
+            "news_count": run.articles_saved,
+            "error": run.error,
+        }
+
+    async def throughput(self, hours: float = 24, bucket_minutes: int = 60) -> Dict:
+        """时间窗口内的吞吐：运行次数、文章结果分布、各阶段耗时分位数，以及按时间桶的文章数
+
+        窗口不超过明细保留期（CRAWL_LEDGER_COMPACT_AFTER_DAYS），更早的数据只有按来源的日汇总。
+        """
+        hours = min(hours, CRAWL_LEDGER_COMPACT_AFTER_DAYS * 24)
+        since = datetime.now() - timedelta(hours=hours)
+        async with AsyncSessionLocal() as db:
+            attempts = (await db.execute(
+                select(CrawlAttempt.started_at, CrawlAttempt.outcome, CrawlAttempt.total_ms,
+                       CrawlAttempt.bytes_fetched, CrawlAttempt.prompt_tokens, CrawlAttempt.completion_tokens,
+                       *(getattr(CrawlAttempt, column) for column in STAGE_COLUMNS))
+                .where(CrawlAttempt.started_at >= since)
+            )).all()
+            runs = (await db.execute(
+                select(CrawlRun.state, CrawlRun.duration_ms).where(CrawlRun.started_at >= since)
+            )).all()
+
+        outcomes = Counter(row.outcome for row in attempts)
+        run_durations = [row.duration_ms for row in runs if row.duration_ms is not None]
+        stages = {}
+        for column in ("total_ms", *STAGE_COLUMNS):
+            values = [getattr(row, column) for row in attempts if getattr(row, column) is not None]
+            stages[column[:-3]] = {
+                "count": len(values),
+                "avg_ms": round(sum(values) / len(values)) if values else None,
+                "p50_ms": _percentile(values, 0.5),
+                "p95_ms": _percentile(values, 0.95),
+            }
+
+        bucket = timedelta(minutes=bucket_minutes)
+        buckets: Dict[datetime, Counter] = defaultdict(Counter)
+        for row in attempts:
+            start = since + bucket * int((row.started_at - since) / bucket)
+            buckets[start]["attempts"] += 1
+            buckets[start]["saved"] += row.outcome == "saved"
+            buckets[start]["failed"] += row.outcome in FAILED_OUTCOMES
+
+        return {
+            "window_hours": hours,
+            "runs": {
+                "count": len(runs),
+                "by_state": dict(Counter(row.state for row in runs)),
+                "avg_duration_ms": round(sum(run_durations) / len(run_durations)) if run_durations else None,
+            },
+            "articles": {
+                "attempts": len(attempts),
+                "by_outcome": dict(outcomes),
+                "saved_per_hour": round(outcomes["saved"] / hours, 2) if hours else 0,
+            },
+            "stages": stages,
+            "bytes_fetched": sum(row.bytes_fetched for row in attempts),
+            "tokens": sum(row.prompt_tokens + row.completion_tokens for row in attempts),
+            "buckets": [
+                {"start": start.isoformat(), **counts}
+                for start, counts in sorted(buckets.items())
+            ],
+        }
+
+    async def slowest_sources(self, days: int = 7, limit: int = 10) -> List[Dict]:
+        """按平均单篇耗时排序的来源，合并明细与压缩后的日汇总"""
+        since = datetime.now() - timedelta(days=days)
+        async with AsyncSessionLocal() as db:
+            detail = (await db.execute(
+                select(
+                    CrawlAttempt.source,
+                    *_attempt_aggregates(),
+                    func.max(CrawlAttempt.total_ms).label("max_ms"),
+                )
+                .where(CrawlAttempt.started_at >= since)
+                .group_by(CrawlAttempt.source)
+            )).all()
+            daily = (await db.execute(
+                select(
+                    CrawlSourceDaily.source,
+                    func.sum(CrawlSourceDaily.attempts).label("attempts"),
+                    func.sum(CrawlSourceDaily.saved).label("saved"),
+                    func.sum(CrawlSourceDaily.failed).label("failed"),
+                    func.sum(CrawlSourceDaily.total_ms).label("total_ms"),
+                    func.sum(CrawlSourceDaily.fetch_ms).label("fetch_ms"),
+                    func.sum(CrawlSourceDaily.llm_ms).label("llm_ms"),
+                    func.sum(CrawlSourceDaily.bytes_fetched).label("bytes_fetched"),
+                    func.sum(CrawlSourceDaily.tokens).label("tokens"),
+                )
+                .where(CrawlSourceDaily.day >= since.date())
+                .group_by(CrawlSourceDaily.source)
+            )).all()
+
+        fields = ("attempts", "saved", "failed", "total_ms", "fetch_ms", "llm_ms", "bytes_fetched", "tokens")
+        sources: Dict[str, Dict] = {}
+        for row in [*detail, *daily]:
+            entry = sources.setdefault(row.source, {"source": row.source, "max_ms": None, **{f: 0 for f in fields}})
+            for field in fields:
+                entry[field] += int(getattr(row, field) or 0)
+            if "max_ms" in row._fields:
+                entry["max_ms"] = row.max_ms
+
+        results = []
+        for entry in sources.values():
+            attempts = entry["attempts"] or 1
+            results.append({
+                **entry,
+                "avg_ms": round(entry["total_ms"] / attempts),
+                "avg_fetch_ms": round(entry["fetch_ms"] / attempts),
+                "avg_llm_ms": round(entry["llm_ms"] / attempts),
+                "failure_rate": round(entry["failed"] / attempts, 4),
+            })
+        results.sort(key=lambda entry: entry["avg_ms"], reverse=True)
+        return results[:limit]
+
+
+# 全局爬取记录实例
+_ledger_instance: Optional[CrawlLedger] = None
+
+
+def get_crawl_ledger() -> CrawlLedger:
+    """获取全局爬取记录实例"""
+    global _ledger_instance
+    if _ledger_instance is None:
+        _ledger_instance = CrawlLedger()
+    return _ledger_instance
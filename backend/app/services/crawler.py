@@ -2,31 +2,52 @@ import asyncio
 from datetime import datetime
 import logging
 import re
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from typing import Dict, List, Optional
 
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
-
-from ..db.database import SessionLocal
+from ..db.database import AsyncSessionLocal
 from ..models.news import News
-from ..models.category import Category
-from ..services.ai_processor import OpenRouterService 
 from ..config import NEWS_SOURCES, CRAWLER_HEADLESS
 from urllib.parse import urljoin, urlparse
 from ..models.source import Source
+from .news_writer import get_news_writer
+from .events import publish_crawler_event
+from .crawl_jobs import CrawlProgress
+from .crawl_ledger import ArticleAttempt, get_crawl_ledger
+from .metrics import registry
+from ..logging_setup import SAMPLED, payload
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+crawler_browser_pages = registry.gauge("crawler_browser_pages_active", "正在打开的爬虫浏览器页面数", ("kind",))
+
 class NewsCrawlerService:
-    """新闻爬虫服务"""
+    """新闻爬虫服务
+
+    crawl4ai（Playwright）与 OpenRouter 客户端都在首次使用时才导入和创建，
+    只读 API 进程导入本模块不需要这些依赖，也不需要配置 API 密钥。
+    """
     
     def __init__(self):
-        self.ai_service = OpenRouterService()
+        self._ai_service = None
+
+    @property
+    def ai_service(self):
+        if self._ai_service is None:
+            from .ai_processor import OpenRouterService
+            self._ai_service = OpenRouterService()
+        return self._ai_service
+
+    def get_model_health(self) -> List[Dict]:
+        """LLM 模型健康状态；AI 服务尚未创建时为空"""
+        return self._ai_service.get_model_health() if self._ai_service is not None else []
     
     async def crawl_url(self, url: str) -> Dict:
         """爬取单个URL (使用 AI 提取)"""
-        logger.info(f"开始使用 AI 提取爬取URL: {url}")
+        from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+
+        logger.debug("开始使用 AI 提取爬取URL: %s", url)
         
         # 配置浏览器
         browser_config = BrowserConfig(headless=CRAWLER_HEADLESS)
@@ -38,6 +59,7 @@ class NewsCrawlerService:
             # 移除 llm_config
         )
 
+        crawler_browser_pages.inc(kind="article")
         try:
             # 使用异步爬虫爬取URL
             async with AsyncWebCrawler(config=browser_config) as crawler:
@@ -49,14 +71,16 @@ class NewsCrawlerService:
                 # --- 结束修改 ---
                 return self._process_crawl_result(result, url)
         except Exception as e:
-            logger.error(f"爬取时发生错误: {e}", exc_info=True)
+            logger.error("爬取时发生错误: %s", e, exc_info=True)
             return {"success": False, "error": str(e)}
+        finally:
+            crawler_browser_pages.dec(kind="article")
             
     def _process_crawl_result(self, result, url) -> Dict:
         """处理爬取结果"""
         if not result.success:
             error_msg = result.error_message if hasattr(result, "error_message") else "爬取失败"
-            logger.error(f"URL {url} 爬取失败: {error_msg}")
+            logger.error("URL %s 爬取失败: %s", url, error_msg)
             return {"success": False, "error": error_msg}
 
         try:
@@ -65,14 +89,14 @@ class NewsCrawlerService:
             content = result.markdown.raw_markdown if hasattr(result, "markdown") and result.markdown else ""
 
             # --- 修改日志并增加内容检查 ---
-            logger.info(f"URL {url} - AI 提取到的完整 Markdown 内容 (前 1000 字符): {content[:1000]}...")
+            logger.debug("URL %s - 提取到的 Markdown 内容: %s", url, payload(content), extra=SAMPLED)
             # 增加对空内容或过短内容的检查
             if not title or not content or content.strip() == "" or len(content.strip()) < 50: # 增加一个最小长度判断 (例如 50 字符)
-                logger.warning(f"URL {url} AI 提取内容不完整或过短: 标题='{title}', 内容长度={len(content.strip())}")
+                logger.warning("URL %s AI 提取内容不完整或过短: 标题='%s', 内容长度=%d", url, title, len(content.strip()))
                 return {"success": False, "error": "AI 提取的内容不完整或过短"}
             # --- 结束修改 ---
 
-            logger.info(f"URL {url} AI 提取成功: 标题 '{title}'")
+            logger.debug("URL %s AI 提取成功: 标题 '%s'", url, title)
 
             return {
                 "success": True,
@@ -82,67 +106,95 @@ class NewsCrawlerService:
                 "raw_html": result.html if hasattr(result, "html") else "" # 原始 HTML 仍然可用
             }
         except Exception as e:
-            logger.error(f"处理 AI 提取结果时出错: {e}", exc_info=True)
+            logger.error("处理 AI 提取结果时出错: %s", e, exc_info=True)
             return {"success": False, "error": f"处理 AI 提取结果时出错: {str(e)}"}
     
-    async def discover_news(self) -> List[Dict]:
-        """从预设新闻源发现新闻，并爬取文章"""
+    async def discover_news(self, progress: Optional[CrawlProgress] = None) -> List[Dict]:
+        """从预设新闻源发现新闻，并爬取文章
+
+        Args:
+            progress: 爬取任务的进度计数（来源、入队、抓取、分析、保存的文章数），为空时不对外报告
+        """
         logger.info("开始新闻发现流程")
+        progress = progress or CrawlProgress()
         saved_news_list = []
-        sources = self._get_news_sources()
-
-        for source in sources:
-            logger.info(f"处理新闻源: {source['name']} ({source['url']})")
+        sources = await self._get_news_sources()
+        progress.sources_total = len(sources)
+        publish_crawler_event("discovery_started", total_sources=len(sources))
+
+        for index, source in enumerate(sources, 1):
+            logger.info("处理新闻源: %s (%s)", source['name'], source['url'])
+            publish_crawler_event("source_started", source=source['name'], index=index, total_sources=len(sources))
+            progress.current_source = source['name']
+            saved_before = len(saved_news_list)
             try:
                 # 1. 爬取新闻源首页以获取链接 (不使用 AI 提取)
-                browser_config = BrowserConfig(headless=CRAWLER_HEADLESS)
-                # --- 恢复使用 CrawlerRunConfig ---
-                homepage_run_config = CrawlerRunConfig(
-                    page_timeout=90000
-                )
-                async with AsyncWebCrawler(config=browser_config) as crawler:
-                    homepage_result = await crawler.arun(source['url'], config=homepage_run_config)
-                # --- 结束恢复 ---
+                homepage_result = await self._fetch_homepage(source['url'])
 
                 # ... (检查链接提取是否成功) ...
                 if not homepage_result.success or not hasattr(homepage_result, 'links') or not homepage_result.links:
-                     logger.warning(f"爬取新闻源 {source['name']} 或提取链接失败。...")
+                     logger.warning("爬取新闻源 %s 或提取链接失败", source['name'])
                      continue
                 # ... (日志记录原始链接) ...
 
                  # 2. 提取并筛选文章链接 (逻辑不变)
                 article_links = self._extract_article_links(homepage_result.links, source['url'])
-                logger.info(f"从 {source['name']} 提取到 {len(article_links)} 个潜在文章链接")
+                logger.info("从 %s 提取到 %d 个潜在文章链接", source['name'], len(article_links))
 
                  # 3. 遍历并创建处理任务
                 tasks = []
                 for link_url in article_links[:10]: # 限制每次处理的文章数量
-                    if not self._is_url_processed(link_url):
-                        tasks.append(self._process_single_article(link_url, source['name'], source['category']))
+                    if not await self._is_url_processed(link_url):
+                        tasks.append(self._process_single_article(link_url, source['name'], source['category'], progress))
                     else:
-                        logger.info(f"跳过已处理的URL: {link_url}")
+                        logger.debug("跳过已处理的URL: %s", link_url)
 
                 # 并发执行所有文章处理任务并等待结果
                 if tasks:
-                    logger.info(f"开始并发处理 {len(tasks)} 篇文章...")
+                    progress.incr("articles_queued", len(tasks))
+                    logger.info("开始并发处理 %d 篇文章...", len(tasks))
                     results = await asyncio.gather(*tasks, return_exceptions=True)
-                    logger.info(f"文章处理完成，结果数量: {len(results)}")
+                    logger.info("文章处理完成，结果数量: %d", len(results))
 
                     # 处理结果 (可选，可以记录成功/失败)
                     for result in results:
                         if isinstance(result, Exception):
-                            logger.error(f"处理单个文章时发生异常: {result}", exc_info=result)
+                            logger.error("处理单个文章时发生异常: %s", result, exc_info=result)
                         elif result and result.get('success'):
                             saved_news_list.append(result) # 收集成功保存的新闻信息
                         # 可以添加对失败结果的日志记录
                 # --- 结束修改 ---
 
+                publish_crawler_event("source_finished", source=source['name'], index=index,
+                                      total_sources=len(sources), saved=len(saved_news_list) - saved_before)
             except Exception as e:
-                logger.error(f"处理新闻源 {source['name']} 时发生严重错误: {e}", exc_info=True)
+                logger.error("处理新闻源 %s 时发生严重错误: %s", source['name'], e, exc_info=True)
+                publish_crawler_event("source_failed", source=source['name'], index=index,
+                                      total_sources=len(sources), error=str(e))
+            finally:
+                progress.incr("sources_done")
 
-        logger.info(f"新闻发现完成，共处理并尝试保存 {len(saved_news_list)} 条新文章") # 修改日志消息
+        progress.current_source = None
+
+        logger.info("新闻发现完成，共处理并尝试保存 %d 条新文章", len(saved_news_list)) # 修改日志消息
+        publish_crawler_event("discovery_finished", total_sources=len(sources), saved=len(saved_news_list))
         return saved_news_list # 返回成功保存的新闻列表
 
+    async def _fetch_homepage(self, url: str):
+        """爬取新闻源首页，返回 crawl4ai 的原始结果 (用于提取链接)"""
+        from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+
+        browser_config = BrowserConfig(headless=CRAWLER_HEADLESS)
+        homepage_run_config = CrawlerRunConfig(
+            page_timeout=90000
+        )
+        crawler_browser_pages.inc(kind="homepage")
+        try:
+            async with AsyncWebCrawler(config=browser_config) as crawler:
+                return await crawler.arun(url, config=homepage_run_config)
+        finally:
+            crawler_browser_pages.dec(kind="homepage")
+
     def _extract_article_links(self, links: Dict[str, str], base_url: str) -> List[str]:
         """从爬取的链接中筛选出可能的文章链接 (使用精确正则)"""
         article_urls = set()
@@ -253,68 +305,90 @@ class NewsCrawlerService:
                     # logger.debug(f"Skipping link (no regex match): {full_url}")
 
             except Exception as e:
-                logger.warning(f"处理链接 {url} 时出错: {e}")
+                logger.warning("处理链接 %s 时出错: %s", url, e)
 
-        logger.info(f"最终筛选出的文章链接 ({len(article_urls)}): {list(article_urls)}")
+        logger.debug("最终筛选出的文章链接 (%d): %s", len(article_urls), payload(sorted(article_urls)))
         return list(article_urls)
 
-    async def _process_single_article(self, url: str, source_name: str, category_name: str) -> Optional[Dict]:
+    async def _process_single_article(self, url: str, source_name: str, category_name: str,
+                                      progress: Optional[CrawlProgress] = None) -> Optional[Dict]:
         """爬取、处理并保存单个文章"""
-        logger.info(f"开始处理文章: {url}")
+        logger.debug("开始处理文章: %s", url)
+        progress = progress or CrawlProgress()
+        result = None
         try:
-            crawl_result = await self.crawl_url(url)
+            # 记录各阶段耗时、抓取字节数与 LLM token 数（LLM 部分由调用遥测计入）
+            with get_crawl_ledger().track_article(url, source_name, progress.run_id) as attempt:
+                result = await self._crawl_and_save_article(url, source_name, progress, attempt)
+            return result
+        finally:
+            progress.incr("articles_saved" if result and result.get("success") else "articles_failed")
+
+    async def _crawl_and_save_article(self, url: str, source_name: str, progress: CrawlProgress,
+                                      attempt: ArticleAttempt) -> Dict:
+        try:
+            with attempt.timed("fetch_ms"):
+                crawl_result = await self.crawl_url(url)
             if crawl_result['success']:
+                progress.incr("articles_fetched")
+                attempt.bytes_fetched = len((crawl_result.get('raw_html') or '').encode('utf-8'))
                 title = crawl_result.get('title', '')
                 raw_content = crawl_result.get('content', '') # Markdown from crawl4ai
 
-                logger.info(f"调用 AI 从 Markdown 中提取正文: {url}")
+                logger.debug("调用 AI 从 Markdown 中提取正文: %s", url)
                 cleaned_content = await self.ai_service.extract_main_content(raw_content)
                 if not cleaned_content or len(cleaned_content) < 50:
-                    logger.warning(f"AI 未能从 Markdown 中提取有效正文，跳过: {url}")
+                    logger.warning("AI 未能从 Markdown 中提取有效正文，跳过: %s", url)
+                    attempt.finish("extract_failed")
                     return {"success": False, "error": "AI failed to extract main content"}
-                logger.info(f"AI 提取正文成功 (前 100 字符): {cleaned_content[:100]}...")
+                logger.debug("AI 提取正文成功: %s", payload(cleaned_content, 100), extra=SAMPLED)
 
                 # --- 关键步骤：调用 is_relevant_content 判断是否为单篇文章 ---
                 is_single_article = await self.ai_service.is_relevant_content(title, cleaned_content)
                 if not is_single_article:
-                    logger.info(f"内容被 LLM 判断为非单篇新闻文章，跳过: {url}")
+                    logger.info("内容被 LLM 判断为非单篇新闻文章，跳过: %s", url)
+                    attempt.finish("irrelevant")
                     return {"success": False, "error": "Content identified as not a single news article by LLM"}
                 # --- 结束判断 ---
 
                 # 如果是单篇文章，则继续处理
-                logger.info(f"内容被 LLM 判断为单篇新闻文章，继续处理: {url}")
+                logger.debug("内容被 LLM 判断为单篇新闻文章，继续处理: %s", url)
                 news_data = await self._prepare_news_data(
                     {**crawl_result, "content": cleaned_content, "title": title}, # 传递清理后的内容和标题
                     source_name,
                 )
-                save_result = self._save_news(news_data)
+                progress.incr("articles_analysed")
+                with attempt.timed("save_ms"):
+                    save_result = await self._save_news(news_data)
                 # ... (处理保存结果) ...
                 if save_result['success']:
+                    attempt.finish("saved")
                     return {
                         "success": True,
                         "news_id": save_result['news_id'],
                         "title": news_data['title']
                     }
                 else:
-                    logger.error(f"保存文章失败: {url}, 错误: {save_result.get('error')}")
+                    logger.error("保存文章失败: %s, 错误: %s", url, save_result.get('error'))
+                    # 写入器在 URL 冲突时返回已有新闻的ID
+                    attempt.finish("duplicate" if save_result.get('news_id') else "save_failed", save_result.get('error'))
                     return {"success": False, "error": save_result.get('error')}
             else:
                 # ... (处理爬取失败) ...
-                logger.error(f"爬取文章失败: {url}, 错误: {crawl_result.get('error')}")
+                logger.error("爬取文章失败: %s, 错误: %s", url, crawl_result.get('error'))
+                attempt.finish("fetch_failed", crawl_result.get('error'))
                 return {"success": False, "error": crawl_result.get('error')}
         except Exception as e:
             # ... (处理异常) ...
-            logger.error(f"处理文章 {url} 时发生异常: {e}", exc_info=True)
+            logger.error("处理文章 %s 时发生异常: %s", url, e, exc_info=True)
+            attempt.finish("error", str(e))
             return {"success": False, "error": str(e)}
         
-    def _is_url_processed(self, url: str) -> bool:
+    async def _is_url_processed(self, url: str) -> bool:
         """检查数据库中是否已存在该URL"""
-        db = SessionLocal()
-        try:
-            existing = db.query(News.id).filter(News.url == url).first()
+        async with AsyncSessionLocal() as db:
+            existing = (await db.execute(select(News.id).where(News.url == url).limit(1))).first()
             return existing is not None
-        finally:
-            db.close()
     
     async def _prepare_news_data(self, processed_result: Dict, source_name: str) -> Dict:
         """准备新闻数据用于保存 (使用 AI 服务)"""
@@ -340,54 +414,11 @@ class NewsCrawlerService:
             "categories": categories
         }
     
-    def _save_news(self, news_data: Dict) -> Dict:
-        """保存新闻到数据库"""
-        db = SessionLocal()
-        try:
-            # 检查URL是否已存在
-            existing_news = db.query(News).filter(News.url == news_data['url']).first()
-            if existing_news:
-                logger.info(f"新闻URL已存在: {news_data['url']}")
-                return {"success": False, "error": "URL已存在", "news_id": existing_news.id}
-            
-            # 创建新闻记录
-            news = News(
-                title=news_data['title'],
-                summary=news_data['summary'],
-                content=news_data['content'],
-                source=news_data['source'],
-                url=news_data['url'],
-                published_at=news_data['published_at'],
-                importance_score=news_data['importance_score'],
-                raw_html=news_data.get('raw_html', '')
-            )
-            
-            # 处理分类
-            for category_name in news_data['categories']:
-                # 获取或创建分类
-                category = db.query(Category).filter(Category.name == category_name).first()
-                if not category:
-                    category = Category(name=category_name)
-                    db.add(category)
-                    db.flush()
-                
-                # 关联新闻和分类
-                news.categories.append(category)
-            
-            # 保存到数据库
-            db.add(news)
-            db.commit()
-            
-            logger.info(f"成功保存新闻: {news.id} - {news.title}")
-            return {"success": True, "news_id": news.id}
-        except Exception as e:
-            db.rollback()
-            logger.error(f"保存新闻时出错: {e}")
-            return {"success": False, "error": str(e)}
-        finally:
-            db.close()
+    async def _save_news(self, news_data: Dict) -> Dict:
+        """保存新闻到数据库（交给批量写入器，在其所在批次提交后返回结果）"""
+        return await get_news_writer().submit(news_data)
     
-    def _get_news_sources(self) -> List[Dict]:
+    async def _get_news_sources(self) -> List[Dict]:
         """获取新闻源列表（包含预设源和用户自定义源）"""
         sources = []
         
@@ -395,27 +426,36 @@ class NewsCrawlerService:
         sources.extend(NEWS_SOURCES)
         
         # 从数据库获取用户自定义信息源
-        db = SessionLocal()
+        db = AsyncSessionLocal()
         try:
-            custom_sources = db.query(Source).all()
+            custom_sources = (await db.execute(select(Source))).scalars().all()
             for source in custom_sources:
                 sources.append({
                     "name": source.name,
                     "url": source.url,
                     "category": "用户自定义"  # 暂时使用固定分类，后续可以扩展
                 })
-            logger.info(f"获取到 {len(custom_sources)} 个用户自定义信息源")
+            logger.info("获取到 %d 个用户自定义信息源", len(custom_sources))
         except Exception as e:
-            logger.error(f"获取用户自定义信息源时出错: {e}")
+            logger.error("获取用户自定义信息源时出错: %s", e)
         finally:
-            db.close()
+            await db.close()
             
-        logger.info(f"总共获取到 {len(sources)} 个信息源")
+        logger.info("总共获取到 %d 个信息源", len(sources))
         return sources
 
+# 全局爬虫服务实例
+_crawler_instance: Optional[NewsCrawlerService] = None
+
+def get_crawler_service() -> NewsCrawlerService:
+    """获取全局爬虫服务实例（爬取任务与手动提交共用，共享模型健康状态）"""
+    global _crawler_instance
+    if _crawler_instance is None:
+        _crawler_instance = NewsCrawlerService()
+    return _crawler_instance
+
 # 定时任务
 async def discover_news_task():
     """定期执行新闻发现任务"""
     logger.info("开始执行定时新闻发现任务")
-    crawler = NewsCrawlerService()
-    await crawler.discover_news()
\ No newline at end of file
+    await get_crawler_service().discover_news()
\ No newline at end of file
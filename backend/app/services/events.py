@@ -0,0 +1,385 @@
+import asyncio
+import itertools
+import json
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import delete, insert, select
+
+from ..config import (
+    EVENTS_BACKEND, EVENTS_HEARTBEAT_SECONDS, EVENTS_POLL_SECONDS, EVENTS_REPLAY_SIZE,
+    EVENTS_RETENTION_MINUTES, EVENTS_SUBSCRIBER_QUEUE_SIZE,
+)
+from ..db.database import AsyncSessionLocal
+from ..models.event import PushEvent
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 事件类型
+NEWS_EVENT = "news"
+CRAWLER_EVENT = "crawler"
+# 内部事件：只交给本进程登记的处理函数，不推送给客户端
+CACHE_EVENT = "cache"
+INTERNAL_EVENTS = {CACHE_EVENT}
+
+# 发件箱最多积压的事件数（写库失败时保留重试）
+OUTBOX_SIZE = 1000
+# 每次轮询最多读取的事件数；回看最近的ID数，用于补上较晚提交的小ID（须小于 POLL_BATCH）
+POLL_BATCH = 500
+POLL_LOOKBACK = 50
+
+
+class Subscriber:
+    """一个推送连接：只持有一个有界队列，空闲时不占用其他资源"""
+
+    def __init__(self, types: Optional[Set[str]], queue_size: int):
+        self.types = types
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def wants(self, event_type: str) -> bool:
+        return self.types is None or event_type in self.types
+
+    def offer(self, event: Dict):
+        # 消费过慢时丢弃最旧的事件，发布方永不阻塞
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+        self.ready.set()
+
+    async def next(self, timeout: float) -> Optional[Dict]:
+        """取下一个事件，timeout 秒内没有事件时返回 None
+
+        不用 wait_for(queue.get())：超时与入队同时发生时，取出的事件会随被取消的 get 一起丢失。
+        """
+        try:
+            return self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        self.ready.clear()
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.queue.get_nowait()
+
+
+class DatabaseEventRelay:
+    """经 push_events 表在进程间分发事件
+
+    发布方把事件放入发件箱，由后台任务批量写入；每个进程（包括发布方自己）按自增ID轮询新事件，
+    交给本进程的事件总线推送。事件ID即表的自增ID，进程重启后不会重复。
+    PostgreSQL 中较小的ID可能晚于较大的ID提交，轮询时回看最近 POLL_LOOKBACK 个ID并跳过已分发的事件。
+    """
+
+    def __init__(self, bus: "EventBus", poll_seconds: float = EVENTS_POLL_SECONDS,
+                 retention_minutes: float = EVENTS_RETENTION_MINUTES):
+        self.bus = bus
+        self.poll_seconds = poll_seconds
+        self.retention = timedelta(minutes=retention_minutes)
+        self.outbox: deque = deque()
+        self.last_id = 0
+        self.delivered: Set[int] = set()
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.last_prune: Optional[datetime] = None
+
+        # 统计信息
+        self.written = 0
+        self.dropped = 0
+
+    def send(self, event_type: str, data: Dict):
+        if len(self.outbox) >= OUTBOX_SIZE:
+            self.outbox.popleft()
+            self.dropped += 1
+        self.outbox.append({
+            "type": event_type,
+            "data": json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str),
+            "created_at": datetime.now(),
+        })
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def start(self):
+        if self.task is not None and not self.task.done():
+            return
+        self.wakeup = asyncio.Event()
+        await self._load_recent()
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"事件分发已启动（push_events 表），从事件 {self.last_id} 之后开始轮询")
+
+    async def stop(self):
+        """停止轮询并写入发件箱中剩余的事件"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        try:
+            await self._flush()
+        except Exception as e:
+            logger.warning(f"写入剩余推送事件失败，丢弃 {len(self.outbox)} 条: {e}")
+
+    @staticmethod
+    def _to_event(row: PushEvent) -> Dict:
+        return {
+            "id": str(row.id),
+            "sequence": row.id,
+            "type": row.type,
+            "time": row.created_at.isoformat(),
+            "data": json.loads(row.data),
+        }
+
+    def _deliver(self, row: PushEvent):
+        self.delivered.add(row.id)
+        self.last_id = max(self.last_id, row.id)
+        self.bus.dispatch(self._to_event(row))
+
+    async def _load_recent(self):
+        """载入最近的事件作为补发缓冲，客户端重连到新启动的进程时也能补发"""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(PushEvent).order_by(PushEvent.id.desc()).limit(self.bus.recent.maxlen)
+            )).scalars().all()
+        for row in reversed(rows):
+            self._deliver(row)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            try:
+                await self._flush()
+                await self._poll()
+                await self._prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"推送事件分发失败: {e}")
+
+    async def _flush(self):
+        if not self.outbox:
+            return
+        batch = list(self.outbox)
+        self.outbox.clear()
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(PushEvent), batch)
+                await db.commit()
+        except Exception:
+            # 放回发件箱下次重试（超出上限的最旧事件会被丢弃）
+            self.outbox.extendleft(reversed(batch))
+            while len(self.outbox) > OUTBOX_SIZE:
+                self.outbox.popleft()
+                self.dropped += 1
+            raise
+        self.written += len(batch)
+
+    async def _poll(self):
+        floor = max(0, self.last_id - POLL_LOOKBACK)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(PushEvent).where(PushEvent.id > floor).order_by(PushEvent.id).limit(POLL_BATCH)
+            )).scalars().all()
+        for row in rows:
+            if row.id not in self.delivered:
+                self._deliver(row)
+        floor = self.last_id - POLL_LOOKBACK
+        self.delivered = {event_id for event_id in self.delivered if event_id > floor}
+
+    async def _prune(self):
+        """发布过事件的进程每分钟清理一次过期事件"""
+        now = datetime.now()
+        if not self.written or (self.last_prune is not None and now - self.last_prune < timedelta(minutes=1)):
+            return
+        self.last_prune = now
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(PushEvent).where(PushEvent.created_at < now - self.retention))
+            await db.commit()
+
+    def get_status(self) -> Dict:
+        return {
+            "last_id": self.last_id,
+            "outbox": len(self.outbox),
+            "written": self.written,
+            "outbox_dropped": self.dropped,
+        }
+
+
+class EventBus:
+    """发布/订阅
+
+    发布是同步且非阻塞的，可以在写入器、爬虫和调度器的任意位置调用。
+    EVENTS_BACKEND=database（默认）时事件经 push_events 表分发到所有进程，API 进程也能收到 worker 发布的事件；
+    memory 时只在本进程内分发。保留最近若干条事件，断线重连时按 Last-Event-ID 补发。
+    database 模式的事件ID为表的自增ID；memory 模式为 "<启动批次>-<序号>"，进程重启后序号从头计数，
+    批次不同的 Last-Event-ID 不做补发。
+    """
+
+    def __init__(self, queue_size: int = EVENTS_SUBSCRIBER_QUEUE_SIZE, replay_size: int = EVENTS_REPLAY_SIZE,
+                 backend: str = EVENTS_BACKEND):
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscriber] = set()
+        # 内部事件类型 -> 处理函数（同步调用，须快速返回）
+        self.handlers: Dict[str, List[Callable[[Dict], None]]] = {}
+        self.recent: deque = deque(maxlen=replay_size)
+        self.relay = DatabaseEventRelay(self) if backend == "database" else None
+        self.epoch = uuid.uuid4().hex[:8]
+        self.sequence = itertools.count(1)
+        self.published = 0
+
+    def _parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        """解析事件ID，返回序号；其他批次或格式不符时返回 None"""
+        if self.relay is not None:
+            return int(event_id) if event_id and event_id.isdigit() else None
+        epoch, _, sequence = (event_id or "").partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def publish(self, event_type: str, data: Dict):
+        self.published += 1
+        if self.relay is not None:
+            self.relay.send(event_type, data)
+            return
+        sequence = next(self.sequence)
+        self.dispatch({
+            "id": f"{self.epoch}-{sequence}",
+            "sequence": sequence,
+            "type": event_type,
+            "time": datetime.now().isoformat(),
+            "data": data,
+        })
+
+    def add_handler(self, event_type: str, handler: Callable[[Dict], None]):
+        """登记内部事件（INTERNAL_EVENTS）的处理函数"""
+        handlers = self.handlers.setdefault(event_type, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    def dispatch(self, event: Dict):
+        """推送给本进程的订阅者并加入补发缓冲；内部事件只交给处理函数"""
+        event_type = event["type"]
+        if event_type in INTERNAL_EVENTS:
+            for handler in self.handlers.get(event_type, ()):
+                try:
+                    handler(event)
+                except Exception as e:
+                    logger.error(f"内部事件 {event_type} 处理失败: {e}")
+            return
+        self.recent.append(event)
+        for subscriber in self.subscribers:
+            if subscriber.wants(event_type):
+                subscriber.offer(event)
+
+    def subscribe(self, types: Optional[Set[str]] = None, last_event_id: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber(types, self.queue_size)
+        last_sequence = self._parse_event_id(last_event_id)
+        if last_sequence is not None:
+            for event in self.recent:
+                if event["sequence"] > last_sequence and subscriber.wants(event["type"]):
+                    subscriber.offer(event)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def start(self):
+        if self.relay is not None:
+            await self.relay.start()
+
+    async def stop(self):
+        if self.relay is not None:
+            await self.relay.stop()
+
+    def get_status(self) -> Dict:
+        status = {
+            "backend": "database" if self.relay is not None else "memory",
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in self.subscribers),
+        }
+        if self.relay is not None:
+            status.update(self.relay.get_status())
+        else:
+            status["epoch"] = self.epoch
+        return status
+
+
+def format_sse(event: Dict) -> str:
+    payload = json.dumps(event["data"], ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+async def sse_stream(bus: "EventBus", types: Optional[Set[str]] = None, last_event_id: Optional[str] = None,
+                     heartbeat: float = EVENTS_HEARTBEAT_SECONDS) -> AsyncIterator[str]:
+    """订阅事件并编码为 SSE 文本；空闲时定期发送注释行保持连接
+
+    订阅在生成器开始迭代时才登记：客户端在响应开始前断开时不会留下订阅者。
+    """
+    subscriber = bus.subscribe(types, last_event_id)
+    try:
+        # 告诉浏览器断线后多久重连（毫秒）
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscriber.next(heartbeat)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        bus.unsubscribe(subscriber)
+
+
+# 全局事件总线
+_bus_instance: Optional[EventBus] = None
+
+
+def get_event_bus() -> EventBus:
+    """获取全局事件总线实例"""
+    global _bus_instance
+    if _bus_instance is None:
+        _bus_instance = EventBus()
+    return _bus_instance
+
+
+async def start_event_bus():
+    """开始轮询跨进程事件（用于应用启动时调用）"""
+    await get_event_bus().start()
+
+
+async def stop_event_bus():
+    """停止轮询并写入未发出的事件（用于应用关闭时调用）"""
+    await get_event_bus().stop()
+
+
+def publish_crawler_event(stage: str, **data):
+    """发布爬虫进度事件（stage: started / source / finished / failed 等）"""
+    get_event_bus().publish(CRAWLER_EVENT, dict(data, stage=stage))
+
+
+async def publish_saved_news(saved: List[Dict]):
+    """新闻写入器提交回调：为每篇新文章推送精简的 news 事件"""
+    bus = get_event_bus()
+    for record in saved:
+        bus.publish(NEWS_EVENT, {
+            "id": record['news_id'],
+            "title": record['title'],
+            "source": record['source'],
+            "url": record['url'],
+            "importance_score": record['importance_score'],
+            "published_at": record['published_at'],
+            "categories": list(dict.fromkeys(record['categories'])),
+        })
@@ -0,0 +1,194 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import DateTime, String, delete, func, insert, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import FEED_BROAD_SUBSCRIPTION_THRESHOLD, FEED_PRUNE_INTERVAL_HOURS, FEED_RETENTION_DAYS
+from ..db.database import AsyncSessionLocal
+from ..models.associations import news_category
+from ..models.category import Category
+from ..models.feed import FeedEntry
+from ..models.news import News
+from ..models.source import Source, UserSourceSubscription
+from ..models.subscription import UserCategorySubscription
+from .news_reader import LIST_COLUMNS, serialize_rows
+from .news_writer import dialect_insert
+from .pagination import decode_cursor, keyset_after_desc, next_cursor
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+feed_table = FeedEntry.__table__
+
+# 上次清理过期条目的时间
+_last_prune: Optional[datetime] = None
+
+
+def _retention_start(now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.now()) - timedelta(days=FEED_RETENTION_DAYS)
+
+
+def subscribed_news_condition(user_id: str):
+    """新闻属于用户订阅的分类，或来自用户订阅的信息源（按信息源名称匹配 news.source）"""
+    category_news = (
+        select(news_category.c.news_id)
+        .join(UserCategorySubscription, UserCategorySubscription.category_id == news_category.c.category_id)
+        .where(UserCategorySubscription.user_id == user_id)
+    )
+    source_names = (
+        select(Source.name)
+        .join(UserSourceSubscription, UserSourceSubscription.source_id == Source.id)
+        .where(UserSourceSubscription.user_id == user_id)
+    )
+    return or_(News.id.in_(category_news), News.source.in_(source_names))
+
+
+def _subscription_count_query(user_id: str):
+    category_count = (
+        select(func.count()).select_from(UserCategorySubscription)
+        .where(UserCategorySubscription.user_id == user_id).scalar_subquery()
+    )
+    source_count = (
+        select(func.count()).select_from(UserSourceSubscription)
+        .where(UserSourceSubscription.user_id == user_id).scalar_subquery()
+    )
+    return select(category_count + source_count)
+
+
+def _rebuild_statements(user_id: str, broad: bool):
+    """删除用户的信息流并按当前订阅重新生成保留期内的条目；订阅过宽的用户只删除"""
+    statements = [delete(feed_table).where(feed_table.c.user_id == user_id)]
+    if not broad:
+        now = datetime.now()
+        statements.append(
+            insert(feed_table).from_select(
+                ['user_id', 'news_id', 'published_at', 'created_at'],
+                select(literal(user_id, String), News.id, News.published_at, literal(now, DateTime))
+                .where(News.published_at >= _retention_start(now), subscribed_news_condition(user_id)),
+            )
+        )
+    return statements
+
+
+def rebuild_user_feed_sync(db, user_id: str):
+    """订阅变更后重建用户信息流（同步 Session / Connection，由调用方提交）"""
+    count = db.execute(_subscription_count_query(user_id)).scalar()
+    for statement in _rebuild_statements(user_id, count > FEED_BROAD_SUBSCRIPTION_THRESHOLD):
+        db.execute(statement)
+
+
+async def _subscribers(db: AsyncSession, category_names: Set[str], source_names: Set[str]
+                       ) -> Tuple[Dict[str, Set[str]], Dict[str, Set[str]]]:
+    """返回 分类名 -> 订阅用户 与 信息源名 -> 订阅用户"""
+    by_category: Dict[str, Set[str]] = defaultdict(set)
+    by_source: Dict[str, Set[str]] = defaultdict(set)
+    if category_names:
+        rows = await db.execute(
+            select(UserCategorySubscription.user_id, Category.name)
+            .join(Category, Category.id == UserCategorySubscription.category_id)
+            .where(Category.name.in_(category_names))
+        )
+        for user_id, name in rows:
+            by_category[name].add(user_id)
+    if source_names:
+        rows = await db.execute(
+            select(UserSourceSubscription.user_id, Source.name)
+            .join(Source, Source.id == UserSourceSubscription.source_id)
+            .where(Source.name.in_(source_names))
+        )
+        for user_id, name in rows:
+            by_source[name].add(user_id)
+    return by_category, by_source
+
+
+async def _broad_users(db: AsyncSession, user_ids: Set[str]) -> Set[str]:
+    counts: Dict[str, int] = defaultdict(int)
+    for model in (UserCategorySubscription, UserSourceSubscription):
+        rows = await db.execute(
+            select(model.user_id, func.count()).where(model.user_id.in_(user_ids)).group_by(model.user_id)
+        )
+        for user_id, count in rows:
+            counts[user_id] += count
+    return {user_id for user_id, count in counts.items() if count > FEED_BROAD_SUBSCRIPTION_THRESHOLD}
+
+
+async def fan_out_on_save(saved: List[Dict]):
+    """新闻写入器提交回调：把新文章写入订阅用户的信息流（写扩散）"""
+    async with AsyncSessionLocal() as db:
+        by_category, by_source = await _subscribers(
+            db,
+            {name for record in saved for name in record['categories']},
+            {record['source'] for record in saved},
+        )
+        candidates = set().union(*by_category.values(), *by_source.values())
+        if candidates:
+            broad = await _broad_users(db, candidates)
+            now = datetime.now()
+            rows = []
+            for record in saved:
+                users = set(by_source.get(record['source'], ()))
+                for name in record['categories']:
+                    users |= by_category.get(name, set())
+                rows.extend(
+                    {"user_id": user_id, "news_id": record['news_id'],
+                     "published_at": record['published_at'], "created_at": now}
+                    for user_id in users - broad
+                )
+            if rows:
+                await db.execute(dialect_insert(db)(feed_table).on_conflict_do_nothing(), rows)
+                await db.commit()
+                logger.info(f"信息流写扩散完成: {len(saved)} 篇文章，{len(rows)} 条信息流条目")
+
+    await maybe_prune_feed()
+
+
+async def prune_feed() -> int:
+    """删除超出保留期的信息流条目，返回删除条数"""
+    global _last_prune
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(delete(feed_table).where(feed_table.c.published_at < _retention_start()))
+        await db.commit()
+    _last_prune = datetime.now()
+    if result.rowcount:
+        logger.info(f"清理过期信息流条目 {result.rowcount} 条")
+    return result.rowcount
+
+
+async def maybe_prune_feed():
+    """距上次清理超过 FEED_PRUNE_INTERVAL_HOURS 时执行清理"""
+    if _last_prune is None or datetime.now() - _last_prune >= timedelta(hours=FEED_PRUNE_INTERVAL_HOURS):
+        await prune_feed()
+
+
+async def fetch_feed_page(db: AsyncSession, user_id: str, limit: int = 20,
+                          cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """个性化信息流：按 (published_at, news_id) 倒序做 keyset 分页
+
+    普通用户读取物化的信息流条目（一次索引范围扫描）；订阅过宽的用户没有物化条目，
+    直接按订阅条件查询新闻（读扩散）。cursor 格式不合法时抛出 ValueError。
+    """
+    values = decode_cursor(cursor, [datetime, str]) if cursor else None
+    broad = (await db.execute(_subscription_count_query(user_id))).scalar() > FEED_BROAD_SUBSCRIPTION_THRESHOLD
+
+    if broad:
+        sort_columns = [News.published_at, News.id]
+        stmt = select(*LIST_COLUMNS).where(
+            subscribed_news_condition(user_id), News.published_at >= _retention_start()
+        )
+    else:
+        sort_columns = [FeedEntry.published_at, FeedEntry.news_id]
+        stmt = (
+            select(*LIST_COLUMNS)
+            .join(FeedEntry, FeedEntry.news_id == News.id)
+            .where(FeedEntry.user_id == user_id)
+        )
+    if values:
+        stmt = stmt.where(keyset_after_desc(sort_columns, values))
+    stmt = stmt.order_by(*(column.desc() for column in sort_columns)).limit(limit)
+
+    rows = (await db.execute(stmt)).all()
+    cursor_out = next_cursor(rows, limit, lambda row: [row.published_at, row.id])
+    return await serialize_rows(db, rows), cursor_out
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import HISTORY_BUFFER_SIZE, HISTORY_FLUSH_INTERVAL, HISTORY_NEWS_ID_CACHE_SIZE
+from ..db.database import AsyncSessionLocal
+from ..models.history import BrowseHistory
+from ..models.news import News
+from ..models.user import User
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class HistoryBuffer:
+    """浏览历史写缓冲 (write-behind)
+
+    浏览记录先进入内存缓冲，条数达到上限或定时批量写入数据库；同一 (user_id, news_id)
+    在一次刷新周期内的重复浏览合并为一条，保留最后一次浏览时间。
+    浏览历史属于尽力而为的数据，写入失败只记录日志，不会阻塞或重试；
+    个别记录违反约束（用户或新闻已被删除）时逐步拆分批次，只丢弃出错的记录。
+    """
+
+    def __init__(self, max_size: int = HISTORY_BUFFER_SIZE, flush_interval: float = HISTORY_FLUSH_INTERVAL,
+                 cache_size: int = HISTORY_NEWS_ID_CACHE_SIZE):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        # (user_id, news_id) -> 最后浏览时间
+        self.pending: Dict[Tuple[str, str], datetime] = {}
+        # 正在写入、尚未提交的一批记录
+        self.in_flight: Dict[Tuple[str, str], datetime] = {}
+        # 已确认存在的新闻ID与用户ID (LRU)
+        self.known_news: "OrderedDict[str, None]" = OrderedDict()
+        self.known_users: "OrderedDict[str, None]" = OrderedDict()
+        self.task: Optional[asyncio.Task] = None
+        self.full_event: Optional[asyncio.Event] = None
+        self.flush_lock: Optional[asyncio.Lock] = None
+
+        # 统计信息
+        self.received = 0
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    async def start(self):
+        if self.is_running:
+            return
+        self.full_event = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"浏览历史写缓冲已启动，缓冲上限: {self.max_size}，刷新间隔: {self.flush_interval}秒")
+
+    async def stop(self):
+        """停止定时刷新并写入剩余记录"""
+        if not self.is_running:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        await self.flush()
+        logger.info("浏览历史写缓冲已停止")
+
+    async def _exists(self, db: AsyncSession, column, value: str, known: "OrderedDict[str, None]") -> bool:
+        """先查缓存，未命中再查库；只缓存存在的ID（新闻可能稍后才入库）"""
+        if value in known:
+            known.move_to_end(value)
+            return True
+        found = (await db.execute(select(column).where(column == value))).first() is not None
+        if found:
+            known[value] = None
+            if len(known) > self.cache_size:
+                known.popitem(last=False)
+        return found
+
+    async def news_exists(self, db: AsyncSession, news_id: str) -> bool:
+        return await self._exists(db, News.id, news_id, self.known_news)
+
+    async def user_exists(self, db: AsyncSession, user_id: str) -> bool:
+        return await self._exists(db, User.id, user_id, self.known_users)
+
+    async def add(self, user_id: str, news_id: str):
+        if not self.is_running:
+            await self.start()
+        self.pending[(user_id, news_id)] = datetime.now()
+        self.received += 1
+        if len(self.pending) >= self.max_size:
+            self.full_event.set()
+
+    def has_pending(self, user_id: str) -> bool:
+        """该用户是否还有未提交的记录（包括正在写入的一批）；为真时 flush() 会等到它们提交"""
+        return any(key[0] == user_id for key in self.pending) or any(key[0] == user_id for key in self.in_flight)
+
+    async def flush(self) -> int:
+        """把缓冲中的记录一次性批量写入，返回写入条数"""
+        if self.flush_lock is None:
+            self.flush_lock = asyncio.Lock()
+        async with self.flush_lock:
+            if not self.pending:
+                return 0
+            self.in_flight, self.pending = self.pending, {}
+            if self.full_event is not None:
+                self.full_event.clear()
+            rows = [
+                {"id": str(uuid.uuid4()), "user_id": user_id, "news_id": news_id, "viewed_at": viewed_at}
+                for (user_id, news_id), viewed_at in self.in_flight.items()
+            ]
+            try:
+                written = await self._insert(rows)
+            except Exception as e:
+                self.failed += len(rows)
+                logger.error(f"批量写入浏览历史失败，丢弃 {len(rows)} 条: {e}")
+                return 0
+            finally:
+                self.in_flight = {}
+            self.written += written
+            logger.debug(f"批量写入浏览历史 {written} 条")
+            return written
+
+    async def _insert(self, rows: List[Dict]) -> int:
+        """写入一批记录；违反约束时对半拆分重试，只丢弃单独写入仍失败的记录，返回写入条数"""
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(BrowseHistory), rows)
+                await db.commit()
+            return len(rows)
+        except IntegrityError as e:
+            if len(rows) == 1:
+                row = rows[0]
+                # 用户或新闻可能在校验之后被删除，不再信任缓存
+                self.known_users.pop(row["user_id"], None)
+                self.known_news.pop(row["news_id"], None)
+                self.failed += 1
+                logger.warning(f"丢弃无法写入的浏览记录 (user={row['user_id']}, news={row['news_id']}): {e.orig}")
+                return 0
+        middle = len(rows) // 2
+        return await self._insert(rows[:middle]) + await self._insert(rows[middle:])
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.full_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def get_status(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "pending": len(self.pending),
+            "in_flight": len(self.in_flight),
+            "received": self.received,
+            "written": self.written,
+            "failed": self.failed,
+            "cached_news_ids": len(self.known_news),
+            "cached_user_ids": len(self.known_users),
+        }
+
+
+# 全局缓冲实例
+_buffer_instance: Optional[HistoryBuffer] = None
+
+
+def get_history_buffer() -> HistoryBuffer:
+    """获取全局浏览历史缓冲实例"""
+    global _buffer_instance
+    if _buffer_instance is None:
+        _buffer_instance = HistoryBuffer()
+    return _buffer_instance
+
+
+async def start_history_buffer():
+    """启动浏览历史缓冲（用于应用启动时调用）"""
+    await get_history_buffer().start()
+
+
+async def stop_history_buffer():
+    """停止浏览历史缓冲并写入剩余记录（用于应用关闭时调用）"""
+    await get_history_buffer().stop()
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from ..config import INDEX_WRITER_SYNC_SECONDS
+from .leader import LeaderElector
+from .ranking import start_hot_rank_refresher, stop_hot_rank_refresher
+from .response_cache import get_response_cache
+from .stories import cluster_saved_news, get_story_clusterer, sync_story_clusters
+from .vector_index import index_saved_news, open_vector_index, sync_vector_index
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 派生索引写入者的租约名（service_leases）
+INDEX_WRITER_LEASE_NAME = "index_writer"
+# crawled_at 在提交前赋值，写入批次与各主机时钟都可能有延迟，增量同步多回看一段时间（只补齐缺失的ID）
+SYNC_OVERLAP = timedelta(minutes=10)
+
+
+class IndexWriter:
+    """派生数据（向量索引、事件簇与热度）的唯一写入者
+
+    向量索引是本地内存映射文件，各进程各自维护行号与计数，同时追加会互相覆盖行；
+    事件聚类在内存中维护簇中心与大小，多个进程各自合并会覆盖彼此的簇并重复开簇。
+    集群内只有持有 index_writer 租约的工作进程以可写方式打开索引并执行聚类，其余进程只读，随 meta.json 变化重新加载。
+    新闻可能由任意 worker 的写入器入库：写入者本进程入库的新闻在提交回调中立即处理，
+    其他进程入库的由写入者按 crawled_at 定期补齐；当选时先做一次全量对齐。
+    热度刷新任务同样只在写入者进程运行。
+    """
+
+    def __init__(self, sync_seconds: float = INDEX_WRITER_SYNC_SECONDS):
+        self.sync_seconds = sync_seconds
+        # 提交回调与定期同步互斥，避免同一批新闻被重复处理
+        self.lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+        self.synced_at: Optional[datetime] = None
+        self.elector = LeaderElector(
+            INDEX_WRITER_LEASE_NAME,
+            on_elected=self._on_elected,
+            on_demoted=self._on_demoted,
+            status_provider=self.get_status,
+        )
+
+    @property
+    def is_writer(self) -> bool:
+        return self.elector.is_leader
+
+    async def _on_elected(self, previous_status: Optional[Dict]):
+        async with self.lock:
+            open_vector_index(read_only=False)
+            # 上一任写入者可能更新过事件簇，重新从数据库加载
+            get_story_clusterer().loaded = False
+            self.synced_at = None
+        self.task = asyncio.create_task(self._run())
+        await start_hot_rank_refresher()
+
+    async def _on_demoted(self):
+        await stop_hot_rank_refresher()
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        async with self.lock:
+            open_vector_index(read_only=True)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"索引同步失败: {e}", exc_info=True)
+            await asyncio.sleep(self.sync_seconds)
+
+    async def sync(self):
+        """补齐尚未写入索引的新闻：向量首次全量对齐，之后只看最近入库的新闻；再为窗口内未聚类的新闻聚类"""
+        async with self.lock:
+            started = datetime.now()
+            since = self.synced_at - SYNC_OVERLAP if self.synced_at else None
+            await sync_vector_index(since=since)
+            clustered = await sync_story_clusters()
+            self.synced_at = started
+        if clustered:
+            # 其他进程入库的新闻在这里才归入事件簇，事件列表的缓存需要失效
+            await get_response_cache().invalidate()
+
+    async def on_saved(self, saved: List[Dict]):
+        """新闻写入器提交回调：本进程是写入者时立即写入向量并聚类（依赖向量），否则交给写入者的定期同步"""
+        if not self.is_writer:
+            return
+        async with self.lock:
+            await index_saved_news(saved)
+            await cluster_saved_news(saved)
+
+    async def start(self):
+        await self.elector.start()
+
+    async def stop(self):
+        await self.elector.stop()
+
+    def get_status(self) -> Dict:
+        return {
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+            "sync_seconds": self.sync_seconds,
+        }
+
+
+# 全局写入者实例
+_writer_instance: Optional[IndexWriter] = None
+
+
+def get_index_writer() -> IndexWriter:
+    """获取全局索引写入者实例"""
+    global _writer_instance
+    if _writer_instance is None:
+        _writer_instance = IndexWriter()
+    return _writer_instance
+
+
+async def write_saved_news(saved: List[Dict]):
+    """新闻写入器提交回调（见 IndexWriter.on_saved）"""
+    await get_index_writer().on_saved(saved)
+
+
+async def start_index_writer():
+    """参与索引写入者选主（用于 worker 进程启动时调用）"""
+    await get_index_writer().start()
+
+
+async def stop_index_writer():
+    """退出写入者并释放租约（用于应用关闭时调用）"""
+    await get_index_writer().stop()
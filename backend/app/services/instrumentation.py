@@ -0,0 +1,358 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import (
+    EVENT_LOOP_LAG_INTERVAL_SECONDS, PROFILER_SAMPLE_INTERVAL_MS,
+    SLOW_REQUEST_HISTORY_SIZE, SLOW_REQUEST_PROFILE_SECONDS,
+)
+from ..db.database import async_engine, engine
+from ..logging_setup import get_logging_status
+from .crawl_jobs import get_crawl_job_manager
+from .metrics import registry
+from .news_writer import get_news_writer
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+# 未匹配任何路由的请求统一归为一个标签，避免扫描类请求撑爆标签基数
+UNMATCHED_ROUTE = "unmatched"
+# 慢请求分析保留的事件循环调用栈采样时长（秒）
+PROFILE_WINDOW_SECONDS = 120
+PROFILE_STACK_DEPTH = 40
+PROFILE_TOP_STACKS = 10
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时（秒，按路由模板）", ("method", "route", "status"), HTTP_BUCKETS
+)
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "正在处理的 HTTP 请求数")
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "单个请求执行的 SQL 语句数", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "单个请求的数据库耗时（秒）", ("method", "route"), DB_BUCKETS
+)
+db_queries = registry.counter("db_queries_total", "SQL 语句执行次数（含后台任务）", ("engine",))
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "单条 SQL 语句耗时（秒）", ("engine",), DB_BUCKETS
+)
+event_loop_lag = registry.histogram("event_loop_lag_seconds", "事件循环调度延迟（秒）", (), LAG_BUCKETS)
+event_loop_lag_last = registry.gauge("event_loop_lag_last_seconds", "最近一次采样的事件循环调度延迟（秒）")
+news_writer_queue_depth = registry.gauge("news_writer_queue_depth", "新闻写入器队列中等待提交的文章数")
+crawl_job_running = registry.gauge("crawl_job_running", "本进程是否正在运行爬取任务")
+crawl_articles_pending = registry.gauge("crawl_articles_pending", "当前爬取任务已入队但尚未处理完的文章数")
+log_records_dropped = registry.gauge("log_records_dropped", "日志队列已满而丢弃的记录数")
+
+
+class RequestStats:
+    """单个请求内的数据库统计，经 ContextVar 传给 SQLAlchemy 事件回调"""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+# ---------- 数据库查询计时 ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _make_after_cursor_execute(engine_name: str):
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_queries.inc(engine=engine_name)
+        db_query_duration.observe(elapsed, engine=engine_name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+    return _after_cursor_execute
+
+
+def _handle_error(context):
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(sync_engine: Engine, engine_name: str):
+    """为引擎注册查询计时事件（异步引擎传入其 sync_engine）"""
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _make_after_cursor_execute(engine_name))
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def install_db_hooks():
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+
+
+# ---------- 慢请求采样分析 ----------
+
+class SlowRequestProfiler:
+    """慢请求采样分析（SLOW_REQUEST_PROFILE_SECONDS > 0 时开启）
+
+    有请求在处理时，后台线程按固定间隔采样事件循环线程的调用栈；请求耗时超过阈值时，
+    汇总其处理期间的采样，记录出现最多的调用栈。并发请求共享事件循环线程，
+    结果反映的是该请求期间事件循环在忙什么，适合定位阻塞事件循环的同步代码。
+    """
+
+    def __init__(self, threshold_seconds: float = SLOW_REQUEST_PROFILE_SECONDS,
+                 interval_ms: float = PROFILER_SAMPLE_INTERVAL_MS,
+                 history_size: int = SLOW_REQUEST_HISTORY_SIZE):
+        self.threshold = threshold_seconds
+        self.interval = interval_ms / 1000
+        self.samples: Deque[Tuple[float, str]] = deque(maxlen=max(1, int(PROFILE_WINDOW_SECONDS / self.interval)))
+        self.profiles: Deque[Dict] = deque(maxlen=history_size)
+        self.active = 0
+        self.target_thread_id: Optional[int] = None
+        self.thread: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def begin(self):
+        self.active += 1
+        if self.thread is None:
+            self.target_thread_id = threading.get_ident()
+            self.thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self.thread.start()
+        self._wakeup.set()
+
+    def discard(self):
+        """不再跟踪该请求（如长连接推送），只减少活跃计数"""
+        self.active -= 1
+
+    def end(self, started: float, method: str, route: str, status: int, duration: float):
+        self.active -= 1
+        if duration < self.threshold:
+            return
+        stacks = Counter(stack for at, stack in list(self.samples) if at >= started)
+        profile = {
+            "time": datetime.now().isoformat(),
+            "method": method,
+            "route": route,
+            "status": status,
+            "duration": round(duration, 4),
+            "samples": sum(stacks.values()),
+            "top_stacks": [{"stack": stack, "samples": count} for stack, count in stacks.most_common(PROFILE_TOP_STACKS)],
+        }
+        self.profiles.append(profile)
+        top = profile["top_stacks"][0]["stack"].rsplit(";", 1)[-1] if profile["top_stacks"] else "无采样"
+        logger.warning("慢请求 %s %s 耗时 %.3f秒，采样 %d 次，最常见的栈顶: %s",
+                       method, route, duration, profile["samples"], top)
+
+    def _run(self):
+        while True:
+            if self.active <= 0:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is not None:
+                self.samples.append((time.perf_counter(), self._collapse(frame)))
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        """折叠调用栈：外层在前，"模块:函数:行号" 以分号连接"""
+        parts: List[str] = []
+        while frame is not None and len(parts) < PROFILE_STACK_DEPTH:
+            code = frame.f_code
+            parts.append(f"{frame.f_globals.get('__name__', code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ";".join(reversed(parts))
+
+    def get_profiles(self) -> List[Dict]:
+        return list(reversed(self.profiles))
+
+
+# ---------- 请求计时中间件 ----------
+
+def _is_event_stream(message) -> bool:
+    for name, value in message.get("headers", ()):
+        if name.lower() == b"content-type":
+            return value.split(b";", 1)[0].strip().lower() == b"text/event-stream"
+    return False
+
+
+class RequestMetricsMiddleware:
+    """ASGI 中间件：按路由模板记录请求耗时、状态码、数据库语句数与耗时
+
+    text/event-stream 等长连接推送在响应开始时即退出统计：不计入进行中请求数与耗时分布，
+    也不让慢请求采样一直保持开启。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.route_templates: Dict = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiler = get_slow_request_profiler()
+        status = 500
+        streaming = False
+
+        async def send_with_status(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if _is_event_stream(message):
+                    streaming = True
+                    http_requests_in_flight.dec()
+                    if profiler.enabled:
+                        profiler.discard()
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        if profiler.enabled:
+            profiler.begin()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_stats.reset(token)
+            if not streaming:
+                duration = time.perf_counter() - started
+                http_requests_in_flight.dec()
+                method = scope["method"]
+                route = self._route_template(scope)
+                http_request_duration.observe(duration, method=method, route=route, status=str(status))
+                http_request_db_queries.observe(stats.queries, method=method, route=route)
+                http_request_db_seconds.observe(stats.db_seconds, method=method, route=route)
+                if profiler.enabled:
+                    profiler.end(started, method, route, status, duration)
+
+    def _route_template(self, scope) -> str:
+        """路由匹配后 scope 中带有 endpoint，据此查出路由模板（如 /api/news/{news_id}）"""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self.route_templates.get(endpoint)
+        if template is None:
+            template = next(
+                (route.path for route in scope["app"].routes if getattr(route, "endpoint", None) is endpoint),
+                UNMATCHED_ROUTE,
+            )
+            self.route_templates[endpoint] = template
+        return template
+
+
+# ---------- 事件循环延迟 ----------
+
+class EventLoopLagMonitor:
+    """定时休眠并测量实际唤醒时间与预期的差值，反映事件循环被同步代码阻塞的程度"""
+
+    def __init__(self, interval: float = EVENT_LOOP_LAG_INTERVAL_SECONDS):
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+        self.max_lag = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    async def start(self):
+        if self.is_running:
+            return
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"事件循环延迟监控已启动，采样间隔: {self.interval}秒")
+
+    async def stop(self):
+        if not self.is_running:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            event_loop_lag.observe(lag)
+            event_loop_lag_last.set(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+
+def _collect_crawler_gauges():
+    writer = get_news_writer()
+    news_writer_queue_depth.set(writer.queue.qsize() if writer.queue is not None else 0)
+    current = get_crawl_job_manager().current
+    running = current is not None and not current.finished
+    crawl_job_running.set(1 if running else 0)
+    if running:
+        progress = current.progress
+        crawl_articles_pending.set(
+            max(0, progress.articles_queued - progress.articles_saved - progress.articles_failed)
+        )
+    else:
+        crawl_articles_pending.set(0)
+    log_records_dropped.set(get_logging_status()["dropped"])
+
+
+registry.add_collector(_collect_crawler_gauges)
+
+
+# 全局实例
+_profiler_instance: Optional[SlowRequestProfiler] = None
+_lag_monitor_instance: Optional[EventLoopLagMonitor] = None
+
+
+def get_slow_request_profiler() -> SlowRequestProfiler:
+    """获取全局慢请求分析器实例"""
+    global _profiler_instance
+    if _profiler_instance is None:
+        _profiler_instance = SlowRequestProfiler()
+    return _profiler_instance
+
+
+def get_loop_lag_monitor() -> EventLoopLagMonitor:
+    """获取全局事件循环延迟监控实例"""
+    global _lag_monitor_instance
+    if _lag_monitor_instance is None:
+        _lag_monitor_instance = EventLoopLagMonitor()
+    return _lag_monitor_instance
+
+
+async def start_instrumentation():
+    """注册数据库计时事件并启动事件循环延迟监控（用于应用启动时调用）"""
+    install_db_hooks()
+    await get_loop_lag_monitor().start()
+
+
+async def stop_instrumentation():
+    """停止事件循环延迟监控（用于应用关闭时调用）"""
+    await get_loop_lag_monitor().stop()
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+
+from ..config import SCHEDULER_HEARTBEAT_SECONDS, SCHEDULER_LEASE_TTL_SECONDS
+from ..db.database import AsyncSessionLocal
+from ..models.lease import ServiceLease
+from .news_writer import dialect_insert
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def worker_id() -> str:
+    """当前工作进程的唯一标识 (主机名:进程号:随机后缀)"""
+    return _WORKER_ID
+
+
+def _new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+_WORKER_ID = _new_worker_id()
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _dumps(status: Dict) -> str:
+    return json.dumps(status, ensure_ascii=False)
+
+
+async def acquire_lease(name: str, holder: str, ttl: timedelta, now: Optional[datetime] = None,
+                        status: Optional[Dict] = None) -> Tuple[bool, Optional[Dict]]:
+    """租约空闲或过期时抢占，返回 (是否成功, 抢占前租约上记录的状态)
+
+    用条件 UPDATE 抢占已有租约、ON CONFLICT DO NOTHING 创建新租约，并发竞争时只有一个持有者能成功。
+    """
+    now = now or datetime.now()
+    async with AsyncSessionLocal() as db:
+        previous = (await db.execute(
+            select(ServiceLease.status).where(ServiceLease.name == name)
+        )).scalar_one_or_none()
+        values = dict(holder=holder, acquired_at=now, heartbeat_at=now, expires_at=now + ttl)
+        if status is not None:
+            values["status"] = _dumps(status)
+        result = await db.execute(
+            update(ServiceLease)
+            .where(ServiceLease.name == name,
+                   or_(ServiceLease.holder.is_(None), ServiceLease.expires_at < now))
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            result = await db.execute(
+                dialect_insert(db)(ServiceLease)
+                .values(name=name, **values)
+                .on_conflict_do_nothing(index_elements=['name'])
+            )
+        await db.commit()
+    return result.rowcount == 1, json.loads(previous) if previous else None
+
+
+async def renew_lease(name: str, holder: str, ttl: timedelta, now: Optional[datetime] = None,
+                      status: Optional[Dict] = None) -> bool:
+    """续约并更新状态；租约已不属于 holder 时返回 False"""
+    now = now or datetime.now()
+    values = dict(heartbeat_at=now, expires_at=now + ttl)
+    if status is not None:
+        values["status"] = _dumps(status)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(ServiceLease)
+            .where(ServiceLease.name == name, ServiceLease.holder == holder)
+            .values(**values)
+        )
+        await db.commit()
+    return result.rowcount == 1
+
+
+async def release_lease(name: str, holder: Optional[str] = None, status: Optional[Dict] = None) -> bool:
+    """释放租约；holder 为空时无论持有者是谁都强制释放（用于撤销）"""
+    values = dict(holder=None, expires_at=datetime.now())
+    if status is not None:
+        values["status"] = _dumps(status)
+    stmt = update(ServiceLease).where(ServiceLease.name == name, ServiceLease.holder.is_not(None))
+    if holder is not None:
+        stmt = stmt.where(ServiceLease.holder == holder)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(stmt.values(**values))
+        await db.commit()
+    return result.rowcount == 1
+
+
+async def read_lease(name: str) -> Optional[Dict]:
+    """读取租约，返回 {holder, alive, acquired_at, heartbeat_at, expires_at, status}"""
+    async with AsyncSessionLocal() as db:
+        lease = (await db.execute(select(ServiceLease).where(ServiceLease.name == name))).scalar_one_or_none()
+    if lease is None:
+        return None
+    return {
+        "holder": lease.holder,
+        "alive": lease.holder is not None and lease.expires_at >= datetime.now(),
+        "acquired_at": lease.acquired_at,
+        "heartbeat_at": lease.heartbeat_at,
+        "expires_at": lease.expires_at,
+        "status": json.loads(lease.status) if lease.status else None,
+    }
+
+
+class LeaderElector:
+    """基于数据库租约的选主
+
+    每个工作进程定期竞选同名租约：租约空闲或已过期时用条件 UPDATE 抢占（同一时刻只有一个进程能成功），
+    持有者每隔 heartbeat_seconds 续约并上报状态。续约失败（被接管）或数据库不可用且本地租期已过时立即退位，
+    保证不会有两个进程同时认为自己是主节点；持有者正常退出时主动释放租约，其他进程在下一次心跳即可接管。
+    """
+
+    def __init__(self, name: str,
+                 on_elected: Callable[[Optional[Dict]], Awaitable[None]],
+                 on_demoted: Callable[[], Awaitable[None]],
+                 status_provider: Callable[[], Dict],
+                 ttl_seconds: float = SCHEDULER_LEASE_TTL_SECONDS,
+                 heartbeat_seconds: float = SCHEDULER_HEARTBEAT_SECONDS):
+        self.name = name
+        self.worker_id = worker_id()
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.status_provider = status_provider
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.is_leader = False
+        self.lease_expires_at: Optional[datetime] = None
+        self.acquired_at: Optional[datetime] = None
+        self.heartbeat_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.task is not None and not self.task.done():
+            return
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"选主任务已启动: {self.name}，工作进程: {self.worker_id}")
+
+    async def stop(self):
+        """停止竞选；若当前是主节点则先退位再释放租约"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.is_leader:
+            await self._demote("工作进程退出")
+            try:
+                await self._release()
+            except Exception as e:
+                logger.warning(f"释放租约失败，将在过期后由其他进程接管: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"租约心跳失败: {e}", exc_info=True)
+                # 无法确认租约时，本地租期一过就必须退位，否则可能与新的主节点同时运行
+                if self.is_leader and datetime.now() >= self.lease_expires_at:
+                    await self._demote("无法续约且租约已过期")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    async def _tick(self):
+        now = datetime.now()
+        if self.is_leader:
+            if await self._renew(now):
+                self.heartbeat_at = now
+                self.lease_expires_at = now + self.ttl
+            else:
+                await self._demote("租约已被其他工作进程接管")
+            return
+        acquired, previous_status = await self._try_acquire(now)
+        if acquired:
+            self.is_leader = True
+            self.acquired_at = self.heartbeat_at = now
+            self.lease_expires_at = now + self.ttl
+            logger.info(f"已成为主节点: {self.name}，工作进程: {self.worker_id}")
+            await self.on_elected(previous_status)
+
+    async def _try_acquire(self, now: datetime):
+        return await acquire_lease(self.name, self.worker_id, self.ttl, now)
+
+    async def _renew(self, now: datetime) -> bool:
+        return await renew_lease(self.name, self.worker_id, self.ttl, now, self.status_provider())
+
+    async def _release(self):
+        await release_lease(self.name, self.worker_id, self.status_provider())
+        logger.info(f"已释放租约: {self.name}")
+
+    async def _demote(self, reason: str):
+        self.is_leader = False
+        self.acquired_at = self.heartbeat_at = None
+        self.lease_expires_at = None
+        logger.warning(f"退出主节点: {self.name}，原因: {reason}")
+        await self.on_demoted()
+
+    async def get_leader_status(self) -> Dict:
+        """返回主节点上报的任务状态与租约信息，任意工作进程均可调用"""
+        if self.is_leader:
+            return {
+                "status": self.status_provider(),
+                "leader": {
+                    "worker_id": self.worker_id,
+                    "leader_id": self.worker_id,
+                    "is_leader": True,
+                    "acquired_at": _isoformat(self.acquired_at),
+                    "heartbeat_at": _isoformat(self.heartbeat_at),
+                    "expires_at": _isoformat(self.lease_expires_at),
+                },
+            }
+
+        lease = await read_lease(self.name)
+        alive = lease is not None and lease["alive"]
+        status = (lease and lease["status"]) or self.status_provider()
+        if not alive:
+            status["running"] = False
+        return {
+            "status": status,
+            "leader": {
+                "worker_id": self.worker_id,
+                "leader_id": lease["holder"] if alive else None,
+                "is_leader": False,
+                "acquired_at": _isoformat(lease["acquired_at"]) if alive else None,
+                "heartbeat_at": _isoformat(lease["heartbeat_at"]) if lease is not None else None,
+                "expires_at": _isoformat(lease["expires_at"]) if alive else None,
+            },
+        }
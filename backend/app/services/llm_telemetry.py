@@ -0,0 +1,136 @@
+import logging
+from typing import Any, Dict, Optional
+
+from .metrics import registry
+from .crawl_ledger import record_llm_call
+from ..config import LLM_MODEL_PRICES
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 调用结果分类
+OUTCOME_SUCCESS = "success"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_RATE_LIMITED = "rate_limited"
+OUTCOME_API_ERROR = "api_error"
+OUTCOME_ERROR = "error"
+
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 120.0)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds", "LLM 单次调用延迟（秒）", ("task", "model", "outcome"), LLM_BUCKETS
+)
+llm_requests = registry.counter(
+    "llm_requests_total", "LLM 调用次数（按结果分类）", ("task", "model", "outcome")
+)
+llm_prompt_tokens = registry.histogram(
+    "llm_prompt_tokens", "单次调用的 prompt token 数", ("task", "model"), TOKEN_BUCKETS
+)
+llm_completion_tokens = registry.histogram(
+    "llm_completion_tokens", "单次调用的 completion token 数", ("task", "model"), TOKEN_BUCKETS
+)
+llm_cost = registry.counter(
+    "llm_estimated_cost_usd_total", "按配置价格估算的调用成本（美元）", ("task", "model")
+)
+llm_task_calls = registry.counter(
+    "llm_task_calls_total", "按任务统计的逻辑调用次数（含备用模型重试只记一次）", ("task",)
+)
+llm_model_fallbacks = registry.counter(
+    "llm_model_fallbacks_total", "切换到备用模型的次数", ("task", "from_model")
+)
+llm_fallback_defaults = registry.counter(
+    "llm_fallback_defaults_total", "LLM 无可用结果而使用默认值的次数", ("task",)
+)
+llm_requests_in_flight = registry.gauge(
+    "llm_requests_in_flight", "正在等待响应的 LLM 调用数", ("task",)
+)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """根据 LLM_MODEL_PRICES（美元 / 百万 token）估算单次调用成本"""
+    if model.endswith(":free"):
+        return 0.0
+    price = LLM_MODEL_PRICES.get(model)
+    if not price:
+        return 0.0
+    return (prompt_tokens * float(price.get("prompt", 0)) +
+            completion_tokens * float(price.get("completion", 0))) / 1_000_000
+
+
+def record_call(task: str, model: str, outcome: str, latency: float, usage: Any = None):
+    """记录一次对具体模型的 API 调用"""
+    llm_request_duration.observe(latency, task=task, model=model, outcome=outcome)
+    llm_requests.inc(task=task, model=model, outcome=outcome)
+    if usage is None:
+        record_llm_call(task, latency)
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    # 计入当前正在处理的文章的爬取记录
+    record_llm_call(task, latency, prompt_tokens, completion_tokens)
+    llm_prompt_tokens.observe(prompt_tokens, task=task, model=model)
+    llm_completion_tokens.observe(completion_tokens, task=task, model=model)
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+    if cost:
+        llm_cost.inc(cost, task=task, model=model)
+
+
+def record_task_call(task: str):
+    llm_task_calls.inc(task=task)
+
+
+def record_model_fallback(task: str, from_model: str):
+    llm_model_fallbacks.inc(task=task, from_model=from_model)
+
+
+def record_fallback_default(task: str):
+    """LLM 未返回可用结果、业务逻辑退回默认值时调用"""
+    llm_fallback_defaults.inc(task=task)
+
+
+def get_llm_stats(model_health: Optional[list] = None) -> Dict[str, Any]:
+    """汇总 LLM 调用统计，供 API 端点返回 JSON"""
+    by_model: Dict[str, Dict[str, Any]] = {}
+    for (task, model, outcome), stats in llm_request_duration.snapshot().items():
+        entry = by_model.setdefault(f"{task}|{model}", {
+            "task": task,
+            "model": model,
+            "outcomes": {},
+        })
+        entry["outcomes"][outcome] = stats
+
+    for (task, model), stats in llm_prompt_tokens.snapshot().items():
+        entry = by_model.get(f"{task}|{model}")
+        if entry is not None:
+            entry["prompt_tokens"] = {"total": stats["sum"], "avg": stats["avg"], "p95": stats["p95"]}
+    for (task, model), stats in llm_completion_tokens.snapshot().items():
+        entry = by_model.get(f"{task}|{model}")
+        if entry is not None:
+            entry["completion_tokens"] = {"total": stats["sum"], "avg": stats["avg"], "p95": stats["p95"]}
+    for (task, model), value in llm_cost.items():
+        entry = by_model.get(f"{task}|{model}")
+        if entry is not None:
+            entry["estimated_cost_usd"] = round(value, 6)
+
+    tasks: Dict[str, Dict[str, Any]] = {}
+    for (task,), calls in llm_task_calls.items():
+        defaults = llm_fallback_defaults.get(task=task)
+        tasks[task] = {
+            "calls": int(calls),
+            "fallback_defaults": int(defaults),
+            "fallback_default_rate": round(defaults / calls, 4) if calls else 0.0,
+            "model_fallbacks": int(sum(v for (t, _), v in llm_model_fallbacks.items() if t == task)),
+        }
+
+    return {
+        "tasks": tasks,
+        "models": list(by_model.values()),
+        "total_estimated_cost_usd": round(sum(v for _, v in llm_cost.items()), 6),
+        "model_health": model_health or [],
+    }
+
+
+def render_llm_metrics() -> str:
+    """以 Prometheus 文本格式输出 LLM 指标"""
+    return registry.render(prefix="llm_")
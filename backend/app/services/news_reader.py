@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.news import News
+from ..models.category import Category
+from ..models.associations import news_category
+from .pagination import decode_cursor, keyset_after_desc, next_cursor
+
+# 列表排序键：importance_score DESC, published_at DESC, id DESC（id 保证顺序唯一）
+SORT_COLUMNS = (News.importance_score, News.published_at, News.id)
+# 热度排序键：hot_score DESC, published_at DESC, id DESC（hot_score 由 services/ranking.py 预先计算）
+HOT_SORT_COLUMNS = (News.hot_score, News.published_at, News.id)
+
+SORTS = {"importance": SORT_COLUMNS, "hot": HOT_SORT_COLUMNS}
+
+# 列表页只需要这些列，不加载 content / raw_html
+LIST_COLUMNS = (
+    News.id,
+    News.title,
+    News.summary,
+    News.source,
+    News.url,
+    News.published_at,
+    News.importance_score,
+)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+async def load_categories(db: AsyncSession, news_ids: List[str]) -> Dict[str, List[Dict]]:
+    """一次查询取回一批新闻的分类，返回 news_id -> [{id, name}]"""
+    if not news_ids:
+        return {}
+    rows = (await db.execute(
+        select(news_category.c.news_id, Category.id, Category.name)
+        .join(Category, Category.id == news_category.c.category_id)
+        .where(news_category.c.news_id.in_(news_ids))
+    )).all()
+    categories: Dict[str, List[Dict]] = {news_id: [] for news_id in news_ids}
+    for news_id, category_id, name in rows:
+        categories[news_id].append({"id": category_id, "name": name})
+    return categories
+
+
+async def serialize_rows(db: AsyncSession, rows) -> List[Dict]:
+    """把列表列的查询结果直接转换为可 JSON 序列化的字典（与 NewsResponse 字段一致）"""
+    categories = await load_categories(db, [row.id for row in rows])
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "summary": row.summary,
+            "source": row.source,
+            "url": row.url,
+            "published_at": _isoformat(row.published_at),
+            "importance_score": row.importance_score,
+            "categories": categories.get(row.id, []),
+        }
+        for row in rows
+    ]
+
+
+def build_list_query(category: Optional[str] = None, min_score: Optional[float] = 0,
+                     days: Optional[int] = 7):
+    """构建新闻列表的筛选查询（只选列表列）"""
+    stmt = select(*LIST_COLUMNS)
+
+    # 应用分类过滤 (走 news_category(category_id, news_id) 索引)
+    if category:
+        stmt = (
+            stmt.join(news_category, news_category.c.news_id == News.id)
+            .join(Category, Category.id == news_category.c.category_id)
+            .where(Category.name == category)
+        )
+
+    # 应用评分过滤
+    if min_score and min_score > 0:
+        stmt = stmt.where(News.importance_score >= min_score)
+
+    # 应用时间范围过滤
+    if days:
+        time_threshold = datetime.now() - timedelta(days=days)
+        stmt = stmt.where(News.published_at >= time_threshold)
+
+    return stmt
+
+
+async def fetch_news_page(db: AsyncSession, category: Optional[str] = None, min_score: Optional[float] = 0,
+                    days: Optional[int] = 7, skip: int = 0, limit: int = 20,
+                    cursor: Optional[str] = None, sort: str = "importance") -> Tuple[List[Dict], Optional[str]]:
+    """新闻列表读路径：列投影 + 批量加载分类，查询量只与页大小有关
+
+    sort 为 importance（默认）或 hot（按随时间衰减的热度）。
+    传入 cursor 时按所选排序键 (score, published_at, id) 做 keyset 分页，忽略 skip；
+    否则沿用 offset 分页以兼容旧客户端。返回 (当前页, 下一页游标)。
+    cursor 格式不合法时抛出 ValueError。
+    """
+    sort_columns = SORTS[sort]
+    stmt = build_list_query(category, min_score, days)
+    if sort_columns[0] is not News.importance_score:
+        stmt = stmt.add_columns(sort_columns[0])
+    if cursor:
+        stmt = stmt.where(keyset_after_desc(list(sort_columns), decode_cursor(cursor, [float, datetime, str])))
+    elif skip:
+        stmt = stmt.offset(skip)
+    stmt = stmt.order_by(*(column.desc() for column in sort_columns)).limit(limit)
+
+    rows = (await db.execute(stmt)).all()
+    score_key = sort_columns[0].key
+    cursor_out = next_cursor(rows, limit, lambda row: [getattr(row, score_key), row.published_at, row.id])
+    return await serialize_rows(db, rows), cursor_out
@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import NEWS_WRITER_BATCH_SIZE, NEWS_WRITER_MAX_WAIT
+from ..db.database import AsyncSessionLocal
+from ..models.associations import news_category
+from ..models.category import Category
+from ..models.news import News
+from .ranking import hot_score
+from .search import index_news
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+news_table = News.__table__
+categories_table = Category.__table__
+
+_STOP = object()
+
+
+def dialect_insert(db: AsyncSession):
+    """按数据库方言返回支持 ON CONFLICT 的 insert 构造函数"""
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        return sqlite_insert
+    if dialect == "postgresql":
+        return pg_insert
+    raise ValueError(f"批量写入器不支持的数据库: {dialect}")
+
+
+class NewsWriter:
+    """新闻批量写入器
+
+    爬虫把准备好的新闻放入队列，由唯一的后台任务按批次（数量或等待时间触发）
+    在一个事务里写入：URL 冲突用 ON CONFLICT DO NOTHING 处理，分类名通过内存缓存解析为 ID。
+    """
+
+    def __init__(self, batch_size: int = NEWS_WRITER_BATCH_SIZE, max_wait: float = NEWS_WRITER_MAX_WAIT):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue: Optional[asyncio.Queue] = None
+        # 入队后置位，批次内等待下一条新闻时使用（见 _next_item）
+        self.item_ready: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        # 并发的首次 submit 只能启动一个写入任务
+        self.start_lock: Optional[asyncio.Lock] = None
+        # 分类名 -> 分类ID
+        self.category_ids: Dict[str, str] = {}
+        self.cache_warmed = False
+        # 提交回调：每批有新文章入库后调用，参数为新文章列表（含 news_id，不含 raw_html）
+        self.listeners: List[Callable[[List[Dict]], Awaitable[None]]] = []
+
+        # 统计信息
+        self.batches = 0
+        self.saved = 0
+        self.duplicates = 0
+        self.failed = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    async def start(self):
+        """预热分类缓存并启动后台写入任务"""
+        if self.start_lock is None:
+            self.start_lock = asyncio.Lock()
+        async with self.start_lock:
+            if self.is_running:
+                return
+            if not self.cache_warmed:
+                await self.warm_category_cache()
+            self.queue = asyncio.Queue()
+            self.item_ready = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+        logger.info(f"新闻批量写入器已启动，批大小: {self.batch_size}，最长等待: {self.max_wait}秒")
+
+    async def stop(self):
+        """写完队列中剩余的新闻后停止"""
+        if not self.is_running:
+            return
+        self._put(_STOP)
+        await self.task
+        self.task = None
+        logger.info("新闻批量写入器已停止")
+
+    def add_listener(self, listener: Callable[[List[Dict]], Awaitable[None]]):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    async def warm_category_cache(self):
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(select(Category.name, Category.id))).all()
+        self.category_ids = {name: category_id for name, category_id in rows}
+        self.cache_warmed = True
+        logger.info(f"分类缓存已预热，共 {len(self.category_ids)} 个分类")
+
+    async def submit(self, news_data: Dict) -> Dict:
+        """提交一条新闻，等待其所在批次提交后返回保存结果"""
+        if not self.is_running:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._put((news_data, future))
+        return await future
+
+    def _put(self, item):
+        self.queue.put_nowait(item)
+        self.item_ready.set()
+
+    async def _next_item(self, deadline: float):
+        """取队列中的下一项，到 deadline 仍为空时返回 None
+
+        不用 wait_for(queue.get())：超时与入队同时发生时，取出的项会随被取消的 get 一起丢失，
+        提交方将永远等不到结果。这里只等待入队信号，取出始终是不会被取消的 get_nowait。
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                return self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                return None
+            self.item_ready.clear()
+            try:
+                await asyncio.wait_for(self.item_ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                item = await self._next_item(deadline)
+                if item is None:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch: List[Tuple[Dict, asyncio.Future]]):
+        records = [news_data for news_data, _ in batch]
+        try:
+            results = await self._commit(records)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"保存新闻时出错: {e}")
+                results = [{"success": False, "error": str(e)}]
+            else:
+                # 批次失败时逐条重试，避免一条坏数据拖垮整批
+                logger.warning(f"批量写入失败，改为逐条写入: {e}")
+                results = []
+                for record in records:
+                    try:
+                        results.extend(await self._commit([record]))
+                    except Exception as item_error:
+                        logger.error(f"保存新闻时出错: {record.get('url')}: {item_error}")
+                        results.append({"success": False, "error": str(item_error)})
+
+        self.batches += 1
+        for (news_data, future), result in zip(batch, results):
+            if result["success"]:
+                self.saved += 1
+            elif result.get("news_id"):
+                self.duplicates += 1
+            else:
+                self.failed += 1
+            if not future.done():
+                future.set_result(result)
+
+        saved = [
+            dict({k: v for k, v in news_data.items() if k != 'raw_html'}, news_id=result["news_id"])
+            for news_data, result in zip(records, results) if result["success"]
+        ]
+        if saved:
+            await self._notify(saved)
+
+    async def _notify(self, saved: List[Dict]):
+        for listener in self.listeners:
+            try:
+                await listener(saved)
+            except Exception as e:
+                logger.error(f"新闻入库回调 {getattr(listener, '__name__', listener)} 执行失败: {e}")
+
+    async def _commit(self, records: List[Dict]) -> List[Dict]:
+        """在一个事务中写入一批新闻，返回与输入一一对应的结果"""
+        new_categories: Dict[str, str] = {}
+        async with AsyncSessionLocal() as db:
+            insert = dialect_insert(db)
+            names = {name for record in records for name in record['categories']}
+            category_ids = await self._resolve_categories(db, insert, names, new_categories)
+
+            results = []
+            links = []
+            for record in records:
+                news_id = str(uuid.uuid4())
+                inserted_id = (await db.execute(
+                    insert(news_table)
+                    .values(
+                        id=news_id,
+                        title=record['title'],
+                        summary=record['summary'],
+                        content=record['content'],
+                        source=record['source'],
+                        url=record['url'],
+                        published_at=record['published_at'],
+                        crawled_at=datetime.now(),
+                        importance_score=record['importance_score'],
+                        hot_score=hot_score(record['importance_score'], record['published_at']),
+                        raw_html=record.get('raw_html', ''),
+                    )
+                    .on_conflict_do_nothing(index_elements=['url'])
+                    .returning(news_table.c.id)
+                )).scalar_one_or_none()
+
+                if inserted_id is None:
+                    existing_id = (await db.execute(
+                        select(News.id).where(News.url == record['url'])
+                    )).scalar_one_or_none()
+                    logger.info(f"新闻URL已存在: {record['url']}")
+                    results.append({"success": False, "error": "URL已存在", "news_id": existing_id})
+                    continue
+
+                links.extend(
+                    {"news_id": news_id, "category_id": category_ids[name]}
+                    for name in dict.fromkeys(record['categories'])
+                )
+                await index_news(db, news_id, record['title'], record['summary'], record['content'])
+                results.append({"success": True, "news_id": news_id})
+
+            if links:
+                await db.execute(insert(news_category).on_conflict_do_nothing(), links)
+            await db.commit()
+
+        # 事务提交后才把新分类放入缓存，回滚时不会留下不存在的ID
+        self.category_ids.update(new_categories)
+        saved = sum(1 for result in results if result["success"])
+        logger.info(f"批量保存新闻完成: 提交 {len(records)} 条，新增 {saved} 条")
+        return results
+
+    async def _resolve_categories(self, db: AsyncSession, insert, names, new_categories: Dict[str, str]) -> Dict[str, str]:
+        """分类名 -> ID，缓存未命中时 upsert 后再查询"""
+        missing = [name for name in names if name not in self.category_ids]
+        if missing:
+            await db.execute(
+                insert(categories_table).on_conflict_do_nothing(index_elements=['name']),
+                [{"id": str(uuid.uuid4()), "name": name} for name in missing],
+            )
+            rows = (await db.execute(
+                select(Category.name, Category.id).where(Category.name.in_(missing))
+            )).all()
+            new_categories.update({name: category_id for name, category_id in rows})
+        return {name: self.category_ids.get(name) or new_categories[name] for name in names}
+
+    def get_status(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "queue_size": self.queue.qsize() if self.queue else 0,
+            "batches": self.batches,
+            "saved": self.saved,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "cached_categories": len(self.category_ids),
+        }
+
+
+# 全局写入器实例
+_writer_instance: Optional[NewsWriter] = None
+
+
+def get_news_writer() -> NewsWriter:
+    """获取全局新闻写入器实例"""
+    global _writer_instance
+    if _writer_instance is None:
+        _writer_instance = NewsWriter()
+    return _writer_instance
+
+
+async def start_news_writer():
+    """启动新闻写入器（用于应用启动时调用）"""
+    await get_news_writer().start()
+
+
+async def stop_news_writer():
+    """停止新闻写入器并写完剩余数据（用于应用关闭时调用）"""
+    await get_news_writer().stop()
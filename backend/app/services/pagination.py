@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import and_, or_
+
+# 下一页游标通过响应头返回，列表响应体保持为数组以兼容旧客户端
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """把排序键编码为不透明游标 (base64url JSON)"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _cursor_value(value: Any, expected: type) -> Any:
+    """按排序键的类型校验游标中的一个值，类型不符时抛出 ValueError"""
+    if expected is datetime:
+        if not isinstance(value, str):
+            raise ValueError("cursor value is not a datetime string")
+        return datetime.fromisoformat(value)
+    if expected is float:
+        # JSON 中整数值的浮点分数可能解析为 int；bool 是 int 的子类，需要排除
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("cursor value is not a number")
+        return float(value)
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError(f"cursor value is not {expected.__name__}")
+    return value
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """解析游标并按 types（每个排序键的类型：float/int/str/datetime）校验，格式不合法时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor payload has unexpected shape")
+        return [_cursor_value(value, expected) for value, expected in zip(values, types)]
+    except (ValueError, TypeError, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"无效的分页游标: {e}")
+
+
+def keyset_after_desc(columns: List[Any], values: List[Any]):
+    """生成 (c1, c2, ...) < (v1, v2, ...) 的条件，用于全部 DESC 排序的下一页
+
+    展开为 OR 形式并带上首列的范围条件，使 SQLite/Postgres 都能用复合索引做范围扫描
+    """
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, column < value))
+    return and_(columns[0] <= values[0], or_(*clauses))
+
+
+def next_cursor(rows: List[Any], limit: int, key) -> Optional[str]:
+    """取满一页时用最后一行的排序键生成下一页游标，否则说明没有更多数据"""
+    if len(rows) < limit or not rows:
+        return None
+    return encode_cursor(key(rows[-1]))
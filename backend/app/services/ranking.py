@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, select, update
+
+from ..config import HOT_RANK_HALF_LIFE_HOURS, HOT_RANK_HORIZON_DAYS, HOT_RANK_REFRESH_MINUTES
+from ..db.database import AsyncSessionLocal
+from ..models.news import News
+from .response_cache import get_response_cache
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH = 1000
+# 热度键的时间原点
+HOT_EPOCH = datetime(2000, 1, 1)
+
+
+def hot_score(importance: float, published_at: datetime, now: Optional[datetime] = None) -> float:
+    """热度排序键 = log2(重要性) + (发布时间 - HOT_EPOCH) / 半衰期
+
+    任意时刻按 重要性 × 2^(-发布时长 / 半衰期) 排序的结果都与按该键排序一致，而键本身不随时间变化：
+    已入库新闻之间的顺序不会因刷新改变，keyset 游标始终有效。时间范围内的键恒为正；
+    超出时间范围或重要性不为正的新闻固定为 0，排在最后（发布时间晚于 now 的按 now 计）。
+    """
+    now = now or datetime.now()
+    published_at = min(published_at, now)
+    if not importance or importance <= 0 or published_at < now - timedelta(days=HOT_RANK_HORIZON_DAYS):
+        return 0.0
+    return round(math.log2(importance) + (published_at - HOT_EPOCH).total_seconds() / 3600 / HOT_RANK_HALF_LIFE_HOURS, 6)
+
+
+async def expire_hot_scores(now: Optional[datetime] = None) -> int:
+    """把刚超出时间范围的新闻热度归零（键不随时间变化，只有越过时间范围的行需要更新）"""
+    now = now or datetime.now()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(News.__table__)
+            .where(News.__table__.c.published_at < now - timedelta(days=HOT_RANK_HORIZON_DAYS),
+                   News.__table__.c.hot_score != 0)
+            .values(hot_score=0)
+        )
+        await db.commit()
+    return result.rowcount
+
+
+async def refresh_hot_scores(now: Optional[datetime] = None) -> int:
+    """重新计算时间范围内新闻的热度键并归零已超出范围的新闻（启动时执行一次，用于半衰期配置变化或旧数据）"""
+    now = now or datetime.now()
+    statement = (
+        update(News.__table__)
+        .where(News.__table__.c.id == bindparam("news_id"))
+        .values(hot_score=bindparam("hot_score"))
+    )
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(News.id, News.importance_score, News.published_at)
+            .where(News.published_at >= now - timedelta(days=HOT_RANK_HORIZON_DAYS))
+        )).all()
+        params = [
+            {"news_id": row.id, "hot_score": hot_score(row.importance_score, row.published_at, now)}
+            for row in rows
+        ]
+        for start in range(0, len(params), UPDATE_BATCH):
+            await db.execute(statement, params[start:start + UPDATE_BATCH])
+        await db.commit()
+    return len(params) + await expire_hot_scores(now)
+
+
+class HotRankRefresher:
+    """后台定时归零超出时间范围的热度
+
+    只在索引写入者进程运行（见 services/index_writer.py），启动后先完整重算一次时间范围内的热度键。
+    """
+
+    def __init__(self, interval_minutes: float = HOT_RANK_REFRESH_MINUTES):
+        self.interval_minutes = interval_minutes
+        self.task: Optional[asyncio.Task] = None
+        self.last_run: Optional[datetime] = None
+        self.last_updated = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    async def start(self):
+        if self.is_running:
+            return
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"热度刷新任务已启动，间隔: {self.interval_minutes} 分钟")
+
+    async def stop(self):
+        if not self.is_running:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        logger.info("热度刷新任务已停止")
+
+    async def _run(self):
+        refresh = refresh_hot_scores
+        while True:
+            try:
+                self.last_updated = await refresh()
+                self.last_run = datetime.now()
+                refresh = expire_hot_scores
+                if self.last_updated:
+                    logger.info(f"热度刷新完成，更新 {self.last_updated} 条新闻")
+                    # 热度排序的列表已变化
+                    await get_response_cache().invalidate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"热度刷新失败: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_minutes * 60)
+
+    def get_status(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "interval_minutes": self.interval_minutes,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_updated": self.last_updated,
+        }
+
+
+# 全局刷新任务实例
+_refresher_instance: Optional[HotRankRefresher] = None
+
+
+def get_hot_rank_refresher() -> HotRankRefresher:
+    """获取全局热度刷新任务实例"""
+    global _refresher_instance
+    if _refresher_instance is None:
+        _refresher_instance = HotRankRefresher()
+    return _refresher_instance
+
+
+async def start_hot_rank_refresher():
+    """启动热度刷新任务（用于应用启动时调用）"""
+    await get_hot_rank_refresher().start()
+
+
+async def stop_hot_rank_refresher():
+    """停止热度刷新任务（用于应用关闭时调用）"""
+    await get_hot_rank_refresher().stop()
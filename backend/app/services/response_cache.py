@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..config import REDIS_URL, RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL
+from .events import CACHE_EVENT, get_event_bus
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+class MemoryCacheBackend:
+    """进程内 LRU 缓存，条目带过期时间
+
+    版本号只在本进程内，其他进程的失效经事件总线（CACHE_EVENT）通知，见 ResponseCache.invalidate。
+    """
+
+    name = "memory"
+    shared = False
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # 键 -> (过期时间, 响应)
+        self.entries: OrderedDict = OrderedDict()
+        self.version = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return payload
+
+    async def set(self, key: str, payload: str, ttl: float):
+        self.entries[key] = (time.monotonic() + ttl, payload)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def get_version(self) -> int:
+        return self.version
+
+    async def bump_version(self) -> int:
+        return self.bump_local()
+
+    def bump_local(self) -> int:
+        # 旧版本的键不会再被访问，直接清空释放内存
+        self.version += 1
+        self.entries.clear()
+        return self.version
+
+
+class RedisCacheBackend:
+    """Redis 缓存，版本号保存在 Redis 中，多个进程共享失效"""
+
+    name = "redis"
+    shared = True
+    key_prefix = "news_api:cache:"
+    version_key = "news_api:cache_version"
+
+    def __init__(self, url: str = REDIS_URL):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(self.key_prefix + key)
+
+    async def set(self, key: str, payload: str, ttl: float):
+        await self.client.set(self.key_prefix + key, payload, ex=max(1, int(ttl)))
+
+    async def get_version(self) -> int:
+        return int(await self.client.get(self.version_key) or 0)
+
+    async def bump_version(self) -> int:
+        # 旧版本的键依靠 TTL 自然过期
+        return await self.client.incr(self.version_key)
+
+
+class ResponseCache:
+    """读穿透响应缓存
+
+    键由命名空间、缓存版本和规范化后的查询参数组成；新闻入库后递增版本号，旧条目随之失效。
+    同一个键的并发未命中只计算一次，其余请求等待同一结果，避免冷启动时击穿数据库。
+    进程内后端的失效经事件总线广播到其他进程（EVENTS_BACKEND=database 时跨进程，延迟约 EVENTS_POLL_SECONDS）。
+    缓存后端出错时直接回源，不影响请求。
+    """
+
+    def __init__(self, backend=None, ttl: float = RESPONSE_CACHE_TTL):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+        self.inflight: Dict[str, asyncio.Future] = {}
+        # 本进程标识，收到自己广播的失效时跳过
+        self.origin = uuid.uuid4().hex
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(namespace: str, version: int, params: Dict[str, Any]) -> str:
+        normalized = json.dumps(
+            {k: v for k, v in sorted(params.items()) if v is not None},
+            separators=(",", ":"), ensure_ascii=False, default=str,
+        )
+        return f"{namespace}:v{version}:{normalized}"
+
+    async def get_or_compute(self, namespace: str, params: Dict[str, Any],
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        """返回缓存的结果，未命中时调用 compute 计算并写入缓存（结果需可 JSON 序列化）"""
+        try:
+            key = self.make_key(namespace, await self.backend.get_version(), params)
+            payload = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"读取响应缓存失败，直接回源: {e}")
+            return await compute()
+
+        if payload is not None:
+            self.hits += 1
+            return json.loads(payload)
+
+        inflight = self.inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            self.inflight.pop(key, None)
+
+        try:
+            await self.backend.set(key, json.dumps(value, ensure_ascii=False, default=str), self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"写入响应缓存失败: {e}")
+        return value
+
+    async def invalidate(self):
+        """递增缓存版本，使现有条目全部失效；进程内后端同时通知其他进程"""
+        try:
+            version = await self.backend.bump_version()
+            logger.info(f"响应缓存已失效，当前版本: {version}")
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"响应缓存失效失败: {e}")
+        if not self.backend.shared:
+            get_event_bus().publish(CACHE_EVENT, {"origin": self.origin})
+
+    def on_remote_invalidate(self, event: Dict):
+        """事件总线处理函数：其他进程使缓存失效时清空本进程的缓存"""
+        if event["data"].get("origin") != self.origin:
+            self.backend.bump_local()
+
+    def get_stats(self) -> Dict:
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+
+# 全局缓存实例
+_cache_instance: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """获取全局响应缓存实例，RESPONSE_CACHE_BACKEND=redis 时使用 REDIS_URL"""
+    global _cache_instance
+    if _cache_instance is None:
+        backend = RedisCacheBackend() if RESPONSE_CACHE_BACKEND == "redis" else MemoryCacheBackend()
+        _cache_instance = ResponseCache(backend)
+        if not backend.shared:
+            get_event_bus().add_handler(CACHE_EVENT, _cache_instance.on_remote_invalidate)
+    return _cache_instance
+
+
+async def invalidate_on_save(saved):
+    """新闻写入器提交回调：有新文章入库时使响应缓存失效"""
+    await get_response_cache().invalidate()
@@ -1,8 +1,10 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Optional
-from .crawler import NewsCrawlerService
+from typing import Dict, Optional
+from .crawl_jobs import get_crawl_job_manager
+from .events import publish_crawler_event
+from .leader import LeaderElector
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -18,7 +20,6 @@ class CrawlerScheduler:
             interval_hours: 爬虫执行间隔（小时）
         """
         self.interval_hours = interval_hours
-        self.crawler = NewsCrawlerService()
         self.is_running = False
         self.task: Optional[asyncio.Task] = None
         
@@ -26,11 +27,18 @@ class CrawlerScheduler:
         self.total_runs = 0
         self.successful_runs = 0
         self.failed_runs = 0
+        # 并入已在运行的任务、任务被取消的次数（不计入成功）
+        self.coalesced_runs = 0
+        self.cancelled_runs = 0
         self.last_run: Optional[datetime] = None
         self.next_run: Optional[datetime] = None
         
-    async def start(self):
-        """启动调度器"""
+    async def start(self, first_run_at: Optional[datetime] = None):
+        """启动调度器
+
+        Args:
+            first_run_at: 首次执行时间，为空或已过去时立即执行
+        """
         if self.is_running:
             logger.warning("调度器已在运行中")
             return
@@ -39,7 +47,7 @@ class CrawlerScheduler:
         logger.info(f"启动爬虫调度器，执行间隔: {self.interval_hours} 小时")
         
         # 创建后台任务
-        self.task = asyncio.create_task(self._run_scheduler())
+        self.task = asyncio.create_task(self._run_scheduler(first_run_at))
         
     async def stop(self):
         """停止调度器"""
@@ -57,26 +65,54 @@ class CrawlerScheduler:
                 
         logger.info("爬虫调度器已停止")
         
-    async def _run_scheduler(self):
+    def restore(self, status: Dict):
+        """接管主节点时沿用上一任调度器上报的统计信息"""
+        self.total_runs = status.get("total_runs", 0)
+        self.successful_runs = status.get("successful_runs", 0)
+        self.failed_runs = status.get("failed_runs", 0)
+        self.coalesced_runs = status.get("coalesced_runs", 0)
+        self.cancelled_runs = status.get("cancelled_runs", 0)
+        if status.get("last_run"):
+            self.last_run = datetime.fromisoformat(status["last_run"])
+        
+    async def _run_scheduler(self, first_run_at: Optional[datetime] = None):
         """调度器主循环"""
+        if first_run_at and first_run_at > datetime.now():
+            self.next_run = first_run_at
+            logger.info(f"首次执行时间: {first_run_at.isoformat()}")
+            await asyncio.sleep((first_run_at - datetime.now()).total_seconds())
         while self.is_running:
             try:
                 logger.info("开始执行定时爬虫任务")
                 start_time = datetime.now()
                 self.total_runs += 1
+                publish_crawler_event("run_started", trigger="scheduled")
                 
-                # 执行爬虫任务
-                results = await self.crawler.discover_news()
+                # 执行爬虫任务（经由任务管理获取运行锁；已有手动任务在运行时并入该任务，不重复爬取）
+                manager = get_crawl_job_manager()
+                job, coalesced = await manager.submit("scheduled")
+                if coalesced:
+                    logger.info(f"已有爬虫任务在运行 ({job['id']})，本次定时执行跳过")
+                    self.coalesced_runs += 1
+                else:
+                    job = await manager.wait(job["id"])
+                    if job["state"] == "failed":
+                        raise RuntimeError(job["error"])
+                    if job["state"] == "succeeded":
+                        self.successful_runs += 1
+                    else:
+                        self.cancelled_runs += 1
                 
                 end_time = datetime.now()
                 duration = (end_time - start_time).total_seconds()
                 self.last_run = end_time
-                self.successful_runs += 1
                 
-                logger.info(f"爬虫任务完成，耗时: {duration:.2f}秒，处理了 {len(results)} 条新闻")
+                logger.info(f"爬虫任务结束 ({job['state']})，耗时: {duration:.2f}秒，处理了 {job['news_count']} 条新闻")
                 
                 # 計算下次執行時間
                 self.next_run = datetime.now() + timedelta(hours=self.interval_hours)
+                publish_crawler_event("run_finished", trigger="scheduled", duration=duration, job_id=job["id"],
+                                      news_count=job["news_count"], status=self.get_status())
                 
                 # 等待下次执行
                 await asyncio.sleep(self.interval_hours * 3600)  # 转换为秒
@@ -87,32 +123,10 @@ class CrawlerScheduler:
             except Exception as e:
                 logger.error(f"调度器执行过程中发生错误: {e}", exc_info=True)
                 self.failed_runs += 1
+                publish_crawler_event("run_failed", trigger="scheduled", error=str(e), status=self.get_status())
                 # 发生错误时等待较短时间后重试
                 await asyncio.sleep(300)  # 5分钟后重试
                 
-    async def run_once(self):
-        """手动执行一次爬虫任务"""
-        logger.info("手动触发爬虫任务")
-        try:
-            start_time = datetime.now()
-            results = await self.crawler.discover_news()
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            
-            logger.info(f"手动爬虫任务完成，耗时: {duration:.2f}秒，处理了 {len(results)} 条新闻")
-            return {
-                "success": True,
-                "duration": duration,
-                "news_count": len(results),
-                "results": results
-            }
-        except Exception as e:
-            logger.error(f"手动爬虫任务执行失败: {e}", exc_info=True)
-            return {
-                "success": False,
-                "error": str(e)
-            }
-            
     def get_status(self):
         """获取调度器状态"""
         return {
@@ -121,12 +135,15 @@ class CrawlerScheduler:
             "total_runs": self.total_runs,
             "successful_runs": self.successful_runs,
             "failed_runs": self.failed_runs,
+            "coalesced_runs": self.coalesced_runs,
+            "cancelled_runs": self.cancelled_runs,
             "last_run": self.last_run.isoformat() if self.last_run else None,
             "next_run": self.next_run.isoformat() if self.next_run else None
         }
 
 # 全局调度器实例
 _scheduler_instance: Optional[CrawlerScheduler] = None
+_elector_instance: Optional[LeaderElector] = None
 
 def get_scheduler() -> CrawlerScheduler:
     """获取全局调度器实例"""
@@ -135,14 +152,48 @@ def get_scheduler() -> CrawlerScheduler:
         _scheduler_instance = CrawlerScheduler()
     return _scheduler_instance
 
-async def start_crawler_scheduler():
-    """启动爬虫调度器（用于应用启动时调用）"""
+async def _on_elected(previous_status: Optional[Dict]):
+    """成为主节点：沿用上一任的计划，未到下次执行时间则等待，避免故障切换后立即重复爬取"""
     scheduler = get_scheduler()
-    # 設置下次執行時間
-    scheduler.next_run = datetime.now() + timedelta(hours=scheduler.interval_hours)
-    await scheduler.start()
+    first_run_at = None
+    if previous_status:
+        scheduler.restore(previous_status)
+        if previous_status.get("next_run"):
+            first_run_at = datetime.fromisoformat(previous_status["next_run"])
+    await scheduler.start(first_run_at)
+    publish_crawler_event("leader_elected", worker_id=get_scheduler_elector().worker_id,
+                          status=scheduler.get_status())
 
-async def stop_crawler_scheduler():
-    """停止爬虫调度器（用于应用关闭时调用）"""
+async def _on_demoted():
+    """失去主节点身份：立即停止调度
+
+    正在进行的爬取不会被取消：它由爬取任务管理器持有独立的运行锁并继续执行到结束，
+    新的主节点到期执行时会并入该任务而不是重复爬取。
+    """
     scheduler = get_scheduler()
-    await scheduler.stop()
\ No newline at end of file
+    if scheduler.is_running:
+        await scheduler.stop()
+
+def get_scheduler_elector() -> LeaderElector:
+    """获取调度器选主实例：集群内只有持有租约的工作进程运行调度器"""
+    global _elector_instance
+    if _elector_instance is None:
+        _elector_instance = LeaderElector(
+            "crawler_scheduler",
+            on_elected=_on_elected,
+            on_demoted=_on_demoted,
+            status_provider=lambda: get_scheduler().get_status(),
+        )
+    return _elector_instance
+
+async def get_cluster_scheduler_status() -> Dict:
+    """获取主节点上调度器的状态（任意工作进程均可调用）"""
+    return await get_scheduler_elector().get_leader_status()
+
+async def start_crawler_scheduler():
+    """参与调度器选主（用于应用启动时调用），当选后才启动调度器"""
+    await get_scheduler_elector().start()
+
+async def stop_crawler_scheduler():
+    """停止调度器并释放租约（用于应用关闭时调用）"""
+    await get_scheduler_elector().stop()
\ No newline at end of file
@@ -0,0 +1,178 @@
+import math
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import DateTime, Float, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import (
+    SEARCH_CANDIDATES, SEARCH_CONTENT_LIMIT, SEARCH_IMPORTANCE_WEIGHT, SEARCH_RECENCY_HALF_LIFE_HOURS
+)
+from .news_reader import serialize_rows
+
+# 倒排索引表（不属于 ORM 模型，由迁移 0004 创建）
+SQLITE_FTS_TABLE = "news_fts"
+POSTGRES_SEARCH_TABLE = "news_search"
+
+# 中日文字符连续片段，或由字母数字组成的单词
+_CJK = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_RE = re.compile(rf'[{_CJK}]+|[a-z0-9]+')
+_CJK_RE = re.compile(rf'[{_CJK}]')
+
+
+def tokenize(value: str) -> List[str]:
+    """中英文混合分词：中文按相邻两字切分 (bigram)，单个汉字保留为一元词；英文按单词小写"""
+    tokens: List[str] = []
+    if not value:
+        return tokens
+    for match in _TOKEN_RE.finditer(value.lower()):
+        run = match.group()
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def to_index_text(value: Optional[str], limit: Optional[int] = None) -> str:
+    """把原文转换为空格分隔的词串，交给 FTS5 unicode61 / Postgres simple 分词器原样索引"""
+    if not value:
+        return ""
+    return " ".join(tokenize(value[:limit] if limit else value))
+
+
+def build_sqlite_match(query: str) -> Optional[str]:
+    """所有词都需命中 (AND)；查询里的单个汉字用前缀匹配命中以它开头的二元词"""
+    terms = []
+    for token in dict.fromkeys(tokenize(query)):
+        if len(token) == 1 and _CJK_RE.match(token):
+            terms.append(f'"{token}"*')
+        else:
+            terms.append(f'"{token}"')
+    return " ".join(terms) or None
+
+
+def build_tsquery(query: str) -> Optional[str]:
+    terms = []
+    for token in dict.fromkeys(tokenize(query)):
+        if len(token) == 1 and _CJK_RE.match(token):
+            terms.append(f"{token}:*")
+        else:
+            terms.append(token)
+    return " & ".join(terms) or None
+
+
+def _dialect(db) -> str:
+    return db.bind.dialect.name
+
+
+def _index_params(news_id: str, title: str, summary: str, content: str) -> Dict[str, str]:
+    return {
+        "news_id": news_id,
+        "title": to_index_text(title),
+        "summary": to_index_text(summary),
+        "content": to_index_text(content, SEARCH_CONTENT_LIMIT),
+    }
+
+
+def index_statement(dialect: str):
+    """返回写入倒排索引的 SQL；不支持的数据库返回 None"""
+    if dialect == "sqlite":
+        return text(
+            f"INSERT INTO {SQLITE_FTS_TABLE} (news_id, title, summary, content) "
+            f"VALUES (:news_id, :title, :summary, :content)"
+        )
+    if dialect == "postgresql":
+        return text(
+            f"INSERT INTO {POSTGRES_SEARCH_TABLE} (news_id, document) VALUES (:news_id, "
+            "setweight(to_tsvector('simple', :title), 'A') || "
+            "setweight(to_tsvector('simple', :summary), 'B') || "
+            "setweight(to_tsvector('simple', :content), 'C')) "
+            "ON CONFLICT (news_id) DO UPDATE SET document = EXCLUDED.document"
+        )
+    return None
+
+
+async def index_news(db: AsyncSession, news_id: str, title: str, summary: str, content: str):
+    """在当前事务中把新入库的新闻写入倒排索引（与新闻行一起提交）"""
+    statement = index_statement(_dialect(db))
+    if statement is not None:
+        await db.execute(statement, _index_params(news_id, title, summary, content))
+
+
+def _candidate_sql(dialect: str, with_days: bool):
+    statement = _candidate_text(dialect, with_days)
+    if statement is None:
+        return None
+    # 原生 SQL 需要声明列类型，SQLite 才会把时间列转换为 datetime
+    return statement.columns(published_at=DateTime, importance_score=Float, relevance=Float)
+
+
+def _candidate_text(dialect: str, with_days: bool):
+    time_filter = "AND n.published_at >= :since" if with_days else ""
+    columns = "n.id, n.title, n.summary, n.source, n.url, n.published_at, n.importance_score"
+    if dialect == "sqlite":
+        # bm25() 越小越相关；列权重依次为 news_id(不索引)、title、summary、content
+        return text(
+            f"SELECT {columns}, -bm25({SQLITE_FTS_TABLE}, 0.0, 10.0, 4.0, 1.0) AS relevance "
+            f"FROM {SQLITE_FTS_TABLE} JOIN news n ON n.id = {SQLITE_FTS_TABLE}.news_id "
+            f"WHERE {SQLITE_FTS_TABLE} MATCH :match {time_filter} "
+            f"ORDER BY bm25({SQLITE_FTS_TABLE}, 0.0, 10.0, 4.0, 1.0) LIMIT :candidates"
+        )
+    if dialect == "postgresql":
+        return text(
+            f"SELECT {columns}, ts_rank_cd(s.document, q) AS relevance "
+            f"FROM {POSTGRES_SEARCH_TABLE} s JOIN news n ON n.id = s.news_id, "
+            "to_tsquery('simple', :match) q "
+            f"WHERE s.document @@ q {time_filter} "
+            "ORDER BY relevance DESC LIMIT :candidates"
+        )
+    return None
+
+
+def _combined_score(relevance: float, max_relevance: float, importance: float,
+                    published_at: Optional[datetime], now: datetime) -> float:
+    """BM25 相关度（归一化）× 重要性加成 × 时间衰减"""
+    rel = relevance / max_relevance if max_relevance > 0 else 0.0
+    boost = 1 + SEARCH_IMPORTANCE_WEIGHT * (importance or 0) / 10
+    if published_at is not None:
+        age_hours = max(0.0, (now - published_at).total_seconds() / 3600)
+        decay = 0.5 + 0.5 * math.pow(0.5, age_hours / SEARCH_RECENCY_HALF_LIFE_HOURS)
+    else:
+        decay = 0.5
+    return rel * boost * decay
+
+
+async def search_news(db: AsyncSession, query: str, skip: int = 0, limit: int = 20,
+                      days: Optional[int] = None) -> List[Dict]:
+    """全文搜索：先按 BM25 取候选集，再结合重要性和时效重新排序后分页"""
+    dialect = _dialect(db)
+    match = build_sqlite_match(query) if dialect == "sqlite" else build_tsquery(query)
+    statement = _candidate_sql(dialect, bool(days))
+    if not match or statement is None:
+        return []
+
+    params = {"match": match, "candidates": max(SEARCH_CANDIDATES, skip + limit)}
+    if days:
+        params["since"] = datetime.now() - timedelta(days=days)
+    rows = (await db.execute(statement, params)).all()
+    if not rows:
+        return []
+
+    now = datetime.now()
+    max_relevance = max(row.relevance for row in rows)
+    scored = sorted(
+        ((_combined_score(row.relevance, max_relevance, row.importance_score, row.published_at, now), row)
+         for row in rows),
+        key=lambda item: item[0],
+        reverse=True,
+    )[skip:skip + limit]
+
+    items = await serialize_rows(db, [row for _, row in scored])
+    for item, (score, _) in zip(items, scored):
+        item["search_score"] = round(score, 4)
+    return items
@@ -0,0 +1,199 @@
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, or_, select, update
+
+from ..config import STORY_CLUSTER_THRESHOLD, STORY_CLUSTER_WINDOW_HOURS
+from ..db.database import AsyncSessionLocal
+from ..models.news import News
+from ..models.story import StoryCluster
+from .vector_index import get_vector_index
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class StoryClusterer:
+    """在线事件聚类
+
+    内存中只保留时间窗口内仍活跃的簇（中心向量与统计信息）；每篇新文章与这些中心比较余弦相似度，
+    超过阈值则并入最相似的簇（中心取向量均值），否则新开一个簇。
+    向量与相关新闻索引相同（标题加权的哈希 TF-IDF），成本只与新文章数量相关。
+    簇状态只保存在本进程内存中，只能由索引写入者（services/index_writer.py）调用，当选时重新加载。
+    """
+
+    def __init__(self, window_hours: float = STORY_CLUSTER_WINDOW_HOURS,
+                 threshold: float = STORY_CLUSTER_THRESHOLD):
+        self.window = timedelta(hours=window_hours)
+        self.threshold = threshold
+        # 簇ID -> {size, representative_id, importance_score, first_seen_at, last_updated_at}
+        self.clusters: Dict[str, Dict] = {}
+        self.centroids: Dict[str, np.ndarray] = {}
+        self.loaded = False
+
+    async def load(self):
+        """从数据库加载窗口内活跃的簇"""
+        dim = get_vector_index().dim
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(StoryCluster).where(StoryCluster.last_updated_at >= datetime.now() - self.window)
+            )).scalars().all()
+        self.clusters, self.centroids = {}, {}
+        for cluster in rows:
+            centroid = np.frombuffer(cluster.centroid, dtype=np.float32)
+            if centroid.shape[0] != dim:
+                continue
+            self.centroids[cluster.id] = centroid.copy()
+            self.clusters[cluster.id] = {
+                "size": cluster.size,
+                "representative_id": cluster.representative_id,
+                "importance_score": cluster.importance_score,
+                "first_seen_at": cluster.first_seen_at,
+                "last_updated_at": cluster.last_updated_at,
+            }
+        self.loaded = True
+        logger.info(f"事件聚类已加载 {len(self.clusters)} 个活跃事件簇")
+
+    def _evict(self, now: datetime):
+        for cluster_id in [cid for cid, c in self.clusters.items() if c["last_updated_at"] < now - self.window]:
+            del self.clusters[cluster_id]
+            del self.centroids[cluster_id]
+
+    def _best_match(self, vector: np.ndarray) -> Tuple[Optional[str], float]:
+        if not self.centroids:
+            return None, 0.0
+        ids = list(self.centroids)
+        matrix = np.stack([self.centroids[cid] for cid in ids])
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1
+        similarities = (matrix @ vector) / norms
+        best = int(np.argmax(similarities))
+        return ids[best], float(similarities[best])
+
+    def assign(self, news_id: str, vector: np.ndarray, importance: float, published_at: datetime) -> str:
+        """把文章分配到簇，返回簇ID（向量需已 L2 归一化）"""
+        cluster_id, similarity = self._best_match(vector)
+        if cluster_id is not None and similarity >= self.threshold:
+            cluster = self.clusters[cluster_id]
+            size = cluster["size"]
+            self.centroids[cluster_id] = (self.centroids[cluster_id] * size + vector) / (size + 1)
+            cluster["size"] = size + 1
+            cluster["last_updated_at"] = max(cluster["last_updated_at"], published_at)
+            if importance > cluster["importance_score"]:
+                cluster["representative_id"] = news_id
+                cluster["importance_score"] = importance
+            return cluster_id
+
+        cluster_id = str(uuid.uuid4())
+        self.centroids[cluster_id] = vector.astype(np.float32)
+        self.clusters[cluster_id] = {
+            "size": 1,
+            "representative_id": news_id,
+            "importance_score": importance,
+            "first_seen_at": published_at,
+            "last_updated_at": published_at,
+        }
+        return cluster_id
+
+    async def cluster_records(self, records: List[Dict]) -> Dict[str, str]:
+        """为一批文章聚类并持久化簇中心与 news.story_id，返回 news_id -> story_id"""
+        if not self.loaded:
+            await self.load()
+        now = datetime.now()
+        self._evict(now)
+        index = get_vector_index()
+
+        assignments: Dict[str, str] = {}
+        for record in records:
+            vector = index.vector_of(record['news_id'])
+            if vector is None:
+                vector = index.embed(record['title'], record['summary'], record['content'])
+            else:
+                norm = np.linalg.norm(vector)
+                vector = vector / norm if norm > 0 else vector
+            if not np.any(vector):
+                continue
+            assignments[record['news_id']] = self.assign(
+                record['news_id'], vector, record['importance_score'], record['published_at'] or now
+            )
+
+        by_cluster: Dict[str, List[str]] = defaultdict(list)
+        for news_id, cluster_id in assignments.items():
+            by_cluster[cluster_id].append(news_id)
+
+        if by_cluster:
+            async with AsyncSessionLocal() as db:
+                for cluster_id, news_ids in by_cluster.items():
+                    await db.merge(StoryCluster(
+                        id=cluster_id,
+                        centroid=self.centroids[cluster_id].astype(np.float32).tobytes(),
+                        **self.clusters[cluster_id],
+                    ))
+                    await db.execute(update(News).where(News.id.in_(news_ids)).values(story_id=cluster_id))
+                await db.commit()
+        return assignments
+
+    def get_status(self) -> Dict:
+        return {
+            "active_clusters": len(self.clusters),
+            "window_hours": self.window.total_seconds() / 3600,
+            "threshold": self.threshold,
+        }
+
+
+# 全局聚类实例
+_clusterer_instance: Optional[StoryClusterer] = None
+
+
+def get_story_clusterer() -> StoryClusterer:
+    """获取全局事件聚类实例"""
+    global _clusterer_instance
+    if _clusterer_instance is None:
+        _clusterer_instance = StoryClusterer()
+    return _clusterer_instance
+
+
+async def cluster_saved_news(saved: List[Dict]):
+    """把新入库的文章分配到事件簇（由索引写入者在写入向量之后调用），已由定期同步聚类的跳过"""
+    async with AsyncSessionLocal() as db:
+        unassigned = set((await db.execute(
+            select(News.id).where(News.id.in_([record['news_id'] for record in saved]), News.story_id.is_(None))
+        )).scalars().all())
+    assignments = await get_story_clusterer().cluster_records(
+        [record for record in saved if record['news_id'] in unassigned]
+    )
+    logger.info(f"事件聚类完成: {len(assignments)} 篇文章，涉及 {len(set(assignments.values()))} 个事件簇")
+
+
+async def sync_story_clusters(batch_size: int = 200) -> int:
+    """为时间窗口内尚未聚类的新闻补齐事件簇（由索引写入者定期执行，按发布时间顺序）"""
+    clusterer = get_story_clusterer()
+    stmt = (
+        select(News.id, News.title, News.summary, News.content, News.importance_score, News.published_at)
+        .where(News.story_id.is_(None), News.published_at >= datetime.now() - clusterer.window)
+        .order_by(News.published_at, News.id)
+    )
+    total = 0
+    last = None
+    while True:
+        page = stmt
+        if last is not None:
+            page = page.where(or_(News.published_at > last[0], and_(News.published_at == last[0], News.id > last[1])))
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(page.limit(batch_size))).all()
+        if not rows:
+            break
+        assignments = await clusterer.cluster_records([
+            {"news_id": row.id, "title": row.title, "summary": row.summary, "content": row.content,
+             "importance_score": row.importance_score, "published_at": row.published_at}
+            for row in rows
+        ])
+        total += len(assignments)
+        last = (rows[-1].published_at, rows[-1].id)
+    if total:
+        logger.info(f"事件聚类补齐完成: {total} 篇文章")
+    return total
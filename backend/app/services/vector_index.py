@@ -0,0 +1,359 @@
+import json
+import logging
+import math
+import os
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import VECTOR_INDEX_DIM, VECTOR_INDEX_DIR, SEARCH_CONTENT_LIMIT
+from ..db.database import AsyncSessionLocal
+from ..models.news import News
+from .search import tokenize
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 标题、摘要、正文的词频权重
+FIELD_WEIGHTS = (("title", 3.0), ("summary", 2.0), ("content", 1.0))
+# 扫描时每块处理的向量数：块内 int8 -> float32 的转换缓冲能留在 CPU 缓存里
+SCAN_BLOCK = 2048
+INITIAL_CAPACITY = 1024
+
+
+def _bucket(token: str, dim: int) -> Tuple[int, float]:
+    """哈希技巧：词映射到固定维度的桶，并带一个随机符号以抵消碰撞"""
+    h = zlib.crc32(token.encode("utf-8"))
+    return h % dim, (1.0 if (h >> 31) & 1 else -1.0)
+
+
+def term_weights(title: str, summary: str, content: str) -> Counter:
+    """按字段加权的词频（中英文混合分词与全文搜索一致）"""
+    weights: Counter = Counter()
+    fields = {"title": title or "", "summary": summary or "", "content": (content or "")[:SEARCH_CONTENT_LIMIT]}
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(fields[field]):
+            weights[token] += weight
+    return weights
+
+
+class VectorIndex:
+    """本地向量索引：哈希 TF-IDF 向量，int8 量化后存放在内存映射文件中
+
+    文件布局（VECTOR_INDEX_DIR 目录下）：
+      vectors.i8  容量 × 维度 的 int8 矩阵，每行一个向量
+      scales.f4   每行的反量化系数 (float32)
+      live.u1     每行是否有效 (uint8)，删除只清除该标记
+      ids.txt     第 i 行对应的新闻ID，只追加
+      meta.json   行数、文档数和各桶的文档频率（IDF 随入库增量更新）
+    追加和删除都是增量的：文件只会原地追加或扩容，不会截断重写，只读映射的其他进程始终可以安全读取。
+    查询为分块的暴力点积（numpy 向量化），十万级数据为毫秒级。
+    同一目录只能有一个写入者（见 services/index_writer.py），其余进程使用 read_only 模式：
+    以只读方式映射文件，meta.json 变化时重新加载。
+    """
+
+    def __init__(self, path: str = VECTOR_INDEX_DIR, dim: int = VECTOR_INDEX_DIM, read_only: bool = False):
+        self.path = path
+        self.dim = dim
+        self.read_only = read_only
+        self.meta_mtime: Optional[float] = None
+        self.count = 0
+        self.capacity = 0
+        self.docs = 0
+        self.df = np.zeros(dim, dtype=np.float64)
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.vectors: Optional[np.memmap] = None
+        self.scales: Optional[np.memmap] = None
+        self.live: Optional[np.memmap] = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    # ---------- 持久化 ----------
+
+    def load(self):
+        if not self.read_only:
+            os.makedirs(self.path, exist_ok=True)
+        meta_path = self._file("meta.json")
+        if os.path.exists(meta_path):
+            self.meta_mtime = os.path.getmtime(meta_path)
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim:
+                logger.warning(f"向量维度由 {meta['dim']} 变为 {self.dim}，重建向量索引")
+                meta = None
+        else:
+            meta = None
+
+        if meta is None:
+            if self.read_only:
+                # 等待写入者建立索引
+                self._reset(0)
+                return
+            self._create(INITIAL_CAPACITY)
+            return
+
+        self.count = meta["count"]
+        self.capacity = meta["capacity"]
+        self.docs = meta["docs"]
+        self.df = np.array(meta["df"], dtype=np.float64)
+        self._open("r" if self.read_only else "r+")
+        with open(self._file("ids.txt"), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.ids = lines[:self.count]
+        if len(lines) > self.count and not self.read_only:
+            # 上次追加后未来得及写 meta.json，丢弃多出的ID保证行号对齐
+            with open(self._file("ids.txt"), "w", encoding="utf-8") as f:
+                f.write("".join(f"{news_id}\n" for news_id in self.ids))
+        self.rows = {news_id: row for row, news_id in enumerate(self.ids) if self.live[row]}
+        logger.info(f"向量索引已加载: {len(self.rows)} 条有效向量，{self.count - len(self.rows)} 条已删除")
+
+    def refresh(self) -> bool:
+        """只读模式：写入者更新过 meta.json 时重新加载，返回是否重新加载"""
+        try:
+            mtime = os.path.getmtime(self._file("meta.json"))
+        except OSError:
+            return False
+        if mtime == self.meta_mtime:
+            return False
+        self.vectors = self.scales = self.live = None
+        self.load()
+        return True
+
+    def _reset(self, capacity: int):
+        self.count = 0
+        self.capacity = capacity
+        self.docs = 0
+        self.df = np.zeros(self.dim, dtype=np.float64)
+        self.ids = []
+        self.rows = {}
+
+    def _create(self, capacity: int):
+        self._reset(capacity)
+        open(self._file("ids.txt"), "w").close()
+        self._open("w+")
+        self._save_meta()
+
+    def _open(self, mode: str):
+        self.vectors = np.memmap(self._file("vectors.i8"), dtype=np.int8, mode=mode, shape=(self.capacity, self.dim))
+        self.scales = np.memmap(self._file("scales.f4"), dtype=np.float32, mode=mode, shape=(self.capacity,))
+        self.live = np.memmap(self._file("live.u1"), dtype=np.uint8, mode=mode, shape=(self.capacity,))
+
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self.flush()
+        self.vectors = self.scales = self.live = None
+        for name, itemsize in (("vectors.i8", self.dim), ("scales.f4", 4), ("live.u1", 1)):
+            with open(self._file(name), "r+b") as f:
+                f.truncate(capacity * itemsize)
+        self.capacity = capacity
+        self._open("r+")
+
+    def _save_meta(self):
+        meta = {"dim": self.dim, "count": self.count, "capacity": self.capacity,
+                "docs": self.docs, "df": self.df.tolist()}
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._file("meta.json"))
+        self.meta_mtime = os.path.getmtime(self._file("meta.json"))
+
+    def flush(self):
+        for array in (self.vectors, self.scales, self.live):
+            if array is not None:
+                array.flush()
+        self._save_meta()
+
+    # ---------- 向量 ----------
+
+    def embed(self, title: str, summary: str, content: str) -> np.ndarray:
+        """哈希 TF-IDF 向量（L2 归一化，float32）"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token, tf in term_weights(title, summary, content).items():
+            bucket, sign = _bucket(token, self.dim)
+            idf = math.log((1 + self.docs) / (1 + self.df[bucket])) + 1
+            vector[bucket] += sign * (1 + math.log(tf)) * idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _observe(self, title: str, summary: str, content: str):
+        """把文档计入文档频率统计"""
+        buckets = {_bucket(token, self.dim)[0] for token in term_weights(title, summary, content)}
+        self.df[list(buckets)] += 1
+        self.docs += 1
+
+    @staticmethod
+    def _quantize(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        peak = float(np.abs(vector).max())
+        if peak == 0:
+            return np.zeros_like(vector, dtype=np.int8), 0.0
+        return np.round(vector * (127 / peak)).astype(np.int8), peak / 127
+
+    # ---------- 增删查 ----------
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("向量索引为只读模式，写入由持有 index_writer 租约的工作进程负责")
+
+    def add_many(self, documents: Iterable[Tuple[str, str, str, str]]) -> int:
+        """追加 (news_id, title, summary, content)；已存在的ID原地覆盖"""
+        self._check_writable()
+        documents = list(documents)
+        for _, title, summary, content in documents:
+            self._observe(title, summary, content)
+        new_ids = []
+        for news_id, title, summary, content in documents:
+            quantized, scale = self._quantize(self.embed(title, summary, content))
+            row = self.rows.get(news_id)
+            if row is None:
+                if self.count >= self.capacity:
+                    self._grow(self.count + 1)
+                row = self.count
+                self.count += 1
+                self.ids.append(news_id)
+                self.rows[news_id] = row
+                new_ids.append(news_id)
+            self.vectors[row] = quantized
+            self.scales[row] = scale
+            self.live[row] = 1
+        if new_ids:
+            with open(self._file("ids.txt"), "a", encoding="utf-8") as f:
+                f.write("".join(f"{news_id}\n" for news_id in new_ids))
+        self.flush()
+        return len(documents)
+
+    def delete(self, news_ids: Iterable[str]) -> int:
+        self._check_writable()
+        removed = 0
+        for news_id in news_ids:
+            row = self.rows.pop(news_id, None)
+            if row is not None:
+                self.live[row] = 0
+                removed += 1
+        if removed:
+            self.flush()
+        return removed
+
+    def vector_of(self, news_id: str) -> Optional[np.ndarray]:
+        row = self.rows.get(news_id)
+        if row is None:
+            return None
+        return self.vectors[row].astype(np.float32) * self.scales[row]
+
+    def search(self, query: np.ndarray, k: int = 10, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """返回余弦相似度最高的 k 个 (news_id, score)"""
+        if self.count == 0 or not np.any(query):
+            return []
+        excluded = {self.rows[news_id] for news_id in exclude if news_id in self.rows}
+        query = query.astype(np.float32)
+        scores = np.empty(self.count, dtype=np.float32)
+        buffer = np.empty((min(SCAN_BLOCK, self.count), self.dim), dtype=np.float32)
+        for start in range(0, self.count, SCAN_BLOCK):
+            stop = min(start + SCAN_BLOCK, self.count)
+            block = buffer[:stop - start]
+            np.copyto(block, self.vectors[start:stop])
+            scores[start:stop] = (block @ query) * self.scales[start:stop]
+        scores[self.live[:self.count] == 0] = -np.inf
+        if excluded:
+            scores[list(excluded)] = -np.inf
+
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[row], float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def get_status(self) -> Dict:
+        return {
+            "dim": self.dim,
+            "vectors": len(self.rows),
+            "deleted": self.count - len(self.rows),
+            "capacity": self.capacity,
+            "documents_seen": self.docs,
+            "read_only": self.read_only,
+        }
+
+
+# 全局索引实例
+_index_instance: Optional[VectorIndex] = None
+
+
+def get_vector_index() -> VectorIndex:
+    """获取全局向量索引实例（首次调用时从磁盘加载）
+
+    默认以只读方式打开，每次获取时检查写入者是否写入了新向量；
+    当选为写入者的进程通过 open_vector_index(read_only=False) 切换为可写。
+    """
+    global _index_instance
+    if _index_instance is None:
+        _index_instance = VectorIndex(read_only=True)
+        _index_instance.load()
+    elif _index_instance.read_only:
+        _index_instance.refresh()
+    return _index_instance
+
+
+def open_vector_index(read_only: bool) -> VectorIndex:
+    """以指定模式重新打开全局向量索引（成为或不再是写入者时调用）"""
+    global _index_instance
+    if _index_instance is not None and not _index_instance.read_only:
+        _index_instance.flush()
+    _index_instance = VectorIndex(read_only=read_only)
+    _index_instance.load()
+    return _index_instance
+
+
+async def index_saved_news(saved: List[Dict]):
+    """为新入库的文章计算向量并追加到索引（只能在写入者进程调用），已由定期同步写入的跳过"""
+    index = get_vector_index()
+    index.add_many(
+        (record['news_id'], record['title'], record['summary'], record['content'])
+        for record in saved if record['news_id'] not in index.rows
+    )
+
+
+async def sync_vector_index(batch_size: int = 500, since: Optional[datetime] = None) -> Dict:
+    """与数据库对齐：补齐缺失的新闻向量，删除已不存在的新闻
+
+    传入 since 时只补齐该时间之后入库 (crawled_at) 的新闻，不检查删除，用于写入者的定期增量同步。
+    """
+    index = get_vector_index()
+    async with AsyncSessionLocal() as db:
+        if since is None:
+            db_ids = set((await db.execute(select(News.id))).scalars().all())
+            removed = index.delete([news_id for news_id in list(index.rows) if news_id not in db_ids])
+        else:
+            db_ids = set((await db.execute(select(News.id).where(News.crawled_at >= since))).scalars().all())
+            removed = 0
+        missing = sorted(db_ids - set(index.rows))
+        for start in range(0, len(missing), batch_size):
+            rows = (await db.execute(
+                select(News.id, News.title, News.summary, News.content)
+                .where(News.id.in_(missing[start:start + batch_size]))
+            )).all()
+            index.add_many(tuple(row) for row in rows)
+    if missing or removed:
+        logger.info(f"向量索引同步完成: 补齐 {len(missing)} 条，删除 {removed} 条")
+    return {"added": len(missing), "removed": removed}
+
+
+async def find_related(db: AsyncSession, news_id: str, k: int = 5) -> Optional[List[Tuple[str, float]]]:
+    """相关新闻：返回 [(news_id, similarity)]；新闻不存在时返回 None"""
+    index = get_vector_index()
+    query = index.vector_of(news_id)
+    if query is None:
+        # 尚未建立向量（例如后台同步还没完成），按当前统计临时计算
+        row = (await db.execute(
+            select(News.title, News.summary, News.content).where(News.id == news_id)
+        )).first()
+        if row is None:
+            return None
+        query = index.embed(*row)
+    return index.search(query, k, exclude=[news_id])
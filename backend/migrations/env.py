@@ -0,0 +1,65 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.config import DATABASE_URL
+from app.db.database import Base
+import app.models  # noqa: F401  导入所有模型，供 --autogenerate 对比
+
+config = context.config
+target_metadata = Base.metadata
+
+# 不由 ORM 模型描述、直接在迁移里用原生 SQL 管理的表（全文索引等），autogenerate 时忽略
+UNMANAGED_TABLE_PREFIXES = ("news_fts", "news_search")
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    if type_ == "table" and name.startswith(UNMANAGED_TABLE_PREFIXES):
+        return False
+    return True
+
+# 由 run_migrations() 传入的连接：应用内执行时复用应用的引擎，也不覆盖应用的日志配置
+external_connection = config.attributes.get("connection")
+
+if external_connection is None and config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+
+def _configure(**kwargs):
+    url = kwargs.get("url") or str(kwargs["connection"].engine.url)
+    context.configure(
+        target_metadata=target_metadata,
+        # SQLite 不支持大部分 ALTER TABLE，使用 batch 模式重建表
+        render_as_batch=url.startswith("sqlite"),
+        compare_type=True,
+        include_object=include_object,
+        **kwargs,
+    )
+
+
+def run_migrations_offline():
+    """生成 SQL 脚本而不连接数据库 (alembic upgrade head --sql)"""
+    _configure(url=DATABASE_URL, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    if external_connection is not None:
+        _configure(connection=external_connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    connectable = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,91 @@
+"""baseline schema (与引入迁移之前 create_all 生成的结构一致)
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('username', sa.String(), nullable=False, unique=True),
+        sa.Column('email', sa.String(), nullable=False, unique=True),
+        sa.Column('password_hash', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'categories',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False, unique=True),
+        sa.Column('description', sa.Text(), nullable=True),
+    )
+    op.create_table(
+        'news',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False, unique=True),
+        sa.Column('published_at', sa.DateTime(), nullable=False),
+        sa.Column('crawled_at', sa.DateTime(), nullable=False),
+        sa.Column('importance_score', sa.Float(), nullable=False),
+        sa.Column('raw_html', sa.Text(), nullable=True),
+    )
+    op.create_table(
+        'news_category',
+        sa.Column('news_id', sa.String(), sa.ForeignKey('news.id'), nullable=True),
+        sa.Column('category_id', sa.String(), sa.ForeignKey('categories.id'), nullable=True),
+    )
+    op.create_table(
+        'browse_history',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('news_id', sa.String(), sa.ForeignKey('news.id'), nullable=False),
+        sa.Column('viewed_at', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'sources',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('url', sa.Text(), nullable=False, unique=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'user_source_subscriptions',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('source_id', sa.String(), sa.ForeignKey('sources.id'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'user_category_subscriptions',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('category_id', sa.String(), sa.ForeignKey('categories.id'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('user_id', 'category_id', name='uix_user_category'),
+    )
+
+
+def downgrade():
+    op.drop_table('user_category_subscriptions')
+    op.drop_table('user_source_subscriptions')
+    op.drop_table('sources')
+    op.drop_table('browse_history')
+    op.drop_table('news_category')
+    op.drop_table('news')
+    op.drop_table('categories')
+    op.drop_table('users')
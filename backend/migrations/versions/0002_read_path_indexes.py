@@ -0,0 +1,63 @@
+"""add read-path indexes and news_category primary key
+
+Revision ID: 0002_read_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_read_path_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def _dedupe_news_category():
+    """旧表没有主键，可能存在重复或空的关联行，加主键前先清理"""
+    bind = op.get_bind()
+    op.execute("DELETE FROM news_category WHERE news_id IS NULL OR category_id IS NULL")
+    if bind.dialect.name == "sqlite":
+        op.execute(
+            "DELETE FROM news_category WHERE rowid NOT IN "
+            "(SELECT MIN(rowid) FROM news_category GROUP BY news_id, category_id)"
+        )
+    elif bind.dialect.name == "postgresql":
+        op.execute(
+            "DELETE FROM news_category a USING news_category b "
+            "WHERE a.ctid > b.ctid AND a.news_id = b.news_id AND a.category_id = b.category_id"
+        )
+
+
+def upgrade():
+    # /api/news: WHERE published_at >= ? [AND importance_score >= ?]
+    #            ORDER BY importance_score DESC, published_at DESC
+    op.create_index('ix_news_score_published', 'news', ['importance_score', 'published_at'])
+    op.create_index('ix_news_published_at', 'news', ['published_at'])
+
+    _dedupe_news_category()
+    with op.batch_alter_table('news_category', recreate='auto') as batch_op:
+        batch_op.alter_column('news_id', existing_type=sa.String(), nullable=False)
+        batch_op.alter_column('category_id', existing_type=sa.String(), nullable=False)
+        batch_op.create_primary_key('pk_news_category', ['news_id', 'category_id'])
+    op.create_index('ix_news_category_category_id', 'news_category', ['category_id', 'news_id'])
+
+    # /api/history: WHERE user_id = ? ORDER BY viewed_at DESC
+    op.create_index('ix_browse_history_user_viewed', 'browse_history', ['user_id', 'viewed_at'])
+    op.create_index(
+        'ix_user_source_subscriptions_user_source', 'user_source_subscriptions', ['user_id', 'source_id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_user_source_subscriptions_user_source', table_name='user_source_subscriptions')
+    op.drop_index('ix_browse_history_user_viewed', table_name='browse_history')
+    op.drop_index('ix_news_category_category_id', table_name='news_category')
+    with op.batch_alter_table('news_category', recreate='auto') as batch_op:
+        batch_op.drop_constraint('pk_news_category', type_='primary')
+        batch_op.alter_column('news_id', existing_type=sa.String(), nullable=True)
+        batch_op.alter_column('category_id', existing_type=sa.String(), nullable=True)
+    op.drop_index('ix_news_published_at', table_name='news')
+    op.drop_index('ix_news_score_published', table_name='news')
@@ -0,0 +1,31 @@
+"""extend sort indexes with id for keyset pagination
+
+Revision ID: 0003_keyset_pagination_indexes
+Revises: 0002_read_path_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_keyset_pagination_indexes'
+down_revision = '0002_read_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 排序键加上 id 作为唯一的决胜列，游标条件 (score, published_at, id) < (?, ?, ?) 可直接做索引范围扫描
+    op.drop_index('ix_news_score_published', table_name='news')
+    op.create_index('ix_news_score_published_id', 'news', ['importance_score', 'published_at', 'id'])
+
+    op.drop_index('ix_browse_history_user_viewed', table_name='browse_history')
+    op.create_index('ix_browse_history_user_viewed_id', 'browse_history', ['user_id', 'viewed_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_browse_history_user_viewed_id', table_name='browse_history')
+    op.create_index('ix_browse_history_user_viewed', 'browse_history', ['user_id', 'viewed_at'])
+
+    op.drop_index('ix_news_score_published_id', table_name='news')
+    op.create_index('ix_news_score_published', 'news', ['importance_score', 'published_at'])
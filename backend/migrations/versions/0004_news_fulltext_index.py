@@ -0,0 +1,104 @@
+"""full-text search index over news (SQLite FTS5 / Postgres tsvector)
+
+Revision ID: 0004_news_fulltext_index
+Revises: 0003_keyset_pagination_indexes
+Create Date: 2026-10-19
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_news_fulltext_index'
+down_revision = '0003_keyset_pagination_indexes'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 500
+
+# 以下为本版本的索引表与分词规则的固定副本，迁移不引用应用代码（services/search.py 之后可以自由修改）
+SQLITE_FTS_TABLE = "news_fts"
+POSTGRES_SEARCH_TABLE = "news_search"
+CONTENT_LIMIT = 20000
+
+_CJK = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_RE = re.compile(rf'[{_CJK}]+|[a-z0-9]+')
+_CJK_RE = re.compile(rf'[{_CJK}]')
+
+
+def _index_text(value, limit=None):
+    """中文按相邻两字切分 (bigram)，单个汉字保留；英文按单词小写；以空格连接"""
+    if not value:
+        return ""
+    tokens = []
+    for match in _TOKEN_RE.finditer((value[:limit] if limit else value).lower()):
+        run = match.group()
+        if _CJK_RE.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return " ".join(tokens)
+
+
+def _index_statement(dialect):
+    if dialect == "sqlite":
+        return sa.text(
+            f"INSERT INTO {SQLITE_FTS_TABLE} (news_id, title, summary, content) "
+            f"VALUES (:news_id, :title, :summary, :content)"
+        )
+    return sa.text(
+        f"INSERT INTO {POSTGRES_SEARCH_TABLE} (news_id, document) VALUES (:news_id, "
+        "setweight(to_tsvector('simple', :title), 'A') || "
+        "setweight(to_tsvector('simple', :summary), 'B') || "
+        "setweight(to_tsvector('simple', :content), 'C')) "
+        "ON CONFLICT (news_id) DO UPDATE SET document = EXCLUDED.document"
+    )
+
+
+def _backfill(bind):
+    """为已有新闻建立索引（分批读取，避免一次性加载全部正文）"""
+    statement = _index_statement(bind.dialect.name)
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, title, summary, content FROM news WHERE id > :last ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": BACKFILL_BATCH},
+        ).all()
+        if not rows:
+            break
+        bind.execute(statement, [
+            {"news_id": news_id, "title": _index_text(title), "summary": _index_text(summary),
+             "content": _index_text(content, CONTENT_LIMIT)}
+            for news_id, title, summary, content in rows
+        ])
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        # 文本在写入前已按中英文混合规则切分为空格分隔的词，unicode61 只需按空格切开
+        op.execute(
+            f"CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5("
+            "news_id UNINDEXED, title, summary, content, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif bind.dialect.name == "postgresql":
+        op.execute(
+            f"CREATE TABLE {POSTGRES_SEARCH_TABLE} ("
+            "news_id VARCHAR PRIMARY KEY REFERENCES news(id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        )
+        op.execute(f"CREATE INDEX ix_{POSTGRES_SEARCH_TABLE}_document ON {POSTGRES_SEARCH_TABLE} USING GIN (document)")
+    else:
+        return
+    _backfill(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}")
+    elif bind.dialect.name == "postgresql":
+        op.execute(f"DROP TABLE IF EXISTS {POSTGRES_SEARCH_TABLE}")
@@ -0,0 +1,63 @@
+"""materialized per-user feed entries
+
+Revision ID: 0005_user_feed_entries
+Revises: 0004_news_fulltext_index
+Create Date: 2026-10-19
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_user_feed_entries'
+down_revision = '0004_news_fulltext_index'
+branch_labels = None
+depends_on = None
+
+# 本版本的默认配置（固定副本，迁移不引用应用代码）
+RETENTION_DAYS = 30
+BROAD_SUBSCRIPTION_THRESHOLD = 20
+
+
+def _backfill(bind):
+    """为已有订阅的用户生成保留期内的信息流；订阅过宽的用户读取时直接查询，不生成"""
+    now = datetime.now()
+    counts = bind.execute(sa.text(
+        "SELECT user_id, COUNT(*) FROM ("
+        "SELECT user_id FROM user_category_subscriptions "
+        "UNION ALL SELECT user_id FROM user_source_subscriptions) s GROUP BY user_id"
+    )).all()
+    statement = sa.text(
+        "INSERT INTO user_feed_entries (user_id, news_id, published_at, created_at) "
+        "SELECT :user_id, n.id, n.published_at, :now FROM news n "
+        "WHERE n.published_at >= :since AND ("
+        "n.id IN (SELECT nc.news_id FROM news_category nc "
+        "JOIN user_category_subscriptions ucs ON ucs.category_id = nc.category_id WHERE ucs.user_id = :user_id) "
+        "OR n.source IN (SELECT src.name FROM sources src "
+        "JOIN user_source_subscriptions uss ON uss.source_id = src.id WHERE uss.user_id = :user_id))"
+    )
+    for user_id, count in counts:
+        if count <= BROAD_SUBSCRIPTION_THRESHOLD:
+            bind.execute(statement, {"user_id": user_id, "now": now, "since": now - timedelta(days=RETENTION_DAYS)})
+
+
+def upgrade():
+    op.create_table(
+        'user_feed_entries',
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('news_id', sa.String(), sa.ForeignKey('news.id'), primary_key=True),
+        sa.Column('published_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_user_feed_entries_user_published', 'user_feed_entries', ['user_id', 'published_at', 'news_id'])
+    op.create_index('ix_user_feed_entries_published_at', 'user_feed_entries', ['published_at'])
+
+    _backfill(op.get_bind())
+
+
+def downgrade():
+    op.drop_index('ix_user_feed_entries_published_at', table_name='user_feed_entries')
+    op.drop_index('ix_user_feed_entries_user_published', table_name='user_feed_entries')
+    op.drop_table('user_feed_entries')
@@ -0,0 +1,44 @@
+"""story clusters and news.story_id
+
+Revision ID: 0006_story_clusters
+Revises: 0005_user_feed_entries
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_story_clusters'
+down_revision = '0005_user_feed_entries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'story_clusters',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('centroid', sa.LargeBinary(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('representative_id', sa.String(), nullable=False),
+        sa.Column('importance_score', sa.Float(), nullable=False),
+        sa.Column('first_seen_at', sa.DateTime(), nullable=False),
+        sa.Column('last_updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_story_clusters_score_updated', 'story_clusters', ['importance_score', 'last_updated_at'])
+    op.create_index('ix_story_clusters_last_updated_at', 'story_clusters', ['last_updated_at'])
+
+    # 已有新闻的 story_id 为空，应用启动后由聚类阶段在后台补齐时间窗口内的文章
+    op.add_column('news', sa.Column('story_id', sa.String(), nullable=True))
+    op.create_index('ix_news_story_id', 'news', ['story_id'])
+
+
+def downgrade():
+    op.drop_index('ix_news_story_id', table_name='news')
+    with op.batch_alter_table('news') as batch_op:
+        batch_op.drop_column('story_id')
+
+    op.drop_index('ix_story_clusters_last_updated_at', table_name='story_clusters')
+    op.drop_index('ix_story_clusters_score_updated', table_name='story_clusters')
+    op.drop_table('story_clusters')
@@ -0,0 +1,27 @@
+"""time-decayed hot_score column on news
+
+Revision ID: 0007_news_hot_score
+Revises: 0006_story_clusters
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_news_hot_score'
+down_revision = '0006_story_clusters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('news', sa.Column('hot_score', sa.Float(), nullable=False, server_default='0'))
+    op.create_index('ix_news_hot_published_id', 'news', ['hot_score', 'published_at', 'id'])
+    # 已有新闻的热度不在迁移中回填：热度刷新任务启动时会重算时间范围内的全部热度（services/ranking.py）
+
+
+def downgrade():
+    op.drop_index('ix_news_hot_published_id', table_name='news')
+    with op.batch_alter_table('news') as batch_op:
+        batch_op.drop_column('hot_score')
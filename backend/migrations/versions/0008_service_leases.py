@@ -0,0 +1,31 @@
+"""service leases for single-leader scheduler election
+
+Revision ID: 0008_service_leases
+Revises: 0007_news_hot_score
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_service_leases'
+down_revision = '0007_news_hot_score'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'service_leases',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('holder', sa.String(), nullable=True),
+        sa.Column('acquired_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.Text(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('service_leases')
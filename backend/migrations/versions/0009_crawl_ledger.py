@@ -0,0 +1,84 @@
+"""crawl run ledger: runs, per-article attempts and daily rollups
+
+Revision ID: 0009_crawl_ledger
+Revises: 0008_service_leases
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_crawl_ledger'
+down_revision = '0008_service_leases'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'crawl_runs',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('trigger', sa.String(), nullable=False),
+        sa.Column('state', sa.String(), nullable=False),
+        sa.Column('worker_id', sa.String(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('sources_total', sa.Integer(), nullable=False),
+        sa.Column('sources_done', sa.Integer(), nullable=False),
+        sa.Column('articles_queued', sa.Integer(), nullable=False),
+        sa.Column('articles_fetched', sa.Integer(), nullable=False),
+        sa.Column('articles_analysed', sa.Integer(), nullable=False),
+        sa.Column('articles_saved', sa.Integer(), nullable=False),
+        sa.Column('articles_failed', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+    )
+    op.create_index('ix_crawl_runs_started_at', 'crawl_runs', ['started_at'])
+
+    op.create_table(
+        'crawl_attempts',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('run_id', sa.String(), nullable=True),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('outcome', sa.String(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('total_ms', sa.Integer(), nullable=False),
+        sa.Column('fetch_ms', sa.Integer(), nullable=True),
+        sa.Column('extract_ms', sa.Integer(), nullable=True),
+        sa.Column('relevance_ms', sa.Integer(), nullable=True),
+        sa.Column('summary_ms', sa.Integer(), nullable=True),
+        sa.Column('score_ms', sa.Integer(), nullable=True),
+        sa.Column('classify_ms', sa.Integer(), nullable=True),
+        sa.Column('save_ms', sa.Integer(), nullable=True),
+        sa.Column('bytes_fetched', sa.Integer(), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+    )
+    op.create_index('ix_crawl_attempts_started_at', 'crawl_attempts', ['started_at'])
+    op.create_index('ix_crawl_attempts_run_id', 'crawl_attempts', ['run_id'])
+
+    op.create_table(
+        'crawl_source_daily',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('source', sa.String(), primary_key=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('saved', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('total_ms', sa.BigInteger(), nullable=False),
+        sa.Column('fetch_ms', sa.BigInteger(), nullable=False),
+        sa.Column('llm_ms', sa.BigInteger(), nullable=False),
+        sa.Column('bytes_fetched', sa.BigInteger(), nullable=False),
+        sa.Column('tokens', sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('crawl_source_daily')
+    op.drop_index('ix_crawl_attempts_run_id', table_name='crawl_attempts')
+    op.drop_index('ix_crawl_attempts_started_at', table_name='crawl_attempts')
+    op.drop_table('crawl_attempts')
+    op.drop_index('ix_crawl_runs_started_at', table_name='crawl_runs')
+    op.drop_table('crawl_runs')
@@ -0,0 +1,23 @@
+"""index news.crawled_at for incremental index sync
+
+Revision ID: 0010_news_crawled_at_index
+Revises: 0009_crawl_ledger
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_news_crawled_at_index'
+down_revision = '0009_crawl_ledger'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 索引写入者定期补齐其他进程入库的新闻: WHERE crawled_at >= ?
+    op.create_index('ix_news_crawled_at', 'news', ['crawled_at'])
+
+
+def downgrade():
+    op.drop_index('ix_news_crawled_at', table_name='news')
@@ -0,0 +1,32 @@
+"""cross-process push event log
+
+Revision ID: 0011_push_events
+Revises: 0010_news_crawled_at_index
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_push_events'
+down_revision = '0010_news_crawled_at_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'push_events',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_push_events_created_at', 'push_events', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_push_events_created_at', table_name='push_events')
+    op.drop_table('push_events')
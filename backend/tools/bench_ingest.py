@@ -0,0 +1,425 @@
+"""
+端到端抓取入库吞吐基准测试
+
+在本地 HTTP 服务器上提供合成的新闻源首页和文章页，LLM 使用进程内启动的
+OpenRouter 桩服务 (tools/openrouter_stub.py)，数据库使用临时 SQLite 文件，
+然后完整运行 NewsCrawlerService.discover_news()，不访问任何外部网络。
+
+用法（在 backend 目录下）:
+    python -m tools.bench_ingest --sources 5 --articles 10 --output bench.json
+    python -m tools.bench_ingest --output new.json --compare bench.json
+
+输出每个阶段（首页抓取、文章抓取、各 LLM 任务、入库）的 p50/p95/p99 延迟、
+文章吞吐（篇/秒）、峰值 RSS 以及启动的浏览器数量，并写出 JSON 结果文件。
+--compare 会与之前的结果对比，超过 --threshold 的退化以非零退出码返回。
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+PARAGRAPHS = [
+    "人工智能公司周二宣布完成新一轮融资，估值较上一轮翻倍，投资方包括多家知名机构。",
+    "The company said the new funding will be used to expand its research team and build more data centers.",
+    "分析人士认为，这一轮融资反映出资本市场对大模型应用落地的持续看好。",
+    "Regulators in several countries are drafting rules to govern how such models are trained and deployed.",
+    "与此同时，多家竞争对手也在加快产品发布节奏，行业竞争进一步加剧。",
+    "Shares of chipmakers rose after the announcement, extending gains from earlier in the week.",
+    "公司创始人在接受采访时表示，未来一年将重点投入企业级市场和海外业务。",
+    "Critics warned that the rapid pace of investment could lead to overcapacity in the sector.",
+]
+
+
+def _percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return round(ordered[index], 4)
+
+
+def _summarize(samples: List[float]) -> Dict:
+    return {
+        "count": len(samples),
+        "mean": round(sum(samples) / len(samples), 4) if samples else None,
+        "p50": _percentile(samples, 0.50),
+        "p95": _percentile(samples, 0.95),
+        "p99": _percentile(samples, 0.99),
+        "max": round(max(samples), 4) if samples else None,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ---------------------------------------------------------------------------
+# 合成语料
+# ---------------------------------------------------------------------------
+
+def build_corpus(root: str, sources: int, articles: int, paragraphs: int) -> List[Dict]:
+    """在 root 下生成 sources 个站点，每个站点一个首页和 articles 篇文章"""
+    site_list = []
+    for s in range(sources):
+        site_dir = os.path.join(root, f"site{s}")
+        os.makedirs(os.path.join(site_dir, "articles"), exist_ok=True)
+        links = []
+        for a in range(articles):
+            article_id = 1000000 + s * 10000 + a
+            title = f"基准测试新闻 {s}-{a}: Benchmark story number {a}"
+            body = "\n".join(
+                f"<p>{PARAGRAPHS[(a + i) % len(PARAGRAPHS)]} ({s}-{a}-{i})</p>" for i in range(paragraphs)
+            )
+            html = (
+                f"<html><head><title>{title}</title></head><body>"
+                f"<nav><a href='/'>首页</a> <a href='/about'>关于我们</a></nav>"
+                f"<article><h1>{title}</h1>{body}</article>"
+                f"<footer>© Bench News</footer></body></html>"
+            )
+            with open(os.path.join(site_dir, "articles", f"{article_id}.html"), "w", encoding="utf-8") as f:
+                f.write(html)
+            links.append(f"<li><a href='/site{s}/articles/{article_id}.html'>{title}</a></li>")
+        homepage = (
+            f"<html><head><title>Bench Site {s}</title></head><body>"
+            f"<nav><a href='/login'>登录</a> <a href='/about'>关于</a></nav>"
+            f"<ul>{''.join(links)}</ul></body></html>"
+        )
+        with open(os.path.join(site_dir, "index.html"), "w", encoding="utf-8") as f:
+            f.write(homepage)
+        site_list.append({"name": f"Bench Site {s}", "path": f"/site{s}/", "category": "科技"})
+    return site_list
+
+
+def start_fixture_server(root: str) -> ThreadingHTTPServer:
+    handler = functools.partial(_QuietHandler, directory=root)
+    server = ThreadingHTTPServer(("127.0.0.1", _free_port()), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port: int, stub_config) -> None:
+    """在独立线程中运行 LLM 桩服务，避免与被测事件循环争抢"""
+    import uvicorn
+    from tools.openrouter_stub import create_app
+
+    config = uvicorn.Config(create_app(stub_config), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    if not server.started:
+        raise RuntimeError("LLM 桩服务启动失败")
+
+
+# ---------------------------------------------------------------------------
+# 资源采样
+# ---------------------------------------------------------------------------
+
+def _process_tree_rss_kb(pid: int) -> Optional[int]:
+    """读取 /proc 统计进程及其子进程（浏览器）的 RSS 总和，非 Linux 返回 None"""
+    if not os.path.isdir("/proc"):
+        return None
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status") as f:
+                ppid, vmrss = None, 0
+                for line in f:
+                    if line.startswith("PPid:"):
+                        ppid = int(line.split()[1])
+                    elif line.startswith("VmRSS:"):
+                        vmrss = int(line.split()[1])
+        except (OSError, ValueError):
+            continue
+        rss[int(entry)] = vmrss
+        if ppid is not None:
+            children.setdefault(ppid, []).append(int(entry))
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+class ResourceSampler:
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.peak_tree_rss_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            value = _process_tree_rss_kb(os.getpid())
+            if value is not None:
+                self.peak_tree_rss_kb = max(self.peak_tree_rss_kb, value)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def result(self) -> Dict:
+        # Linux 下 ru_maxrss 单位为 KB，macOS 为字节
+        scale = 1024 if platform.system() == "Darwin" else 1
+        self_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+        child_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale
+        return {
+            "peak_rss_mb": round(self_peak / 1024, 1),
+            "peak_child_rss_mb": round(child_peak / 1024, 1),
+            "peak_process_tree_rss_mb": round(self.peak_tree_rss_kb / 1024, 1) if self.peak_tree_rss_kb else None,
+        }
+
+
+# ---------------------------------------------------------------------------
+# 阶段计时
+# ---------------------------------------------------------------------------
+
+class StageTimer:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def wrap(self, obj, attr: str, stage: str):
+        original = getattr(obj, attr)
+        timer = self
+
+        if asyncio.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                except Exception:
+                    timer.errors[stage] = timer.errors.get(stage, 0) + 1
+                    raise
+                finally:
+                    timer.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        else:
+            @functools.wraps(original)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                except Exception:
+                    timer.errors[stage] = timer.errors.get(stage, 0) + 1
+                    raise
+                finally:
+                    timer.samples.setdefault(stage, []).append(time.perf_counter() - start)
+
+        setattr(obj, attr, timed)
+
+
+class BrowserCounter:
+    """统计 AsyncWebCrawler 的启动次数与最大并发数
+
+    爬虫服务在方法内部 `from crawl4ai import AsyncWebCrawler`，每次调用时从 crawl4ai 模块取属性，
+    因此替换 crawl4ai 模块上的类即可生效。
+    """
+
+    def __init__(self):
+        self.launched = 0
+        self.active = 0
+        self.peak_active = 0
+
+    def patch(self, module):
+        counter = self
+        base = module.AsyncWebCrawler
+
+        class CountingCrawler(base):
+            async def __aenter__(self):
+                counter.launched += 1
+                counter.active += 1
+                counter.peak_active = max(counter.peak_active, counter.active)
+                return await super().__aenter__()
+
+            async def __aexit__(self, *exc):
+                counter.active -= 1
+                return await super().__aexit__(*exc)
+
+        module.AsyncWebCrawler = CountingCrawler
+
+
+# ---------------------------------------------------------------------------
+# 主流程
+# ---------------------------------------------------------------------------
+
+async def run_benchmark(args, fixture_base: str, sites: List[Dict]) -> Dict:
+    # 环境变量必须在导入 app 模块之前设置好
+    from app.db.database import create_tables
+    import crawl4ai
+    from app.services.crawler import NewsCrawlerService
+
+    create_tables()
+
+    browsers = BrowserCounter()
+    browsers.patch(crawl4ai)
+
+    service = NewsCrawlerService()
+    sources = [{"name": s["name"], "url": fixture_base + s["path"], "category": s["category"]} for s in sites]
+
+    async def fixture_sources():
+        return sources
+
+    service._get_news_sources = fixture_sources
+
+    timer = StageTimer()
+    timer.wrap(service, "_fetch_homepage", "homepage_fetch")
+    timer.wrap(service, "crawl_url", "article_fetch")
+    timer.wrap(service, "_save_news", "db_save")
+    timer.wrap(service, "_process_single_article", "article_total")
+    ai = service.ai_service
+    timer.wrap(ai, "extract_main_content", "llm_extract")
+    timer.wrap(ai, "is_relevant_content", "llm_relevance")
+    timer.wrap(ai, "calculate_importance", "llm_score")
+    timer.wrap(ai, "generate_summary", "llm_summary")
+    timer.wrap(ai, "classify_news", "llm_classify")
+
+    sampler = ResourceSampler()
+    sampler.start()
+    start = time.perf_counter()
+    saved = await service.discover_news()
+    wall = time.perf_counter() - start
+    sampler.stop()
+
+    attempted = len(timer.samples.get("article_total", []))
+    return {
+        "wall_seconds": round(wall, 3),
+        "articles_attempted": attempted,
+        "articles_saved": len(saved),
+        "articles_per_second": round(len(saved) / wall, 3) if wall else None,
+        "attempts_per_second": round(attempted / wall, 3) if wall else None,
+        "stages": {stage: _summarize(samples) for stage, samples in sorted(timer.samples.items())},
+        "stage_errors": timer.errors,
+        "browsers": {"launched": browsers.launched, "peak_concurrent": browsers.peak_active},
+        "resources": sampler.result(),
+        "model_health": ai.get_model_health(),
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """对比两次结果，返回超过阈值的退化项"""
+    regressions = []
+    base_tp, cur_tp = baseline.get("articles_per_second"), current.get("articles_per_second")
+    if base_tp and cur_tp is not None and cur_tp < base_tp * (1 - threshold):
+        regressions.append(f"articles_per_second: {base_tp} -> {cur_tp}")
+    for stage, stats in current.get("stages", {}).items():
+        base_stats = baseline.get("stages", {}).get(stage)
+        if not base_stats:
+            continue
+        for key in ("p50", "p95"):
+            before, after = base_stats.get(key), stats.get(key)
+            if before and after is not None and after > before * (1 + threshold):
+                regressions.append(f"{stage}.{key}: {before}s -> {after}s")
+    base_rss = baseline.get("resources", {}).get("peak_rss_mb")
+    cur_rss = current.get("resources", {}).get("peak_rss_mb")
+    if base_rss and cur_rss and cur_rss > base_rss * (1 + threshold):
+        regressions.append(f"peak_rss_mb: {base_rss} -> {cur_rss}")
+    return regressions
+
+
+def print_report(result: Dict):
+    print(f"\n耗时 {result['wall_seconds']}s，尝试 {result['articles_attempted']} 篇，"
+          f"保存 {result['articles_saved']} 篇，吞吐 {result['articles_per_second']} 篇/秒")
+    print(f"{'阶段':<16}{'次数':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for stage, stats in result["stages"].items():
+        cells = "".join(f"{str(stats[key]):>10}" for key in ("p50", "p95", "p99", "max"))
+        print(f"{stage:<16}{stats['count']:>6}{cells}")
+    print(f"浏览器: {result['browsers']}")
+    print(f"资源: {result['resources']}")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="端到端抓取入库吞吐基准测试")
+    parser.add_argument("--sources", type=int, default=3, help="合成新闻源数量")
+    parser.add_argument("--articles", type=int, default=10, help="每个新闻源的文章数量 (discover_news 每源最多处理 10 篇)")
+    parser.add_argument("--paragraphs", type=int, default=12, help="每篇文章的段落数")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="桩服务平均延迟（秒）")
+    parser.add_argument("--llm-latency-dist", default="lognormal")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="用于对比的历史结果 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="判定退化的相对阈值")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    workdir = tempfile.mkdtemp(prefix="bench_ingest_")
+    sites = build_corpus(os.path.join(workdir, "www"), args.sources, args.articles, args.paragraphs)
+    fixture_server = start_fixture_server(os.path.join(workdir, "www"))
+    fixture_base = f"http://127.0.0.1:{fixture_server.server_address[1]}"
+
+    from tools.openrouter_stub import StubConfig
+
+    stub_port = _free_port()
+    start_stub_server(stub_port, StubConfig(
+        latency_dist=args.llm_latency_dist,
+        latency_mean=args.llm_latency,
+        error_rate=args.llm_error_rate,
+        rate_limit_rate=args.llm_rate_limit_rate,
+        irrelevant_rate=0.0,
+        seed=args.seed,
+    ))
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["OPENROUTER_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+    os.environ.setdefault("OPENROUTER_API_KEY", "stub")
+
+    result = asyncio.run(run_benchmark(args, fixture_base, sites))
+    result["meta"] = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": vars(args),
+    }
+    fixture_server.shutdown()
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print("性能退化:")
+            for item in regressions:
+                print(f"  - {item}")
+            sys.exit(1)
+        print("未发现超过阈值的性能退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+存储配置档并发读写基准测试
+
+一个写线程模拟爬虫持续批量入库，同时多个读线程反复执行新闻列表查询，
+统计读延迟分位数、写吞吐以及 "database is locked" 等锁冲突次数。
+用于对比不同存储配置档（例如 SQLite WAL 与回滚日志模式、Postgres 连接池参数）。
+
+用法（在 backend 目录下）:
+    python -m tools.bench_storage --seconds 20 --readers 8 --output wal.json
+    SQLITE_JOURNAL_MODE=DELETE SQLITE_SYNCHRONOUS=FULL python -m tools.bench_storage --output delete.json
+
+未设置 DATABASE_URL 时使用临时 SQLite 文件；指向 Postgres 时会写入真实数据库，请使用测试库。
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from tools.bench_ingest import _summarize
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="存储配置档并发读写基准测试")
+    parser.add_argument("--seconds", type=float, default=15.0, help="测试时长")
+    parser.add_argument("--readers", type=int, default=8, help="并发读线程数")
+    parser.add_argument("--seed-rows", type=int, default=20000, help="预先写入的新闻行数")
+    parser.add_argument("--batch", type=int, default=10, help="写线程每个事务写入的新闻数")
+    parser.add_argument("--write-interval", type=float, default=0.0, help="两次写事务之间的间隔（秒）")
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    return parser.parse_args()
+
+
+def _make_news(News, categories, now: datetime, index: int):
+    news = News(
+        title=f"存储基准新闻 {index}",
+        summary="摘要 " * 20,
+        content="正文内容 " * 400,
+        source="bench",
+        url=f"https://bench.local/{uuid.uuid4().hex}",
+        published_at=now - timedelta(minutes=random.randint(0, 7 * 24 * 60)),
+        importance_score=round(random.uniform(1, 10), 1),
+        raw_html="<html></html>",
+    )
+    news.categories.append(random.choice(categories))
+    return news
+
+
+def main():
+    args = _parse_args()
+    if not os.getenv("DATABASE_URL"):
+        workdir = tempfile.mkdtemp(prefix="bench_storage_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from sqlalchemy.exc import OperationalError
+    from app.db.database import SessionLocal, create_tables, DB_PROFILE_NAME, engine
+    from app.models.news import News
+    from app.models.category import Category
+    from app.services.news_reader import build_list_query, SORT_COLUMNS
+    from app.config import SQLITE_PRAGMAS, POSTGRES_POOL
+
+    create_tables()
+    now = datetime.now()
+    db = SessionLocal()
+    categories = [Category(name=f"bench-{i}") for i in range(8)]
+    db.add_all(categories)
+    db.commit()
+    for start in range(0, args.seed_rows, 1000):
+        db.add_all(_make_news(News, categories, now, i) for i in range(start, min(start + 1000, args.seed_rows)))
+        db.commit()
+    category_names = [c.name for c in categories]
+    db.close()
+
+    stop = threading.Event()
+    read_latencies: List[float] = []
+    write_latencies: List[float] = []
+    errors: Dict[str, int] = {"read_locked": 0, "write_locked": 0, "read_other": 0, "write_other": 0}
+    written = [0]
+    lock = threading.Lock()
+
+    def reader():
+        session = SessionLocal()
+        while not stop.is_set():
+            category = random.choice(category_names + [None])
+            stmt = build_list_query(category, 0, 7).order_by(*(c.desc() for c in SORT_COLUMNS)).limit(20)
+            start = time.perf_counter()
+            try:
+                session.execute(stmt).all()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    read_latencies.append(elapsed)
+            except OperationalError as e:
+                session.rollback()
+                with lock:
+                    errors["read_locked" if "locked" in str(e) else "read_other"] += 1
+        session.close()
+
+    def writer():
+        session = SessionLocal()
+        writer_categories = session.query(Category).filter(Category.name.in_(category_names)).all()
+        index = args.seed_rows
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                session.add_all(_make_news(News, writer_categories, datetime.now(), index + i)
+                                for i in range(args.batch))
+                session.commit()
+                elapsed = time.perf_counter() - start
+                index += args.batch
+                with lock:
+                    write_latencies.append(elapsed)
+                    written[0] += args.batch
+            except OperationalError as e:
+                session.rollback()
+                with lock:
+                    errors["write_locked" if "locked" in str(e) else "write_other"] += 1
+            if args.write_interval:
+                time.sleep(args.write_interval)
+        session.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+    begin = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - begin
+
+    result = {
+        "profile": DB_PROFILE_NAME,
+        "database": engine.url.render_as_string(hide_password=True),
+        "settings": SQLITE_PRAGMAS if DB_PROFILE_NAME == "sqlite" else POSTGRES_POOL,
+        "wall_seconds": round(wall, 3),
+        "reads_per_second": round(len(read_latencies) / wall, 1),
+        "read_latency": _summarize(read_latencies),
+        "rows_written_per_second": round(written[0] / wall, 1),
+        "write_txn_latency": _summarize(write_latencies),
+        "errors": errors,
+        "params": vars(args),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+读接口压测：按目标 RPS 以开环方式驱动新闻列表、详情、浏览历史、信息流与订阅接口
+
+配合 tools/seed_dataset.py 生成的数据集使用：用户和新闻ID由数据集的种子还原，
+不需要直连数据库。请求按固定节奏发出（不因服务端变慢而减速），延迟从计划发出时刻算起，
+避免 "协调遗漏" 低估尾延迟；同时单独统计从真正发出到收到响应的服务时间。
+压测前后各抓取一次 /metrics，按路由给出服务端耗时、数据库耗时与 SQL 语句数。
+
+用法（在 backend 目录下，先启动后端）:
+    python -m tools.seed_dataset --news 1000000 --history 10000000 --output seed.json
+    python -m tools.load_test --dataset seed.json --rps 200 --duration 60 --output baseline.json
+    python -m tools.load_test --dataset seed.json --rps 200 --output new.json --compare baseline.json
+
+--compare 会与之前的结果对比，超过 --threshold 的退化以非零退出码返回。
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from tools.bench_ingest import _summarize
+from tools.seed_dataset import NS_NEWS, NS_USER, _recent_index, seeded_id
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# 场景 -> 权重：大致对应前端的访问比例
+SCENARIO_WEIGHTS = {
+    "news_list": 30,
+    "news_list_category": 15,
+    "news_list_hot": 10,
+    "news_list_cursor": 10,
+    "news_detail": 15,
+    "history": 8,
+    "feed": 8,
+    "subscriptions": 4,
+}
+CURSOR_POOL_SIZE = 200
+_SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$')
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+class Workload:
+    """按数据集参数生成请求：活跃用户与近期新闻的分布与生成器一致"""
+
+    def __init__(self, seed: int, users: int, news: int, categories: List[str], rng: random.Random):
+        self.seed = seed
+        self.users = users
+        self.news = news
+        self.categories = categories
+        self.rng = rng
+        self.cursors: List[str] = []
+
+    def user_id(self) -> str:
+        return seeded_id(self.seed, NS_USER, int(self.users * self.rng.random() ** 2))
+
+    def news_id(self) -> str:
+        return seeded_id(self.seed, NS_NEWS, _recent_index(self.news, self.rng))
+
+    def request(self, scenario: str) -> Tuple[str, Dict]:
+        rng = self.rng
+        if scenario == "news_list_category" and self.categories:
+            return "/api/news", {"category": rng.choice(self.categories), "days": rng.choice((1, 7, 30))}
+        if scenario == "news_list_hot":
+            return "/api/news", {"sort": "hot"}
+        if scenario == "news_list_cursor" and self.cursors:
+            return "/api/news", {"cursor": rng.choice(self.cursors)}
+        if scenario == "news_detail":
+            return f"/api/news/{self.news_id()}", {}
+        if scenario == "history":
+            return "/api/history/", {"user_id": self.user_id()}
+        if scenario == "feed":
+            return "/api/feed", {"user_id": self.user_id()}
+        if scenario == "subscriptions":
+            return f"/api/subscriptions/{self.user_id()}", {}
+        return "/api/news", {"days": rng.choice((1, 7, 30)), "min_score": rng.choice((0, 0, 5))}
+
+    def remember_cursor(self, cursor: Optional[str]):
+        if not cursor:
+            return
+        if len(self.cursors) < CURSOR_POOL_SIZE:
+            self.cursors.append(cursor)
+        else:
+            self.cursors[self.rng.randrange(CURSOR_POOL_SIZE)] = cursor
+
+
+class Recorder:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.service: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.skipped = 0
+
+    def record(self, scenario: str, status: str, latency: float, service: float):
+        self.latency[scenario].append(latency)
+        self.service[scenario].append(service)
+        self.statuses[scenario][status] += 1
+
+    def summary(self, wall: float) -> Dict:
+        scenarios = {}
+        for scenario in sorted(self.latency):
+            statuses = dict(self.statuses[scenario])
+            count = sum(statuses.values())
+            errors = sum(n for status, n in statuses.items() if not status.startswith(("2", "3")))
+            scenarios[scenario] = {
+                "requests": count,
+                "rps": round(count / wall, 1),
+                "error_rate": round(errors / count, 4) if count else 0.0,
+                "statuses": statuses,
+                "latency": _summarize(self.latency[scenario]),
+                "service_time": _summarize(self.service[scenario]),
+            }
+        total = sum(len(samples) for samples in self.latency.values())
+        return {
+            "requests": total,
+            "achieved_rps": round(total / wall, 1),
+            "skipped": self.skipped,
+            "latency": _summarize([x for samples in self.latency.values() for x in samples]),
+            "scenarios": scenarios,
+        }
+
+
+def parse_prometheus(text: str) -> Dict[Tuple[str, Tuple], float]:
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE_RE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        key = tuple(sorted(_LABEL_RE.findall(labels or "")))
+        try:
+            samples[(name, key)] = float(value.replace("+Inf", "inf"))
+        except ValueError:
+            continue
+    return samples
+
+
+async def scrape_metrics(client: httpx.AsyncClient) -> Optional[Dict]:
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return None
+    return parse_prometheus(response.text) if response.status_code == 200 else None
+
+
+def server_breakdown(before: Optional[Dict], after: Optional[Dict]) -> Optional[Dict]:
+    """两次 /metrics 之差：按路由的请求数、平均服务端耗时、数据库耗时与 SQL 语句数"""
+    if before is None or after is None:
+        return None
+
+    def delta(name: str) -> Dict[Tuple, float]:
+        result: Dict[Tuple, float] = defaultdict(float)
+        for (sample_name, labels), value in after.items():
+            label_map = dict(labels)
+            if sample_name != name or label_map.get("route") in (None, "/metrics"):
+                continue
+            result[(label_map.get("method"), label_map["route"])] += value - before.get((sample_name, labels), 0.0)
+        return result
+
+    counts = delta("http_request_duration_seconds_count")
+    durations = delta("http_request_duration_seconds_sum")
+    db_seconds = delta("http_request_db_seconds_sum")
+    queries = delta("http_request_db_queries_sum")
+    routes = {}
+    for (method, route), count in sorted(counts.items(), key=lambda item: -item[1]):
+        if count <= 0:
+            continue
+        routes[f"{method} {route}"] = {
+            "requests": int(count),
+            "mean_seconds": round(durations[(method, route)] / count, 5),
+            "mean_db_seconds": round(db_seconds[(method, route)] / count, 5),
+            "db_share": round(db_seconds[(method, route)] / durations[(method, route)], 3)
+            if durations[(method, route)] else None,
+            "queries_per_request": round(queries[(method, route)] / count, 2),
+        }
+
+    def total(name: str) -> float:
+        return sum(value - before.get((sample_name, labels), 0.0)
+                   for (sample_name, labels), value in after.items() if sample_name == name)
+
+    lag_count = total("event_loop_lag_seconds_count")
+    return {
+        "routes": routes,
+        "event_loop_lag_mean_seconds": round(total("event_loop_lag_seconds_sum") / lag_count, 5) if lag_count else None,
+        "db_queries": int(total("db_queries_total")),
+    }
+
+
+async def drive(client: httpx.AsyncClient, workload: Workload, rps: float, seconds: float,
+                max_in_flight: int, recorder: Optional[Recorder]):
+    """开环发压：第 i 个请求计划在 start + i / rps 发出，在途请求超过上限时跳过并计数"""
+    scenarios = list(SCENARIO_WEIGHTS)
+    weights = [SCENARIO_WEIGHTS[s] for s in scenarios]
+    loop = asyncio.get_running_loop()
+    in_flight = set()
+
+    async def one(scenario: str, scheduled: float):
+        path, params = workload.request(scenario)
+        sent = loop.time()
+        try:
+            response = await client.get(path, params=params)
+            status = str(response.status_code)
+            if path == "/api/news":
+                workload.remember_cursor(response.headers.get(NEXT_CURSOR_HEADER))
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        done = loop.time()
+        if recorder is not None:
+            recorder.record(scenario, status, done - scheduled, done - sent)
+
+    start = loop.time()
+    index = 0
+    while True:
+        scheduled = start + index / rps
+        if scheduled - start >= seconds:
+            break
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        index += 1
+        if len(in_flight) >= max_in_flight:
+            if recorder is not None:
+                recorder.skipped += 1
+            continue
+        task = asyncio.create_task(one(workload.rng.choices(scenarios, weights)[0], scheduled))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def run_load_test(args, seed: int, users: int, news: int) -> Dict:
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        categories = [c["name"] for c in (await client.get("/api/categories")).json()]
+        workload = Workload(seed, users, news, categories, random.Random(args.seed_requests))
+        if args.warmup:
+            print(f"预热 {args.warmup}s ...", flush=True)
+            await drive(client, workload, args.rps, args.warmup, args.max_in_flight, None)
+        before = await scrape_metrics(client)
+        recorder = Recorder()
+        print(f"压测 {args.duration}s，目标 {args.rps} RPS ...", flush=True)
+        begin = time.perf_counter()
+        await drive(client, workload, args.rps, args.duration, args.max_in_flight, recorder)
+        wall = time.perf_counter() - begin
+        after = await scrape_metrics(client)
+    result = recorder.summary(wall)
+    result["wall_seconds"] = round(wall, 2)
+    result["target_rps"] = args.rps
+    result["server"] = server_breakdown(before, after)
+    return result
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """对比两次结果，返回超过阈值的退化项"""
+    regressions = []
+    for scenario, stats in current.get("scenarios", {}).items():
+        base_stats = baseline.get("scenarios", {}).get(scenario)
+        if not base_stats:
+            continue
+        for key in ("p50", "p95", "p99"):
+            before, after = base_stats["latency"].get(key), stats["latency"].get(key)
+            if before and after is not None and after > before * (1 + threshold):
+                regressions.append(f"{scenario}.{key}: {before}s -> {after}s")
+        if stats["error_rate"] > base_stats["error_rate"] + 0.01:
+            regressions.append(f"{scenario}.error_rate: {base_stats['error_rate']} -> {stats['error_rate']}")
+    # 目标 RPS 可能不同，按实际/目标的比例比较
+    base_ratio = baseline["achieved_rps"] / baseline["target_rps"] if baseline.get("target_rps") else None
+    cur_ratio = current["achieved_rps"] / current["target_rps"]
+    if base_ratio and cur_ratio < base_ratio * (1 - threshold):
+        regressions.append(f"achieved_rps / target_rps: {base_ratio:.2f} -> {cur_ratio:.2f}")
+    return regressions
+
+
+def print_report(result: Dict):
+    print(f"\n耗时 {result['wall_seconds']}s，请求 {result['requests']} 次，"
+          f"实际 {result['achieved_rps']} RPS（目标 {result['target_rps']}），跳过 {result['skipped']} 次")
+    print(f"{'场景':<22}{'次数':>7}{'错误率':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for scenario, stats in result["scenarios"].items():
+        cells = "".join(f"{str(stats['latency'][key]):>9}" for key in ("p50", "p95", "p99", "max"))
+        print(f"{scenario:<22}{stats['requests']:>7}{stats['error_rate']:>8}{cells}")
+    server = result.get("server")
+    if server is None:
+        print("未能读取服务端 /metrics，跳过数据库耗时统计")
+        return
+    print(f"\n{'路由':<40}{'次数':>7}{'平均耗时':>10}{'DB耗时':>10}{'DB占比':>8}{'SQL/次':>8}")
+    for route, stats in server["routes"].items():
+        print(f"{route:<40}{stats['requests']:>7}{stats['mean_seconds']:>10}{stats['mean_db_seconds']:>10}"
+              f"{str(stats['db_share']):>8}{stats['queries_per_request']:>8}")
+    print(f"事件循环平均延迟: {server['event_loop_lag_mean_seconds']}s，SQL 语句总数: {server['db_queries']}")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="读接口压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="后端地址")
+    parser.add_argument("--dataset", help="seed_dataset --output 写出的摘要 JSON，用于还原用户和新闻ID")
+    parser.add_argument("--seed", type=int, default=42, help="数据集种子（未指定 --dataset 时使用）")
+    parser.add_argument("--users", type=int, default=50000, help="数据集用户数（未指定 --dataset 时使用）")
+    parser.add_argument("--news", type=int, default=1000000, help="数据集新闻数（未指定 --dataset 时使用）")
+    parser.add_argument("--rps", type=float, default=100.0, help="目标每秒请求数")
+    parser.add_argument("--duration", type=float, default=60.0, help="压测时长（秒）")
+    parser.add_argument("--warmup", type=float, default=5.0, help="预热时长（秒），不计入结果")
+    parser.add_argument("--connections", type=int, default=64, help="HTTP 连接池大小")
+    parser.add_argument("--max-in-flight", type=int, default=512, help="在途请求上限，超过时跳过并计数")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单个请求超时（秒）")
+    parser.add_argument("--seed-requests", type=int, default=1, help="请求序列的随机种子")
+    parser.add_argument("--output", help="结果 JSON 输出路径")
+    parser.add_argument("--compare", help="用于对比的历史结果 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="判定退化的相对阈值")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    seed, users, news = args.seed, args.users, args.news
+    if args.dataset:
+        with open(args.dataset, encoding="utf-8") as f:
+            params = json.load(f)["params"]
+        seed, users, news = params["seed"], params["users"], params["news"]
+
+    result = asyncio.run(run_load_test(args, seed, users, news))
+    result["meta"] = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "dataset": {"seed": seed, "users": users, "news": news},
+        "params": vars(args),
+    }
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print("性能退化:")
+            for item in regressions:
+                print(f"  - {item}")
+            sys.exit(1)
+        print("未发现超过阈值的性能退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+本地 OpenRouter / OpenAI chat-completions 兼容桩服务，用于离线压测
+
+用法（在 backend 目录下）:
+    python -m tools.openrouter_stub --port 8001 --latency-dist lognormal --latency-mean 0.8 \\
+        --rate-limit-rate 0.02 --error-rate 0.01
+
+然后让后端指向它:
+    OPENROUTER_BASE_URL=http://127.0.0.1:8001/v1 OPENROUTER_API_KEY=stub uvicorn app.main:app
+
+按 prompt 类型（正文提取 / 相关性判断 / 重要性评分 / 摘要 / 分类）返回确定性的答案：
+同一个 prompt 每次得到相同的结果，便于对比不同版本的压测数据。
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CANDIDATE_CATEGORIES = ["科技", "商业", "国际", "政治", "社会", "体育", "文化", "健康", "环境"]
+
+
+@dataclass
+class StubConfig:
+    """桩服务行为配置"""
+    latency_dist: str = "fixed"        # fixed / uniform / normal / lognormal
+    latency_mean: float = 0.2          # 秒
+    latency_sigma: float = 0.5         # normal 为标准差（秒），lognormal 为对数标准差
+    latency_min: float = 0.0
+    latency_max: float = 30.0
+    per_token_ms: float = 0.0          # 每个输出 token 额外的生成耗时（毫秒）
+    error_rate: float = 0.0            # 返回 500 的概率
+    rate_limit_rate: float = 0.0       # 返回 429 的概率
+    timeout_rate: float = 0.0          # 挂起 hang_seconds 秒（模拟上游超时）的概率
+    hang_seconds: float = 120.0
+    irrelevant_rate: float = 0.1       # 相关性判断返回 "否" 的比例（按 prompt 哈希确定）
+    task_latency: Dict[str, float] = field(default_factory=dict)  # 按任务覆盖平均延迟
+    seed: Optional[int] = None
+
+
+class StubStats:
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.injected: Dict[str, int] = {}
+        self.started_at = time.time()
+
+    def count(self, bucket: Dict[str, int], key: str):
+        bucket[key] = bucket.get(key, 0) + 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "injected": self.injected,
+            "uptime": round(time.time() - self.started_at, 3),
+        }
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:12], 16)
+
+
+def _estimate_tokens(text: str) -> int:
+    """粗略估算 token：中文按字计，其余按 4 字符 1 token"""
+    cjk = len(re.findall(r'[一-鿿]', text))
+    return max(1, cjk + (len(text) - cjk) // 4)
+
+
+def detect_task(prompt: str) -> str:
+    """根据 ai_processor 中的 prompt 模板识别任务类型"""
+    if "提取的文章正文" in prompt:
+        return "extract"
+    if "是否为单篇新闻文章" in prompt:
+        return "relevance"
+    if "重要性评分" in prompt:
+        return "score"
+    if "候选分类" in prompt:
+        return "classify"
+    if "摘要" in prompt:
+        return "summary"
+    return "other"
+
+
+def _section(prompt: str, start_marker: str, end_marker: Optional[str] = None) -> str:
+    start = prompt.find(start_marker)
+    if start < 0:
+        return prompt
+    text = prompt[start + len(start_marker):]
+    if end_marker:
+        end = text.rfind(end_marker)
+        if end >= 0:
+            text = text[:end]
+    return text.strip()
+
+
+def canned_answer(task: str, prompt: str, config: StubConfig) -> str:
+    """为每类 prompt 生成确定性的答案"""
+    digest = _digest(prompt)
+    if task == "extract":
+        body = _section(prompt, "原始 Markdown:", "提取的文章正文:").strip("-\n ")
+        # 去掉 Markdown 链接行，模拟正文提取
+        lines = [line.strip() for line in body.splitlines()]
+        kept = [line for line in lines if line and not re.match(r'^(\[.*\]\(.*\)|[*-] \[)', line)]
+        return "\n".join(kept) or body
+    if task == "relevance":
+        return "否" if (digest % 1000) / 1000 < config.irrelevant_rate else "是"
+    if task == "score":
+        return f"{1 + (digest % 91) / 10:.1f}"
+    if task == "classify":
+        first = CANDIDATE_CATEGORIES[digest % len(CANDIDATE_CATEGORIES)]
+        second = CANDIDATE_CATEGORIES[(digest // 7) % len(CANDIDATE_CATEGORIES)]
+        return first if first == second else f"{first},{second}"
+    if task == "summary":
+        body = _section(prompt, "文章内容:", "摘要:")
+        sentences = [s.strip() for s in re.split(r'[。！？!?.\n]', body) if s.strip()]
+        return ("。".join(sentences[:2]) + "。")[:150] if sentences else "桩服务摘要。"
+    return "OK"
+
+
+class OpenRouterStub:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.stats = StubStats()
+        self.rng = random.Random(config.seed)
+
+    def sample_latency(self, task: str, completion_tokens: int) -> float:
+        cfg = self.config
+        mean = cfg.task_latency.get(task, cfg.latency_mean)
+        if cfg.latency_dist == "uniform":
+            value = self.rng.uniform(max(cfg.latency_min, mean - cfg.latency_sigma), mean + cfg.latency_sigma)
+        elif cfg.latency_dist == "normal":
+            value = self.rng.gauss(mean, cfg.latency_sigma)
+        elif cfg.latency_dist == "lognormal":
+            # 使分布的中位数等于 mean，sigma 控制长尾
+            value = self.rng.lognormvariate(0, cfg.latency_sigma) * mean
+        else:
+            value = mean
+        value += completion_tokens * cfg.per_token_ms / 1000
+        return min(cfg.latency_max, max(cfg.latency_min, value))
+
+    def inject_fault(self) -> Optional[str]:
+        roll = self.rng.random()
+        cfg = self.config
+        if roll < cfg.rate_limit_rate:
+            return "rate_limit"
+        roll -= cfg.rate_limit_rate
+        if roll < cfg.error_rate:
+            return "error"
+        roll -= cfg.error_rate
+        if roll < cfg.timeout_rate:
+            return "timeout"
+        return None
+
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    """创建桩服务 FastAPI 应用（也可由压测脚本在进程内启动）"""
+    stub = OpenRouterStub(config or StubConfig())
+    app = FastAPI(title="OpenRouter Stub")
+    app.state.stub = stub
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "stub-model", "object": "model", "owned_by": "stub"}]}
+
+    @app.get("/stub/stats")
+    async def get_stats():
+        return {**stub.stats.to_dict(), "config": asdict(stub.config)}
+
+    @app.post("/stub/config")
+    async def update_config(request: Request):
+        """运行时调整桩服务配置（只更新传入的字段）"""
+        updates = await request.json()
+        for key, value in updates.items():
+            if hasattr(stub.config, key):
+                setattr(stub.config, key, value)
+        return asdict(stub.config)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        prompt = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "user")
+        model = body.get("model", "stub-model")
+        max_tokens = int(body.get("max_tokens") or 256)
+        task = detect_task(prompt)
+        stub.stats.count(stub.stats.requests, task)
+
+        fault = stub.inject_fault()
+        if fault:
+            stub.stats.count(stub.stats.injected, fault)
+        if fault == "rate_limit":
+            await asyncio.sleep(stub.sample_latency(task, 0) * 0.1)
+            return JSONResponse(
+                status_code=429,
+                headers={"Retry-After": "1"},
+                content={"error": {"message": "Rate limit exceeded (stub)", "type": "rate_limit", "code": 429}},
+            )
+        if fault == "error":
+            await asyncio.sleep(stub.sample_latency(task, 0) * 0.5)
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Internal error (stub)", "type": "server_error", "code": 500}},
+            )
+        if fault == "timeout":
+            await asyncio.sleep(stub.config.hang_seconds)
+
+        answer = canned_answer(task, prompt, stub.config)
+        # 按 max_tokens 截断（粗略按字符数）
+        answer = answer[: max_tokens * 4]
+        prompt_tokens = _estimate_tokens(prompt)
+        completion_tokens = _estimate_tokens(answer)
+        await asyncio.sleep(stub.sample_latency(task, completion_tokens))
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        if body.get("stream"):
+            async def event_stream():
+                chunk_size = 16
+                for i in range(0, len(answer), chunk_size):
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {"content": answer[i:i + chunk_size]}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                final = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "usage": usage,
+                }
+                yield f"data: {json.dumps(final, ensure_ascii=False)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    return app
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="本地 OpenRouter 兼容桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-dist", default="fixed", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--latency-mean", type=float, default=0.2, help="平均/中位延迟（秒）")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--per-token-ms", type=float, default=0.0, help="每个输出 token 的额外耗时（毫秒）")
+    parser.add_argument("--task-latency", default="{}", help='按任务覆盖平均延迟，JSON，如 {"extract": 2.0}')
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=120.0)
+    parser.add_argument("--irrelevant-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = _parse_args()
+    stub_config = StubConfig(
+        latency_dist=args.latency_dist,
+        latency_mean=args.latency_mean,
+        latency_sigma=args.latency_sigma,
+        per_token_ms=args.per_token_ms,
+        task_latency=json.loads(args.task_latency),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        irrelevant_rate=args.irrelevant_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(stub_config), host=args.host, port=args.port, log_level="warning")
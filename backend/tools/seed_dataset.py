@@ -0,0 +1,287 @@
+"""
+合成数据集生成器：按生产规模填充用户、新闻（含分类）、浏览历史、订阅与信息流
+
+用于在接近真实数据量的库上压测读接口 (tools/load_test.py)。生成结果由 --seed 决定：
+同一个种子得到相同的 ID 和分布，便于在不同版本之间对比。
+
+用法（在 backend 目录下）:
+    python -m tools.seed_dataset --news 1000000 --history 10000000 --users 50000
+    DATABASE_URL=postgresql://bench@localhost/bench python -m tools.seed_dataset --news 200000
+
+分布:
+  - 新闻发布时间按序号递增地分布在最近 --days 天内，重要性评分近似正态（均值 5.5）
+  - 浏览历史偏向近期新闻与少数活跃用户（幂律），浏览时间晚于发布时间
+  - 每个用户订阅 1 ~ --max-subscriptions 个分类，信息流为所订阅分类中最近的新闻
+
+直接用批量 INSERT 写入，不经过新闻写入器和监听器；写入后不会建立向量索引和事件簇。
+未设置 DATABASE_URL 时写入 ./news.db，请勿指向生产库。
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+PARAGRAPHS = [
+    "人工智能公司周二宣布完成新一轮融资，估值较上一轮翻倍，投资方包括多家知名机构。",
+    "The company said the new funding will be used to expand its research team and build more data centers.",
+    "分析人士认为，这一轮融资反映出资本市场对大模型应用落地的持续看好。",
+    "Regulators in several countries are drafting rules to govern how such models are trained and deployed.",
+    "与此同时，多家竞争对手也在加快产品发布节奏，行业竞争进一步加剧。",
+    "Shares of chipmakers rose after the announcement, extending gains from earlier in the week.",
+    "公司创始人在接受采访时表示，未来一年将重点投入企业级市场和海外业务。",
+    "Critics warned that the rapid pace of investment could lead to overcapacity in the sector.",
+]
+CATEGORY_NAMES = ["国际", "财经", "科技", "人工智能", "创投", "消费", "医疗健康", "汽车", "能源", "教育", "文化", "体育"]
+BATCH_SIZE = 5000
+
+# 各表在 ID 里使用的命名空间，保证同一种子下不同表的 ID 不冲突
+NS_NEWS, NS_USER, NS_CATEGORY, NS_SUBSCRIPTION = 1, 2, 3, 4
+
+
+def seeded_id(seed: int, namespace: int, index: int) -> str:
+    """由种子、表和序号确定的 UUID，生成过程中无需保存全部ID"""
+    return str(uuid.UUID(int=(seed & 0xFFFFFFFF) << 96 | namespace << 64 | index))
+
+
+class Progress:
+    def __init__(self, label: str, total: int):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+        self.last_report = 0.0
+
+    def add(self, count: int):
+        self.done += count
+        now = time.perf_counter()
+        if now - self.last_report >= 5 or self.done >= self.total:
+            self.last_report = now
+            elapsed = now - self.started
+            rate = self.done / elapsed if elapsed else 0
+            print(f"  {self.label}: {self.done}/{self.total} ({rate:,.0f} 行/秒)", flush=True)
+
+
+def _insert(conn, table, rows: List[Dict], progress: Progress):
+    if rows:
+        conn.execute(table.insert(), rows)
+        progress.add(len(rows))
+
+
+def _published_at(now: datetime, index: int, total: int, days: int) -> datetime:
+    """序号越大发布越晚；按序号带 ±5 分钟的确定性抖动，避免时间完全等距，浏览历史和信息流可据此还原"""
+    span = days * 86400
+    offset = span * (total - 1 - index) / max(1, total - 1)
+    jitter = (index * 2654435761) % 600 - 300
+    return now - timedelta(seconds=max(0.0, offset + jitter))
+
+
+def _recent_index(total: int, rng: random.Random, skew: float = 3.0) -> int:
+    """偏向近期（序号大）的新闻"""
+    return total - 1 - int(total * rng.random() ** skew)
+
+
+def seed_categories(conn, tables, seed: int, count: int) -> List[str]:
+    existing = dict(conn.execute(tables["categories"].select().with_only_columns(
+        tables["categories"].c.name, tables["categories"].c.id)).all())
+    names = (CATEGORY_NAMES + [f"分类{i}" for i in range(len(CATEGORY_NAMES), count)])[:count]
+    rows = [{"id": seeded_id(seed, NS_CATEGORY, i), "name": name, "description": None}
+            for i, name in enumerate(names) if name not in existing]
+    if rows:
+        conn.execute(tables["categories"].insert(), rows)
+    existing.update({row["name"]: row["id"] for row in rows})
+    return [existing[name] for name in names]
+
+
+def seed_users(conn, tables, args, password_hash: str):
+    progress = Progress("users", args.users)
+    rows = []
+    for i in range(args.users):
+        rows.append({
+            "id": seeded_id(args.seed, NS_USER, i),
+            "username": f"seed{args.seed}_user{i}",
+            "email": f"seed{args.seed}_user{i}@example.com",
+            "password_hash": password_hash,
+            "created_at": datetime.now(),
+        })
+        if len(rows) >= BATCH_SIZE:
+            _insert(conn, tables["users"], rows, progress)
+            rows = []
+    _insert(conn, tables["users"], rows, progress)
+
+
+def seed_news(conn, tables, args, category_ids: List[str], sources: List[str], now: datetime,
+              rng: random.Random, hot_score) -> Dict[int, array]:
+    """写入新闻和分类关联，返回 分类序号 -> 该分类下的新闻序号（按发布时间递增）"""
+    progress = Progress("news", args.news)
+    by_category = {c: array("I") for c in range(len(category_ids))}
+    news_rows, link_rows = [], []
+    for i in range(args.news):
+        published_at = _published_at(now, i, args.news, args.days)
+        importance = round(min(10.0, max(0.0, rng.gauss(5.5, 1.8))), 1)
+        paragraphs = [PARAGRAPHS[(i + k) % len(PARAGRAPHS)] for k in range(8)]
+        content = "\n\n".join(paragraphs)
+        content = (content * (args.content_chars // len(content) + 1))[:args.content_chars]
+        news_id = seeded_id(args.seed, NS_NEWS, i)
+        news_rows.append({
+            "id": news_id,
+            "title": f"合成新闻 {i}：{paragraphs[0][:24]}",
+            "summary": paragraphs[1][:120],
+            "content": content,
+            "source": sources[i % len(sources)],
+            "url": f"https://seed.local/{args.seed}/news/{i}",
+            "published_at": published_at,
+            "crawled_at": published_at + timedelta(minutes=rng.randint(1, 90)),
+            "importance_score": importance,
+            "hot_score": hot_score(importance, published_at, now),
+            "raw_html": None,
+            "story_id": None,
+        })
+        for category in rng.sample(range(len(category_ids)), rng.choice((1, 1, 1, 2))):
+            link_rows.append({"news_id": news_id, "category_id": category_ids[category]})
+            by_category[category].append(i)
+        if len(news_rows) >= BATCH_SIZE:
+            _insert(conn, tables["news"], news_rows, progress)
+            conn.execute(tables["news_category"].insert(), link_rows)
+            news_rows, link_rows = [], []
+    _insert(conn, tables["news"], news_rows, progress)
+    if link_rows:
+        conn.execute(tables["news_category"].insert(), link_rows)
+    return by_category
+
+
+def seed_history(conn, tables, args, now: datetime, rng: random.Random):
+    progress = Progress("history", args.history)
+    rows = []
+    for _ in range(args.history):
+        news_index = _recent_index(args.news, rng)
+        published_at = _published_at(now, news_index, args.news, args.days)
+        # 多数浏览发生在发布后不久
+        viewed_at = published_at + (now - published_at) * rng.random() ** 4
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": seeded_id(args.seed, NS_USER, int(args.users * rng.random() ** 2)),
+            "news_id": seeded_id(args.seed, NS_NEWS, news_index),
+            "viewed_at": viewed_at,
+        })
+        if len(rows) >= BATCH_SIZE:
+            _insert(conn, tables["browse_history"], rows, progress)
+            rows = []
+    _insert(conn, tables["browse_history"], rows, progress)
+
+
+def seed_subscriptions_and_feed(conn, tables, args, category_ids: List[str], by_category: Dict[int, array],
+                                now: datetime, rng: random.Random):
+    sub_progress = Progress("subscriptions", args.users * (1 + min(args.max_subscriptions, len(category_ids))) // 2)
+    feed_progress = Progress("feed entries", args.users * args.feed_per_user)
+    sub_rows, feed_rows = [], []
+    subscription_index = 0
+    for u in range(args.users):
+        user_id = seeded_id(args.seed, NS_USER, u)
+        categories = rng.sample(range(len(category_ids)), rng.randint(1, min(args.max_subscriptions, len(category_ids))))
+        for category in categories:
+            sub_rows.append({
+                "id": seeded_id(args.seed, NS_SUBSCRIPTION, subscription_index),
+                "user_id": user_id,
+                "category_id": category_ids[category],
+                "created_at": now - timedelta(days=rng.randint(0, args.days)),
+            })
+            subscription_index += 1
+        if args.feed_per_user:
+            # 写扩散的结果：所订阅分类中最近的新闻
+            recent = set()
+            for category in categories:
+                recent.update(by_category[category][-args.feed_per_user:])
+            for news_index in sorted(recent)[-args.feed_per_user:]:
+                feed_rows.append({
+                    "user_id": user_id,
+                    "news_id": seeded_id(args.seed, NS_NEWS, news_index),
+                    "published_at": _published_at(now, news_index, args.news, args.days),
+                    "created_at": now,
+                })
+        if len(sub_rows) >= BATCH_SIZE:
+            _insert(conn, tables["user_category_subscriptions"], sub_rows, sub_progress)
+            sub_rows = []
+        if len(feed_rows) >= BATCH_SIZE:
+            _insert(conn, tables["user_feed_entries"], feed_rows, feed_progress)
+            feed_rows = []
+    _insert(conn, tables["user_category_subscriptions"], sub_rows, sub_progress)
+    _insert(conn, tables["user_feed_entries"], feed_rows, feed_progress)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="按生产规模生成合成数据集")
+    parser.add_argument("--users", type=int, default=50000, help="用户数")
+    parser.add_argument("--news", type=int, default=1000000, help="新闻数")
+    parser.add_argument("--history", type=int, default=10000000, help="浏览历史行数")
+    parser.add_argument("--categories", type=int, default=12, help="分类数")
+    parser.add_argument("--max-subscriptions", type=int, default=4, help="每个用户最多订阅的分类数")
+    parser.add_argument("--feed-per-user", type=int, default=200, help="每个用户的信息流条目数，0 表示不生成")
+    parser.add_argument("--days", type=int, default=90, help="新闻发布时间分布的天数")
+    parser.add_argument("--content-chars", type=int, default=1500, help="每篇新闻正文长度")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子，同时决定生成的ID")
+    parser.add_argument("--output", help="生成摘要 JSON 输出路径（供压测结果引用）")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+
+    from sqlalchemy import func, select
+    from app.api.user import hash_password
+    from app.config import NEWS_SOURCES
+    from app.db.database import Base, create_tables, engine
+    import app.models  # noqa: F401  注册全部表结构
+    from app.services.ranking import hot_score
+
+    create_tables()
+    tables = Base.metadata.tables
+    with engine.connect() as conn:
+        taken = conn.execute(
+            select(func.count()).select_from(tables["users"])
+            .where(tables["users"].c.id == seeded_id(args.seed, NS_USER, 0))
+        ).scalar()
+    if taken:
+        print(f"种子 {args.seed} 的数据已存在，请换一个 --seed 或使用新的数据库", file=sys.stderr)
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    sources = [source["name"] for source in NEWS_SOURCES]
+    print(f"写入 {engine.url.render_as_string(hide_password=True)}")
+    started = time.perf_counter()
+    timings = {}
+
+    def timed(name, fn, *fn_args):
+        begin = time.perf_counter()
+        with engine.begin() as conn:
+            value = fn(conn, tables, *fn_args)
+        timings[name] = round(time.perf_counter() - begin, 1)
+        return value
+
+    category_ids = timed("categories", seed_categories, args.seed, args.categories)
+    timed("users", seed_users, args, hash_password("password"))
+    by_category = timed("news", seed_news, args, category_ids, sources, now, rng, hot_score)
+    timed("history", seed_history, args, now, rng)
+    timed("subscriptions_and_feed", seed_subscriptions_and_feed, args, category_ids, by_category, now, rng)
+
+    summary = {
+        "database": engine.url.render_as_string(hide_password=True),
+        "generated_at": now.isoformat(),
+        "seconds": round(time.perf_counter() - started, 1),
+        "stage_seconds": timings,
+        "params": vars(args),
+    }
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"用户密码均为 password，用户名形如 seed{args.seed}_user0")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom';
 
 const AdminPanel = () => {
@@ -6,6 +6,10 @@ const AdminPanel = () => {
   const [message, setMessage] = useState('');
   const [schedulerStatus, setSchedulerStatus] = useState(null);
   const [lastCrawlResult, setLastCrawlResult] = useState(null);
+  const [crawlProgress, setCrawlProgress] = useState(null);
+  const [leader, setLeader] = useState(null);
+  const [currentJob, setCurrentJob] = useState(null);
+  const pollTimerRef = useRef(null);
   const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
 
   // 獲取調度器狀態
@@ -14,19 +18,70 @@ const AdminPanel = () => {
       const response = await fetch(`${API_BASE_URL}/crawler/status`);
       const data = await response.json();
       setSchedulerStatus(data.scheduler_status);
+      setLeader(data.leader);
     } catch (error) {
       console.error('獲取調度器狀態失敗:', error);
     }
   };
 
-  // 組件加載時獲取狀態
+  // 組件加載時獲取狀態，之後通過服務端推送 (SSE) 接收爬蟲進度，不再輪詢
   useEffect(() => {
     fetchSchedulerStatus();
-    // 每30秒更新一次狀態
-    const interval = setInterval(fetchSchedulerStatus, 30000);
-    return () => clearInterval(interval);
+    const source = new EventSource(`${API_BASE_URL}/events?types=crawler`);
+    source.addEventListener('crawler', (event) => {
+      const data = JSON.parse(event.data);
+      setCrawlProgress(data);
+      if (data.status) {
+        setSchedulerStatus(data.status);
+      }
+    });
+    return () => source.close();
   }, []);
 
+  // 輪詢爬取任務進度，直到任務結束
+  const pollJob = (jobId, startTime) => {
+    const timer = setInterval(async () => {
+      try {
+        const response = await fetch(`${API_BASE_URL}/crawler/jobs/${jobId}`);
+        if (!response.ok) {
+          throw new Error(`查詢任務失敗 (${response.status})`);
+        }
+        const job = await response.json();
+        setCurrentJob(job);
+        if (['succeeded', 'failed', 'cancelled'].includes(job.state)) {
+          clearInterval(timer);
+          finishJob(job, startTime);
+        }
+      } catch (error) {
+        clearInterval(timer);
+        setMessage(`❌ 網絡錯誤: ${error.message}`);
+        setLoading(false);
+      }
+    }, 2000);
+    pollTimerRef.current = timer;
+  };
+
+  const finishJob = (job, startTime) => {
+    const duration = ((Date.now() - startTime) / 1000).toFixed(2);
+    const success = job.state === 'succeeded';
+    setMessage(success
+      ? `✅ 爬取任務完成，發現 ${job.news_count} 條新聞`
+      : `❌ 爬取任務${job.state === 'cancelled' ? '已取消' : '失敗'}: ${job.error || ''}`);
+    setLastCrawlResult({
+      success,
+      duration: job.duration ? job.duration.toFixed(2) : duration,
+      newsCount: job.news_count || 0,
+      error: success ? null : job.error,
+      timestamp: new Date().toLocaleString()
+    });
+    setLoading(false);
+    // 更新調度器狀態
+    setTimeout(fetchSchedulerStatus, 1000);
+  };
+
+  // 組件卸載時停止輪詢
+  useEffect(() => () => clearInterval(pollTimerRef.current), []);
+
   const triggerCrawl = async () => {
     setLoading(true);
     setMessage('');
@@ -35,21 +90,16 @@ const AdminPanel = () => {
     const startTime = Date.now();
     
     try {
+      // 接口立即返回任務ID，爬取在後台執行
       const response = await fetch(`${API_BASE_URL}/admin/crawl-now`, {
         method: 'POST',
       });
       const data = await response.json();
       
-      const duration = ((Date.now() - startTime) / 1000).toFixed(2);
-      
       if (response.ok) {
-        setMessage(`✅ ${data.message}`);
-        setLastCrawlResult({
-          success: true,
-          duration: data.duration || duration,
-          newsCount: data.news_count || 0,
-          timestamp: new Date().toLocaleString()
-        });
+        setMessage(`⏳ ${data.message}`);
+        setCurrentJob(data.job);
+        pollJob(data.job_id, startTime);
       } else {
         setMessage(`❌ 操作失敗: ${data.detail || data.message}`);
         setLastCrawlResult({
@@ -57,6 +107,7 @@ const AdminPanel = () => {
           error: data.detail || data.message,
           timestamp: new Date().toLocaleString()
         });
+        setLoading(false);
       }
     } catch (error) {
       setMessage(`❌ 網絡錯誤: ${error.message}`);
@@ -65,10 +116,22 @@ const AdminPanel = () => {
         error: error.message,
         timestamp: new Date().toLocaleString()
       });
-    } finally {
       setLoading(false);
-      // 更新調度器狀態
-      setTimeout(fetchSchedulerStatus, 1000);
+    }
+  };
+
+  const cancelCrawl = async () => {
+    if (!currentJob) return;
+    try {
+      const response = await fetch(`${API_BASE_URL}/crawler/jobs/${currentJob.id}/cancel`, {
+        method: 'POST',
+      });
+      const data = await response.json();
+      if (!response.ok) {
+        setMessage(`❌ 取消失敗: ${data.detail}`);
+      }
+    } catch (error) {
+      setMessage(`❌ 網絡錯誤: ${error.message}`);
     }
   };
 
@@ -130,6 +193,26 @@ const AdminPanel = () => {
                 </span>
               </div>
             )}
+            {leader && (
+              <div style={{ padding: '10px', backgroundColor: 'white', borderRadius: '5px', gridColumn: '1 / -1' }}>
+                <strong>主節點:</strong> 
+                <span style={{ marginLeft: '8px' }}>
+                  {leader.leader_id || '暫無（等待選舉）'}
+                  {leader.heartbeat_at && `，最近心跳 ${new Date(leader.heartbeat_at).toLocaleString()}`}
+                </span>
+              </div>
+            )}
+            {crawlProgress && (
+              <div style={{ padding: '10px', backgroundColor: 'white', borderRadius: '5px', gridColumn: '1 / -1' }}>
+                <strong>爬蟲進度:</strong> 
+                <span style={{ marginLeft: '8px' }}>
+                  {crawlProgress.stage}
+                  {crawlProgress.source && ` - ${crawlProgress.source}`}
+                  {crawlProgress.index && ` (${crawlProgress.index}/${crawlProgress.total_sources})`}
+                  {crawlProgress.saved !== undefined && `，新增 ${crawlProgress.saved} 篇`}
+                </span>
+              </div>
+            )}
           </div>
         ) : (
           <p style={{ color: '#6c757d' }}>正在加載調度器狀態...</p>
@@ -161,15 +244,46 @@ const AdminPanel = () => {
         >
           {loading ? '⏳ 執行中...' : '▶️ 立即執行爬蟲任務'}
         </button>
+        {loading && currentJob && (
+          <button 
+            onClick={cancelCrawl}
+            style={{
+              backgroundColor: '#dc3545',
+              color: 'white',
+              border: 'none',
+              padding: '12px 24px',
+              borderRadius: '5px',
+              fontSize: '16px',
+              cursor: 'pointer',
+              marginLeft: '10px'
+            }}
+          >
+            ⏹ 取消
+          </button>
+        )}
+        
+        {loading && currentJob && (
+          <div style={{ marginTop: '15px', padding: '10px', backgroundColor: 'white', borderRadius: '5px' }}>
+            <strong>任務進度:</strong> 
+            <span style={{ marginLeft: '8px' }}>
+              來源 {currentJob.progress.sources_done}/{currentJob.progress.sources_total}
+              {currentJob.progress.current_source && `（${currentJob.progress.current_source}）`}
+              ，入隊 {currentJob.progress.articles_queued}
+              ，抓取 {currentJob.progress.articles_fetched}
+              ，分析 {currentJob.progress.articles_analysed}
+              ，保存 {currentJob.progress.articles_saved}
+            </span>
+          </div>
+        )}
         
         {message && (
           <div style={{ 
             marginTop: '15px', 
             padding: '10px', 
             borderRadius: '5px',
-            backgroundColor: message.includes('✅') ? '#d4edda' : '#f8d7da',
-            border: `1px solid ${message.includes('✅') ? '#c3e6cb' : '#f5c6cb'}`,
-            color: message.includes('✅') ? '#155724' : '#721c24'
+            backgroundColor: message.includes('❌') ? '#f8d7da' : '#d4edda',
+            border: `1px solid ${message.includes('❌') ? '#f5c6cb' : '#c3e6cb'}`,
+            color: message.includes('❌') ? '#721c24' : '#155724'
           }}>
             {message}
           </div>
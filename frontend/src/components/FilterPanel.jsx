@@ -9,18 +9,21 @@ const FilterPanel = ({ filters, onFilterChange }) => {
   
   const [localFilters, setLocalFilters] = useState({
     minScore: filters.minScore || 0,
-    days: filters.days || 7
+    days: filters.days || 7,
+    sort: filters.sort || 'importance'
   });
   
   // 从URL初始化筛选参数
   useEffect(() => {
     const minScoreParam = searchParams.get('min_score');
     const daysParam = searchParams.get('days');
+    const sortParam = searchParams.get('sort');
     
-    if (minScoreParam || daysParam) {
+    if (minScoreParam || daysParam || sortParam) {
       const updatedFilters = { ...localFilters };
       if (minScoreParam) updatedFilters.minScore = parseFloat(minScoreParam);
       if (daysParam) updatedFilters.days = parseInt(daysParam, 10);
+      if (sortParam) updatedFilters.sort = sortParam;
       setLocalFilters(updatedFilters);
     }
   }, []);
@@ -39,6 +42,13 @@ const FilterPanel = ({ filters, onFilterChange }) => {
     updateFilters(newFilters, true);
   };
   
+  // 更新排序方式
+  const handleSortChange = (sort) => {
+    const newFilters = { ...localFilters, sort };
+    setLocalFilters(newFilters);
+    updateFilters(newFilters, true);
+  };
+  
   // 更新过滤器和URL
   const updateFilters = (newFilters, resetPage = false) => {
     const newSearchParams = new URLSearchParams();
@@ -48,11 +58,15 @@ const FilterPanel = ({ filters, onFilterChange }) => {
     if (newFilters.days !== 7) {
       newSearchParams.set('days', newFilters.days);
     }
+    if (newFilters.sort !== 'importance') {
+      newSearchParams.set('sort', newFilters.sort);
+    }
     setSearchParams(newSearchParams);
     // 保证传递完整结构，重置分页参数
     onFilterChange({
       minScore: newFilters.minScore,
       days: newFilters.days,
+      sort: newFilters.sort,
       limit: filters.limit || 20,
       skip: 0 // 切换筛选条件时重置分页
     });
@@ -100,13 +114,29 @@ const FilterPanel = ({ filters, onFilterChange }) => {
           </div>
         </div>
         
-        {(localFilters.minScore > 0 || localFilters.days !== 7) && (
+        <div className="filter-group time-group">
+          <label className="filter-label">排序:</label>
+          <div className="time-buttons">
+            <button 
+              className={`time-button ${localFilters.sort === 'importance' ? 'active' : ''}`}
+              onClick={() => handleSortChange('importance')}>
+              重要性
+            </button>
+            <button 
+              className={`time-button ${localFilters.sort === 'hot' ? 'active' : ''}`}
+              onClick={() => handleSortChange('hot')}>
+              热度
+            </button>
+          </div>
+        </div>
+        
+        {(localFilters.minScore > 0 || localFilters.days !== 7 || localFilters.sort !== 'importance') && (
           <button 
             className="reset-button"
             onClick={() => {
-              setLocalFilters({ minScore: 0, days: 7 });
+              setLocalFilters({ minScore: 0, days: 7, sort: 'importance' });
               setSearchParams({});
-              onFilterChange({ minScore: 0, days: 7 });
+              onFilterChange({ minScore: 0, days: 7, sort: 'importance' });
             }}>
             重置
           </button>
@@ -2,7 +2,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { formatDate } from '../utils/dateFormat';
-import { fetchNewsDetail } from '../services/api';
+import { fetchNewsDetail, fetchRelatedNews } from '../services/api';
 import { getUser } from '../utils/auth';
 import { addBrowseHistory } from '../services/api';
 import './NewsDetail.css';
@@ -12,6 +12,15 @@ const NewsDetail = () => {
   const [news, setNews] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [related, setRelated] = useState([]);
+  
+  useEffect(() => {
+    // 相关新闻加载失败不影响正文显示
+    setRelated([]);
+    fetchRelatedNews(id)
+      .then(setRelated)
+      .catch(err => console.error(err));
+  }, [id]);
   
   useEffect(() => {
     const loadNewsDetail = async () => {
@@ -89,6 +98,20 @@ const NewsDetail = () => {
         ))}
       </div>
       
+      {related.length > 0 && (
+        <section className="detail-related">
+          <h3>相关新闻</h3>
+          <ul>
+            {related.map(item => (
+              <li key={item.id}>
+                <Link to={`/news/${item.id}`}>{item.title}</Link>
+                <span className="detail-source"> · {item.source}</span>
+              </li>
+            ))}
+          </ul>
+        </section>
+      )}
+      
       <div className="detail-footer">
         <Link to="/" className="back-to-home">
           &larr; 返回新闻列表
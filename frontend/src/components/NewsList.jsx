@@ -3,7 +3,7 @@ import React, { useState, useEffect } from 'react';
 import { useParams, useSearchParams } from 'react-router-dom';
 import NewsItem from './NewsItem';
 import FilterPanel from './FilterPanel';
-import { fetchNews } from '../services/api';
+import { fetchNewsPage, subscribeEvents } from '../services/api';
 import './NewsList.css';
 
 const NewsList = () => {
@@ -18,19 +18,36 @@ const NewsList = () => {
   const [filters, setFilters] = useState({
     minScore: searchParams.get('min_score') || 0,
     days: searchParams.get('days') || 7,
+    sort: searchParams.get('sort') || 'importance',
     limit: 20,
-    skip: 0,
+    cursor: null,
     category
   });
   
   // 加载更多功能
   const [hasMore, setHasMore] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  
+  // 服务端推送的新文章数量（点击后刷新列表）
+  const [freshCount, setFreshCount] = useState(0);
+  
+  useEffect(() => {
+    const close = subscribeEvents(['news'], {
+      news: (article) => {
+        if (!category || article.categories.includes(category)) {
+          setFreshCount(count => count + 1);
+        }
+      }
+    });
+    return close;
+  }, [category]);
   
   useEffect(() => {
     // 当分类变化时，重置新闻列表
     setNews([]);
-    setFilters(prev => ({ ...prev, category, skip: 0 }));
+    setFilters(prev => ({ ...prev, category, cursor: null }));
     setHasMore(true);
+    setFreshCount(0);
   }, [category]);
   
   useEffect(() => {
@@ -44,18 +61,19 @@ const NewsList = () => {
           fetchParams.category = category;
         }
         
-        const data = await fetchNews(fetchParams);
+        const { items, nextCursor: cursor } = await fetchNewsPage(fetchParams);
         
-        if (filters.skip === 0) {
+        if (!filters.cursor) {
           // 首次加载或筛选条件变化
-          setNews(data);
+          setNews(items);
         } else {
           // 加载更多
-          setNews(prev => [...prev, ...data]);
+          setNews(prev => [...prev, ...items]);
         }
         
-        // 如果返回的新闻少于请求的数量，表示没有更多了
-        setHasMore(data.length === filters.limit);
+        // 服务端没有返回下一页游标，表示没有更多了
+        setNextCursor(cursor);
+        setHasMore(Boolean(cursor));
       } catch (err) {
         setError('加载新闻失败，请稍后重试');
         console.error(err);
@@ -69,16 +87,22 @@ const NewsList = () => {
   
   // 更新筛选条件
   const handleFilterChange = (newFilters) => {
-    setFilters({ ...newFilters, skip: 0 });
+    setFilters({ ...newFilters, cursor: null });
     setNews([]);
     setHasMore(true);
   };
   
+  // 有新文章时重新加载第一页
+  const handleShowFresh = () => {
+    setFreshCount(0);
+    setFilters(prev => ({ ...prev, cursor: null }));
+  };
+  
   // 加载更多
   const handleLoadMore = () => {
     setFilters(prev => ({
       ...prev,
-      skip: prev.skip + prev.limit
+      cursor: nextCursor
     }));
   };
   
@@ -97,6 +121,12 @@ const NewsList = () => {
           
           {error && <div className="error-message">{error}</div>}
           
+          {freshCount > 0 && (
+            <button className="load-more-btn" onClick={handleShowFresh}>
+              有 {freshCount} 条新新闻，点击刷新
+            </button>
+          )}
+          
           {news.length > 0 ? (
             <>
               <div className="news-items">
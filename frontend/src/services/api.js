@@ -226,6 +226,8 @@ export const fetchNews = async (params = {}) => {
   if (params.days) queryParams.append('days', params.days);
   if (params.skip) queryParams.append('skip', params.skip);
   if (params.limit) queryParams.append('limit', params.limit);
+  if (params.cursor) queryParams.append('cursor', params.cursor);
+  if (params.sort && params.sort !== 'importance') queryParams.append('sort', params.sort);
   
   // 拼接完整的URL
   const url = `${API_BASE_URL}${path}?${queryParams.toString()}`;
@@ -249,6 +251,49 @@ export const fetchNews = async (params = {}) => {
   }
 };
 
+// 游标分页：返回 { items, nextCursor }，nextCursor 为 null 表示没有更多
+export const fetchNewsPage = async (params = {}) => {
+  const queryParams = new URLSearchParams();
+
+  if (params.category) queryParams.append('category', params.category);
+  if (params.minScore) queryParams.append('min_score', params.minScore);
+  if (params.days) queryParams.append('days', params.days);
+  if (params.limit) queryParams.append('limit', params.limit);
+  if (params.cursor) queryParams.append('cursor', params.cursor);
+  if (params.sort && params.sort !== 'importance') queryParams.append('sort', params.sort);
+
+  const url = `${API_BASE_URL}/news?${queryParams.toString()}`;
+  logApiCall('GET', url, params);
+
+  try {
+    const response = await fetch(url);
+    if (!response.ok) {
+      throw new Error(`API错误(${response.status}): ${response.statusText}`);
+    }
+    const items = await response.json();
+    return { items, nextCursor: response.headers.get('X-Next-Cursor') };
+  } catch (err) {
+    console.error('❌ API请求失败:', err);
+    throw err;
+  }
+};
+
+// 订阅服务端推送 (SSE)。types 为事件类型数组，如 ['news', 'crawler']；
+// handlers 形如 { news: data => {}, crawler: data => {} }。返回关闭连接的函数
+export const subscribeEvents = (types, handlers) => {
+  const queryParams = new URLSearchParams();
+  if (types && types.length) queryParams.append('types', types.join(','));
+  const url = `${API_BASE_URL}/events?${queryParams.toString()}`;
+  logApiCall('SSE', url, types);
+
+  // EventSource 断线后会自动重连，并通过 Last-Event-ID 补发错过的事件
+  const source = new EventSource(url);
+  Object.entries(handlers).forEach(([type, handler]) => {
+    source.addEventListener(type, (event) => handler(JSON.parse(event.data)));
+  });
+  return () => source.close();
+};
+
 export const fetchNewsDetail = async (id) => {
   // 路径现在相对于 API_BASE_URL
   const path = `/news/${id}`;
@@ -273,6 +318,17 @@ export const fetchNewsDetail = async (id) => {
   }
 };
 
+// 获取相关新闻（按内容相似度）
+export const fetchRelatedNews = async (id, limit = 5) => {
+  const url = `${API_BASE_URL}/news/${id}/related?limit=${limit}`;
+  logApiCall('GET', url);
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error(`获取相关新闻失败(${response.status}): ${response.statusText}`);
+  }
+  return await response.json();
+};
+
 export const fetchCategories = async () => {
   // 路径现在相对于 API_BASE_URL
   const path = '/categories';